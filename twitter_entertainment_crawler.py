@@ -1,5 +1,5 @@
 """
-🐦 TWITTER ENTERTAINMENT CRAWLER - Using Selenium/BeautifulSoup
+🐦 TWITTER ENTERTAINMENT CRAWLER - Using Selenium/lxml
 Crawl Twitter/X data for sentiment analysis on entertainment (films/music)
 
 TÍNH NĂNG:
@@ -8,39 +8,87 @@ TÍNH NĂNG:
 ✅ Extract engagement metrics (likes, retweets, replies)
 ✅ Support multiple search modes (keywords, hashtags, users, trends)
 ✅ Filter by date range
-✅ Export to CSV/JSON
+✅ Export to Parquet/CSV/JSON Lines
 ✅ Integrate with data_cleaner
 
 CÁCH SỬ DỤNG:
-python twitter_entertainment_crawler.py
+python twitter_entertainment_crawler.py                 # interactive menu
+python twitter_entertainment_crawler.py --mode keywords --query "oscars,box office" --query "#netflix" --max-tweets 300
+python twitter_entertainment_crawler.py --mode user --query netflix --query spotify --category film
 
 LƯU Ý:
 - Cần cài đặt Chrome/Chromium và ChromeDriver
 - Có thể cần đăng nhập Twitter để tránh rate limiting
 - Sử dụng Selenium để handle dynamic content
-- BeautifulSoup để parse HTML và extract data
+- lxml (tùy chọn) để parse HTML khi parser JS trong trang lỗi
 """
 
+import argparse
 import json
 import logging
 import os
+import pickle
 import random
 import re
 import time
 import getpass
+import asyncio
+import csv
+import importlib.util
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from urllib.parse import quote_plus
 
 import pandas as pd
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, JavascriptException
+
+# Optional: HTML fallback when the in-page JS tweet parser fails (pip install lxml)
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Optional: HTTP client for the GraphQL fast path (pip install httpx[http2])
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Optional: fast C JSON encoder (pip install orjson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: Parquet output (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Optional: Aho-Corasick keyword matching (pip install pyahocorasick)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional: Bloom filter for cheap cross-query tweet dedup (pip install pybloom-live)
+try:
+    from pybloom_live import ScalableBloomFilter
+except ImportError:
+    ScalableBloomFilter = None
 
 # Setup logging
 from logger_config import get_main_logger
@@ -50,10 +98,46 @@ logger = get_main_logger()
 from data_cleaner import CommentDataCleaner
 
 
+class TokenBucket:
+    """
+    Simple token bucket rate limiter
+    
+    Tokens refill at `rate` per second up to `capacity`; each request takes one token
+    and blocks only when the bucket is empty.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+    
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available
+        
+        Returns:
+            Seconds spent waiting
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+        
+        waited = 0.0
+        if self.tokens < 1:
+            waited = (1 - self.tokens) / self.rate
+            time.sleep(waited)
+            self.tokens = 1.0
+            self.last_refill = time.monotonic()
+        
+        self.tokens -= 1
+        return waited
+
+
 class TwitterEntertainmentCrawler:
     """
     Twitter/X Crawler chuyên dụng cho entertainment sentiment analysis
-    Sử dụng Selenium để scrape dynamic content và BeautifulSoup để parse HTML
+    Sử dụng Selenium để scrape dynamic content và lxml để parse HTML
     
     Fields collected (optimized for sentiment analysis):
     - comment_text: Tweet content (cleaned)
@@ -92,8 +176,129 @@ class TwitterEntertainmentCrawler:
         'Grammy', 'Grammys', 'music video', 'single release'
     ]
     
+    # Indicators used by detect_entertainment_category
+    FILM_INDICATORS = ['movie', 'film', 'cinema', 'actor', 'actress', 'director',
+                       'trailer', 'box office', 'oscar', 'hollywood', 'premiere']
+    FILM_INDICATOR_HASHTAGS = frozenset(['#movie', '#film', '#cinema', '#movies', '#films', '#oscar'])
+    MUSIC_INDICATORS = ['song', 'album', 'music', 'artist', 'singer', 'musician',
+                        'spotify', 'billboard', 'grammy', 'single', 'release', 'track']
+    MUSIC_INDICATOR_HASHTAGS = frozenset(['#music', '#song', '#album', '#spotify', '#billboard', '#grammy'])
+    
+    # Resources not needed for text scraping (blocked via CDP in Chrome)
+    BLOCKED_RESOURCE_PATTERNS = (
+        '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg',
+        '*.mp4', '*.m3u8', '*.woff', '*.woff2', '*.ttf'
+    )
+    
+    # Twitter web GraphQL API (used by scrape_by_user when session cookies are available)
+    GRAPHQL_BASE_URL = "https://twitter.com/i/api/graphql"
+    GRAPHQL_USER_BY_SCREEN_NAME = "G3KGOASz96M-Qu0nwmGXNg/UserByScreenName"
+    GRAPHQL_USER_TWEETS = "E3opETHurmVJflFsUBVuUQ/UserTweets"
+    GRAPHQL_BEARER_TOKEN = (
+        "AAAAAAAAAAAAAAAAAAAAANRILgAAAAAAnNwIzUejRCOuH5E6I8xnZz4puTs%3D"
+        "1Zv7ttfk8LF81IUq16cHjhLTvJu4FA33AGWWjCpTnA"
+    )
+    GRAPHQL_FEATURES = {
+        'hidden_profile_likes_enabled': False,
+        'responsive_web_graphql_exclude_directive_enabled': True,
+        'verified_phone_label_enabled': False,
+        'responsive_web_graphql_skip_user_profile_image_extensions_enabled': False,
+        'responsive_web_graphql_timeline_navigation_enabled': True,
+        'tweetypie_unmention_optimization_enabled': True,
+        'longform_notetweets_consumption_enabled': True,
+        'responsive_web_edit_tweet_api_enabled': True,
+        'view_counts_everywhere_api_enabled': True,
+        'freedom_of_speech_not_reach_fetch_enabled': True,
+        'standardized_nudges_misinfo': True,
+    }
+    GRAPHQL_PAGE_SIZE = 40
+    
+    # Output schema of process_tweet (explicit columns skip pandas schema inference)
+    TWEET_COLUMNS = (
+        'comment_id', 'post_id', 'platform', 'author_name', 'author_id', 'comment_text',
+        'published_at', 'like_count', 'reply_count', 'retweet_count', 'quote_count',
+        'sentiment_label', 'sentiment_score', 'crawled_at', 'is_reply', 'parent_comment_id',
+        'language', 'entertainment_category', 'hashtags', 'mentions', 'urls', 'media_type',
+        'tweet_id', 'user_verified', 'user_followers'
+    )
+    
+    # Columns holding lists in processed tweets (JSON-encoded only for CSV output)
+    LIST_COLUMNS = ('hashtags', 'mentions', 'urls')
+    
     # English language detection pattern
     ENGLISH_PATTERN = re.compile(r'[a-zA-Z]+')
+    TWEET_ID_PATTERN = re.compile(r'/status/(\d+)')
+    LOGIN_PATTERN = re.compile(r'sign in|log in|login|create account', re.IGNORECASE)
+    
+    # Counts DOM nodes added under <main> so scrolling can wait on real changes
+    OBSERVE_TWEETS_JS = r'''
+        window.__newTweetCount = 0;
+        if (!window.__tweetObserver) {
+            window.__tweetObserver = new MutationObserver((mutations) => {
+                window.__newTweetCount = (window.__newTweetCount || 0) +
+                    mutations.reduce((sum, r) => sum + r.addedNodes.length, 0);
+            });
+            window.__tweetObserver.observe(document.querySelector('main') || document.body,
+                                           {childList: true, subtree: true});
+        }
+    '''
+    
+    # Parses every rendered tweet in one round-trip (mirrors _extract_tweet_fields)
+    PARSE_TWEETS_JS = r'''
+        window.__parseTweets = function(selectors) {
+            let articles = [];
+            for (const selector of selectors) {
+                articles = Array.from(document.querySelectorAll(selector));
+                if (articles.length) break;
+            }
+            const toCount = (text) => {
+                const match = (text || '').replace(/,/g, '').match(/\d+/);
+                return match ? parseInt(match[0], 10) : 0;
+            };
+            return articles.map((a) => {
+                let textElem = a.querySelector('div[data-testid="tweetText"]');
+                if (!textElem) {
+                    textElem = Array.from(a.querySelectorAll('div[class]'))
+                        .find((d) => /tweet.*text/i.test(d.className)) || null;
+                }
+                const statusLink = a.querySelector('a[href*="/status/"]');
+                const statusMatch = statusLink ? statusLink.getAttribute('href').match(/\/status\/(\d+)/) : null;
+                const idElem = a.querySelector('[data-tweet-id]');
+                const userLink = Array.from(a.querySelectorAll('a[href^="/"]'))
+                    .find((x) => /^\/[^\/]+$/.test(x.getAttribute('href')));
+                const counts = {like: 0, retweet: 0, reply: 0, quote: 0};
+                for (const button of a.querySelectorAll('button[data-testid]')) {
+                    const testid = button.getAttribute('data-testid').toLowerCase();
+                    const count = toCount(button.textContent);
+                    if (testid.includes('like') || testid.includes('favorite')) counts.like = count;
+                    else if (testid.includes('retweet')) counts.retweet = count;
+                    else if (testid.includes('reply')) counts.reply = count;
+                    else if (testid.includes('quote')) counts.quote = count;
+                }
+                const timeElem = a.querySelector('time');
+                let mediaType = null;
+                if (Array.from(a.querySelectorAll('img[alt]')).some((i) => /Image|Photo/i.test(i.alt))) {
+                    mediaType = 'photo';
+                } else if (a.querySelector('video') ||
+                           Array.from(a.querySelectorAll('div[class]')).some((d) => /video/i.test(d.className))) {
+                    mediaType = 'video';
+                }
+                return {
+                    text: textElem ? textElem.textContent.trim() : '',
+                    id: statusMatch ? statusMatch[1] : (idElem ? idElem.getAttribute('data-tweet-id') : null),
+                    username: userLink ? userLink.getAttribute('href').slice(1) : null,
+                    likes: counts.like,
+                    retweets: counts.retweet,
+                    replies: counts.reply,
+                    quotes: counts.quote,
+                    datetime: timeElem ? timeElem.getAttribute('datetime') : null,
+                    media_type: mediaType,
+                    is_reply: a.querySelector('div[data-testid="reply"]') !== null,
+                    verified: a.querySelector('svg[aria-label="Verified account"]') !== null
+                };
+            });
+        };
+    '''
     
     # Rate limiting configuration (IMPORTANT: To avoid being blocked)
     DEFAULT_DELAY_BETWEEN_REQUESTS = 2.0  # seconds between requests
@@ -103,6 +308,14 @@ class TwitterEntertainmentCrawler:
     BATCH_SIZE = 50  # process in batches
     MAX_RETRIES = 3  # retry on failure
     RETRY_DELAY = 10.0  # delay before retry
+    COOKIE_MAX_AGE = 24 * 3600  # seconds before persisted cookies are considered stale
+    RATE_LIMIT_BURST = 5  # requests allowed back-to-back before throttling kicks in
+    MAX_KEYWORD_WORKERS = 4  # cap parallel Chrome instances in scrape_by_keywords
+    MAX_USER_WORKERS = 3  # cap parallel browsers in scrape_by_users (anti-bot friendly)
+    TWEET_LOAD_TIMEOUT = 20  # max seconds to wait for the first tweets after navigation
+    SCROLL_WAIT_TIMEOUT = 5  # max seconds to wait for new tweets after a scroll
+    SCROLL_FALLBACK_DELAY = 0.5  # grace sleep when nothing new rendered after a scroll
+    KEYWORDS_PER_QUERY = 6  # keywords OR-ed into one search (keeps URL under search limits)
     
     def __init__(self, delay_between_requests: float = None, 
                  use_random_delays: bool = True,
@@ -113,7 +326,8 @@ class TwitterEntertainmentCrawler:
                  use_undetected: bool = False,
                  output_folder: str = "twitter_entertainment",
                  debug_mode: bool = False,
-                 sort_by: str = "latest"):
+                 sort_by: str = "latest",
+                 cache_dir: Optional[str] = ".twitter_cache"):
         """
         Initialize crawler
         
@@ -128,6 +342,8 @@ class TwitterEntertainmentCrawler:
             output_folder: Folder name inside 'data/' to save scraped data (default: "twitter_entertainment")
             debug_mode: Enable debug mode (save screenshots and HTML for debugging)
             sort_by: Sort tweets by 'latest' or 'top' (top = high engagement)
+            cache_dir: Folder to persist cookies and seen-tweet filter between runs
+                (None = keep everything in memory only)
         """
         self.cleaner = CommentDataCleaner()
         self.crawled_data = []
@@ -139,7 +355,50 @@ class TwitterEntertainmentCrawler:
         self.output_folder = output_folder
         self.debug_mode = debug_mode
         self.sort_by = sort_by  # 'latest' or 'top'
-        self.session_cookies = []  # Store cookies in memory only (not persisted)
+        # Constant search URL suffix: 'top' = popular tweets, 'live' = latest tweets
+        self._url_suffix = f"&src=typed_query&f={'top' if sort_by == 'top' else 'live'}"
+        self.session_cookies = []  # Cookies of the logged-in session (persisted to cache_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._cookies_validated = False  # Set once a page renders tweets; skips login checks
+        
+        # Tweet IDs already parsed in this crawler's lifetime (persists across keywords).
+        # Falls back to an exact set when pybloom-live is not installed.
+        if ScalableBloomFilter is not None:
+            self._seen_bloom = ScalableBloomFilter(initial_capacity=100_000, error_rate=0.001)
+        else:
+            self._seen_bloom = set()
+        # IDs this crawler added to _seen_bloom; worker crawlers hand them back to the parent
+        self._new_seen_ids: List[str] = []
+        
+        # Restore cookies and the seen-tweet filter from the previous run
+        self._load_persistent_state()
+        
+        # Aho-Corasick automaton over all category indicators (None = substring fallback)
+        self._category_automaton = None
+        if ahocorasick is not None:
+            self._category_automaton = ahocorasick.Automaton()
+            for category, indicators in (('film', self.FILM_INDICATORS), ('music', self.MUSIC_INDICATORS)):
+                for kw in indicators:
+                    self._category_automaton.add_word(kw, (category, kw))
+            self._category_automaton.make_automaton()
+        
+        # Processed tweet IDs returned to the caller so far (shared by film/music queries)
+        self._scraped_tweet_ids = set()
+        
+        # Constructor args, reused to spawn per-keyword crawlers in worker processes
+        self._worker_options = {
+            'delay_between_requests': delay_between_requests,
+            'use_random_delays': use_random_delays,
+            'batch_size': batch_size,
+            'headless': headless,
+            'driver_path': driver_path,
+            'use_firefox': use_firefox,
+            'use_undetected': use_undetected,
+            'output_folder': output_folder,
+            'debug_mode': debug_mode,
+            'sort_by': sort_by,
+            'cache_dir': cache_dir,
+        }
         
         # Create debug folder if debug mode enabled
         if self.debug_mode:
@@ -151,11 +410,16 @@ class TwitterEntertainmentCrawler:
         self.delay_between_requests = delay_between_requests or self.DEFAULT_DELAY_BETWEEN_REQUESTS
         self.use_random_delays = use_random_delays
         self.batch_size = batch_size or self.BATCH_SIZE
+        self._rate_limiter = TokenBucket(rate=1.0 / self.delay_between_requests,
+                                         capacity=self.RATE_LIMIT_BURST)
         
-        logger.info("TwitterEntertainmentCrawler initialized (Selenium/BeautifulSoup)")
+        logger.info("TwitterEntertainmentCrawler initialized (Selenium/lxml)")
         logger.info(f"Rate limiting: delay={self.delay_between_requests}s, random={use_random_delays}, batch_size={self.batch_size}")
         logger.info(f"Browser mode: {'headless' if headless else 'visible'}")
-        logger.info("🔒 Session-based cookies: Cookies sẽ chỉ tồn tại trong phiên làm việc này")
+        if self.cache_dir:
+            logger.info(f"🔒 Cookies được lưu trong {self.cache_dir}/ (hết hạn sau 24 giờ)")
+        else:
+            logger.info("🔒 Session-based cookies: Cookies sẽ chỉ tồn tại trong phiên làm việc này")
     
     def _setup_driver(self):
         """Setup Selenium WebDriver with anti-detection measures"""
@@ -277,6 +541,7 @@ class TwitterEntertainmentCrawler:
                     raise last_error
                 
                 logger.info("Undetected ChromeDriver ready for use")
+                self._block_heavy_resources()
                 
                 # Load session cookies if available
                 if self.session_cookies:
@@ -307,6 +572,8 @@ class TwitterEntertainmentCrawler:
                 if self.headless:
                     firefox_options.add_argument('--headless')
                 
+                # Don't download images - tweet text/metadata is all in the DOM
+                firefox_options.set_preference("permissions.default.image", 2)
                 firefox_options.set_preference("general.useragent.override", 
                     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0")
                 
@@ -372,6 +639,8 @@ class TwitterEntertainmentCrawler:
             "credentials_enable_service": False,
             "profile.password_manager_enabled": False,
             "profile.default_content_setting_values.notifications": 2,
+            # Don't download images - tweet text/metadata is all in the DOM
+            "profile.managed_default_content_settings.images": 2,
         }
         options.add_experimental_option("prefs", prefs)
         
@@ -409,6 +678,7 @@ class TwitterEntertainmentCrawler:
             })
             
             logger.info("ChromeDriver initialized successfully with anti-detection measures")
+            self._block_heavy_resources()
             
             # Load session cookies if available
             if self.session_cookies:
@@ -417,6 +687,65 @@ class TwitterEntertainmentCrawler:
             logger.error(f"Failed to initialize ChromeDriver: {e}")
             raise RuntimeError("ChromeDriver not found. Please install ChromeDriver or set driver_path.")
     
+    def _block_heavy_resources(self):
+        """Block images, video and fonts via CDP to cut page-load bandwidth (Chrome only)"""
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(self.BLOCKED_RESOURCE_PATTERNS)})
+            logger.debug("Blocked media/font requests via CDP")
+        except Exception as e:
+            logger.debug(f"Could not block media requests: {e}")
+    
+    def _load_persistent_state(self):
+        """Load cookies (if fresh) and the seen-tweet filter from cache_dir"""
+        if not self.cache_dir:
+            return
+        
+        cookies_file = self.cache_dir / 'cookies.pkl'
+        if cookies_file.exists():
+            age = time.time() - cookies_file.stat().st_mtime
+            if age < self.COOKIE_MAX_AGE:
+                try:
+                    with open(cookies_file, 'rb') as f:
+                        self.session_cookies = pickle.load(f)
+                    logger.info(f"✅ Loaded {len(self.session_cookies)} cookies from {cookies_file} "
+                                f"({age / 3600:.1f}h old)")
+                except Exception as e:
+                    logger.warning(f"Could not load cookies from {cookies_file}: {e}")
+            else:
+                logger.info("Saved cookies are older than 24h - please login again")
+        
+        bloom_file = self.cache_dir / 'bloom.pkl'
+        if bloom_file.exists():
+            try:
+                with open(bloom_file, 'rb') as f:
+                    self._seen_bloom = pickle.load(f)
+                logger.info(f"✅ Loaded seen-tweet filter from {bloom_file}")
+            except Exception as e:
+                logger.warning(f"Could not load seen-tweet filter from {bloom_file}: {e}")
+    
+    def save_persistent_state(self):
+        """Save cookies and the seen-tweet filter to cache_dir for the next run"""
+        if not self.cache_dir:
+            return
+        
+        if self.driver:
+            try:
+                self.session_cookies = self.driver.get_cookies() or self.session_cookies
+            except Exception as e:
+                logger.debug(f"Could not read cookies from driver: {e}")
+        
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if self.session_cookies:
+                with open(self.cache_dir / 'cookies.pkl', 'wb') as f:
+                    pickle.dump(self.session_cookies, f)
+            with open(self.cache_dir / 'bloom.pkl', 'wb') as f:
+                pickle.dump(self._seen_bloom, f)
+            logger.info(f"💾 Saved cookies and seen-tweet filter to {self.cache_dir}/")
+        except Exception as e:
+            logger.warning(f"Failed to save crawler state: {e}")
+    
     def _load_session_cookies(self):
         """Load cookies from session memory"""
         if not self.session_cookies:
@@ -961,22 +1290,22 @@ class TwitterEntertainmentCrawler:
             return random.uniform(self.MIN_DELAY, self.MAX_DELAY)
         return self.delay_between_requests
     
-    def _smart_delay(self, tweet_count: int):
+    def _throttle(self):
         """
-        Apply smart delay strategy:
-        - Small delay after each tweet
-        - Longer delay after batches
-        - Random delays to avoid detection
+        Rate-limit outgoing requests (navigations and scroll loads):
+        - Token bucket keeps a steady request rate with small bursts
+        - Random jitter to avoid pattern detection
         """
-        if tweet_count % self.batch_size == 0 and tweet_count > 0:
-            # Longer delay after batch
-            delay = self.DELAY_AFTER_BATCH + random.uniform(0, 3.0)
-            logger.debug(f"Batch delay: {delay:.2f}s after {tweet_count} tweets")
-            time.sleep(delay)
-        else:
-            # Normal delay with randomization
-            delay = self._get_random_delay()
-            time.sleep(delay)
+        waited = self._rate_limiter.acquire()
+        if waited:
+            logger.debug(f"Rate limit: waited {waited:.2f}s")
+        if self.use_random_delays:
+            time.sleep(random.uniform(0, self.MIN_DELAY))
+    
+    def _navigate(self, url: str):
+        """Load a URL in the browser, respecting the request rate limit"""
+        self._throttle()
+        self.driver.get(url)
     
     def is_english_text(self, text: str) -> bool:
         """
@@ -1030,23 +1359,19 @@ class TwitterEntertainmentCrawler:
         """
         text_lower = text.lower()
         
-        # Film indicators
-        film_keywords = ['movie', 'film', 'cinema', 'actor', 'actress', 'director', 
-                        'trailer', 'box office', 'oscar', 'hollywood', 'premiere']
-        film_hashtags = ['#movie', '#film', '#cinema', '#movies', '#films', '#oscar']
-        
-        # Music indicators
-        music_keywords = ['song', 'album', 'music', 'artist', 'singer', 'musician',
-                         'spotify', 'billboard', 'grammy', 'single', 'release', 'track']
-        music_hashtags = ['#music', '#song', '#album', '#spotify', '#billboard', '#grammy']
-        
-        # Check text
-        film_score = sum(1 for kw in film_keywords if kw in text_lower)
-        music_score = sum(1 for kw in music_keywords if kw in text_lower)
+        # Check text: count distinct indicator keywords per category in one scan
+        if self._category_automaton is not None:
+            matched = {value for _, value in self._category_automaton.iter(text_lower)}
+            film_score = sum(1 for category, _ in matched if category == 'film')
+            music_score = len(matched) - film_score
+        else:
+            film_score = sum(1 for kw in self.FILM_INDICATORS if kw in text_lower)
+            music_score = sum(1 for kw in self.MUSIC_INDICATORS if kw in text_lower)
         
         # Check hashtags
-        film_score += sum(1 for ht in film_hashtags if ht in hashtags)
-        music_score += sum(1 for ht in music_hashtags if ht in hashtags)
+        hashtag_set = set(hashtags)
+        film_score += len(self.FILM_INDICATOR_HASHTAGS & hashtag_set)
+        music_score += len(self.MUSIC_INDICATOR_HASHTAGS & hashtag_set)
         
         # Determine category
         if film_score > music_score and film_score > 0:
@@ -1056,158 +1381,159 @@ class TwitterEntertainmentCrawler:
         else:
             return None  # Could be both or neither
     
-    def _parse_tweet_element(self, tweet_element) -> Optional[Dict]:
+    def _parse_tweet_data(self, data: Dict) -> Optional[Dict]:
         """
-        Parse a tweet HTML element using BeautifulSoup
+        Convert fields from PARSE_TWEETS_JS or _extract_tweet_fields into the raw tweet format
         
         Args:
-            tweet_element: BeautifulSoup element or Selenium WebElement
+            data: Dict of fields extracted in the browser
             
         Returns:
-            Dict with tweet data or None if invalid
+            Dict with tweet data (raw schema consumed by process_tweet) or None if invalid
         """
-        try:
-            # Convert to BeautifulSoup if it's a Selenium element
-            if hasattr(tweet_element, 'get_attribute'):
-                html = tweet_element.get_attribute('outerHTML')
-                soup = BeautifulSoup(html, 'html.parser')
-            else:
-                soup = tweet_element
-            
-            # Extract tweet text
-            tweet_text_elem = soup.find('div', {'data-testid': 'tweetText'})
-            if not tweet_text_elem:
-                # Try alternative selectors
-                tweet_text_elem = soup.find('div', class_=re.compile(r'.*tweet.*text.*', re.I))
-            
-            tweet_text = tweet_text_elem.get_text(strip=True) if tweet_text_elem else ''
-            
-            if not tweet_text:
-                return None
-            
-            # Skip if not English
-            if not self.is_english_text(tweet_text):
-                return None
-            
-            # Extract tweet ID from URL or data attribute
-            tweet_id = None
-            tweet_link = soup.find('a', href=re.compile(r'/status/\d+'))
-            if tweet_link:
-                href = tweet_link.get('href', '')
-                match = re.search(r'/status/(\d+)', href)
-                if match:
-                    tweet_id = match.group(1)
-            
-            if not tweet_id:
-                # Try to get from data-tweet-id attribute
-                tweet_container = soup.find(attrs={'data-tweet-id': True})
-                if tweet_container:
-                    tweet_id = tweet_container.get('data-tweet-id')
-            
-            if not tweet_id:
-                # Generate a temporary ID based on content hash
-                tweet_id = str(hash(tweet_text))[:15]
-            
-            # Extract username
-            username = 'unknown'
-            user_link = soup.find('a', href=re.compile(r'^/[^/]+$'))
-            if user_link:
-                username = user_link.get('href', '').lstrip('/')
-            else:
-                # Try alternative selector
-                user_elem = soup.find('span', class_=re.compile(r'.*username.*', re.I))
-                if user_elem:
-                    username = user_elem.get_text(strip=True).lstrip('@')
-            
-            # Extract engagement metrics
-            like_count = 0
-            retweet_count = 0
-            reply_count = 0
-            quote_count = 0
-            
-            # Try to find engagement buttons
-            buttons = soup.find_all('button', {'data-testid': True})
-            for button in buttons:
-                testid = button.get('data-testid', '')
-                text = button.get_text(strip=True)
-                
-                # Extract numbers from text
-                numbers = re.findall(r'[\d,]+', text.replace(',', ''))
-                count = int(numbers[0]) if numbers else 0
-                
-                if 'like' in testid.lower() or 'favorite' in testid.lower():
-                    like_count = count
-                elif 'retweet' in testid.lower():
-                    retweet_count = count
-                elif 'reply' in testid.lower():
-                    reply_count = count
-                elif 'quote' in testid.lower():
-                    quote_count = count
-            
-            # Extract timestamp
-            time_elem = soup.find('time')
-            published_at = datetime.now().isoformat()
-            if time_elem:
-                datetime_attr = time_elem.get('datetime')
-                if datetime_attr:
-                    try:
-                        published_at = datetime.fromisoformat(datetime_attr.replace('Z', '+00:00')).isoformat()
-                    except:
-                        pass
-            
-            # Extract metadata
-            hashtags = self.extract_hashtags(tweet_text)
-            mentions = self.extract_mentions(tweet_text)
-            urls = self.extract_urls(tweet_text)
-            
-            # Detect entertainment category
-            category = self.detect_entertainment_category(tweet_text, hashtags)
-            if not category:
-                return None
-            
-            # Check for media
-            media_type = None
-            if soup.find('img', {'alt': re.compile(r'Image|Photo', re.I)}):
-                media_type = 'photo'
-            elif soup.find('video') or soup.find('div', class_=re.compile(r'.*video.*', re.I)):
-                media_type = 'video'
+        tweet_text = data.get('text') or ''
+        if not tweet_text or not self.is_english_text(tweet_text):
+            return None
+        
+        # Generate a temporary ID based on content hash if none was found
+        tweet_id = data.get('id') or str(hash(tweet_text))[:15]
+        
+        published_at = datetime.now().isoformat()
+        if data.get('datetime'):
+            try:
+                published_at = datetime.fromisoformat(data['datetime'].replace('Z', '+00:00')).isoformat()
+            except ValueError:
+                pass
+        
+        hashtags = self.extract_hashtags(tweet_text)
+        if not self.detect_entertainment_category(tweet_text, hashtags):
+            return None
+        
+        media_type = data.get('media_type')
+        is_reply = bool(data.get('is_reply'))
+        
+        return {
+            'rawContent': tweet_text,
+            'id': tweet_id,
+            'tweetId': tweet_id,
+            'date': published_at,
+            'lang': 'en',
+            'likeCount': data.get('likes') or 0,
+            'retweetCount': data.get('retweets') or 0,
+            'replyCount': data.get('replies') or 0,
+            'quoteCount': data.get('quotes') or 0,
+            'user': {
+                'username': data.get('username') or 'unknown',
+                'id': None,  # User ID not easily available from HTML
+                'verified': bool(data.get('verified')),
+                'followersCount': None
+            },
+            'inReplyToTweetId': data.get('id') if is_reply else None,
+            'media': [{'type': media_type}] if media_type else []
+        }
+    
+    def _parse_tweets_from_html(self, selectors_xpath: List[str]) -> List[Dict]:
+        """
+        Fetch the rendered <main> HTML once and extract every tweet with lxml
+        
+        Args:
+            selectors_xpath: XPath expressions for tweet containers, tried in order
             
-            # Check if reply
-            is_reply = soup.find('div', {'data-testid': 'reply'}) is not None
-            parent_tweet_id = None
-            if is_reply:
-                reply_link = soup.find('a', href=re.compile(r'/status/\d+'))
-                if reply_link:
-                    match = re.search(r'/status/(\d+)', reply_link.get('href', ''))
-                    if match:
-                        parent_tweet_id = match.group(1)
-            
-            # Check verified badge
-            user_verified = soup.find('svg', {'aria-label': 'Verified account'}) is not None
-            
-            return {
-                'rawContent': tweet_text,
-                'id': tweet_id,
-                'tweetId': tweet_id,
-                'date': published_at,
-                'lang': 'en',
-                'likeCount': like_count,
-                'retweetCount': retweet_count,
-                'replyCount': reply_count,
-                'quoteCount': quote_count,
-                'user': {
-                    'username': username,
-                    'id': None,  # User ID not easily available from HTML
-                    'verified': user_verified,
-                    'followersCount': None
-                },
-                'inReplyToTweetId': parent_tweet_id if is_reply else None,
-                'media': [{'type': media_type}] if media_type else []
-            }
+        Returns:
+            List of tweet field dicts (same shape as PARSE_TWEETS_JS output)
+        """
+        html = self.driver.execute_script(
+            "return (document.querySelector('main') || document.body).outerHTML;"
+        )
+        if not html:
+            return []
+        
+        tree = lxml.html.fromstring(html)
+        articles = []
+        for xpath in selectors_xpath:
+            articles = tree.xpath(xpath)
+            if articles:
+                break
+        
+        return [self._extract_tweet_fields(article) for article in articles]
+    
+    def _extract_tweet_fields(self, article) -> Dict:
+        """
+        Extract raw fields from a tweet container using lxml
+        
+        Args:
+            article: lxml.html.HtmlElement for one tweet
             
-        except Exception as e:
-            logger.debug(f"Error parsing tweet element: {e}")
-            return None
+        Returns:
+            Dict of extracted fields (converted by _parse_tweet_data)
+        """
+        def first(xpath):
+            found = article.xpath(xpath)
+            return found[0] if found else None
+        
+        def to_count(text):
+            numbers = re.findall(r'\d+', (text or '').replace(',', ''))
+            return int(numbers[0]) if numbers else 0
+        
+        # Tweet text
+        text_elem = first('.//div[@data-testid="tweetText"]')
+        if text_elem is None:
+            text_elem = next((d for d in article.iter('div')
+                              if re.search(r'tweet.*text', d.get('class', ''), re.I)), None)
+        
+        # Tweet ID from permalink or data attribute
+        tweet_id = None
+        status_link = first('.//a[contains(@href, "/status/")]')
+        if status_link is not None:
+            match = self.TWEET_ID_PATTERN.search(status_link.get('href', ''))
+            if match:
+                tweet_id = match.group(1)
+        if not tweet_id:
+            id_elem = first('.//*[@data-tweet-id]')
+            if id_elem is not None:
+                tweet_id = id_elem.get('data-tweet-id')
+        
+        # Username from the first profile link
+        username = next((a.get('href')[1:] for a in article.xpath('.//a[starts-with(@href, "/")]')
+                         if re.match(r'^/[^/]+$', a.get('href', ''))), None)
+        
+        # Engagement metrics
+        counts = {'like': 0, 'retweet': 0, 'reply': 0, 'quote': 0}
+        for button in article.xpath('.//button[@data-testid]'):
+            testid = button.get('data-testid', '').lower()
+            count = to_count(button.text_content())
+            if 'like' in testid or 'favorite' in testid:
+                counts['like'] = count
+            elif 'retweet' in testid:
+                counts['retweet'] = count
+            elif 'reply' in testid:
+                counts['reply'] = count
+            elif 'quote' in testid:
+                counts['quote'] = count
+        
+        # Media
+        media_type = None
+        if any(re.search(r'Image|Photo', img.get('alt', ''), re.I) for img in article.xpath('.//img[@alt]')):
+            media_type = 'photo'
+        elif first('.//video') is not None or any(
+                re.search(r'video', d.get('class', ''), re.I) for d in article.iter('div')):
+            media_type = 'video'
+        
+        time_elem = first('.//time')
+        
+        return {
+            'text': text_elem.text_content().strip() if text_elem is not None else '',
+            'id': tweet_id,
+            'username': username,
+            'likes': counts['like'],
+            'retweets': counts['retweet'],
+            'replies': counts['reply'],
+            'quotes': counts['quote'],
+            'datetime': time_elem.get('datetime') if time_elem is not None else None,
+            'media_type': media_type,
+            'is_reply': first('.//div[@data-testid="reply"]') is not None,
+            'verified': first('.//svg[@aria-label="Verified account"]') is not None,
+        }
     
     def process_tweet(self, tweet: Dict) -> Optional[Dict]:
         """
@@ -1315,9 +1641,10 @@ class TwitterEntertainmentCrawler:
                 # Additional fields for entertainment sentiment analysis
                 'language': 'en',
                 'entertainment_category': category,
-                'hashtags': json.dumps(hashtags) if hashtags else None,
-                'mentions': json.dumps(mentions) if mentions else None,
-                'urls': json.dumps(urls) if urls else None,
+                # Kept as native lists; serialized once per column at CSV-write time
+                'hashtags': hashtags or None,
+                'mentions': mentions or None,
+                'urls': urls or None,
                 'media_type': media_type,
                 'tweet_id': tweet_id,
                 'user_verified': user_info.get('verified', False),
@@ -1349,62 +1676,37 @@ class TwitterEntertainmentCrawler:
         
         try:
             logger.info(f"Navigating to: {url}")
-            self.driver.get(url)
-            
-            # Wait for initial page load
-            time.sleep(3)
+            self._navigate(url)
             
             # CRITICAL: Wait for React to render tweets (Twitter uses dynamic rendering)
             logger.debug("Waiting for tweets to render...")
-            
-            # Try to wait for tweet elements to appear (with timeout)
-            tweet_loaded = False
-            wait_attempts = 0
-            max_wait_attempts = 10  # 10 attempts x 2 seconds = 20 seconds max
-            
-            while not tweet_loaded and wait_attempts < max_wait_attempts:
-                try:
-                    # Try to find at least one tweet element
-                    WebDriverWait(self.driver, 2).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'article[data-testid="tweet"]'))
-                    )
-                    tweet_loaded = True
-                    logger.debug(f"✅ Tweets loaded after {wait_attempts * 2 + 2} seconds")
-                except TimeoutException:
-                    wait_attempts += 1
-                    if wait_attempts < max_wait_attempts:
-                        logger.debug(f"Tweets not yet loaded, waiting... (attempt {wait_attempts}/{max_wait_attempts})")
-                        # Scroll a bit to trigger loading
-                        self.driver.execute_script("window.scrollBy(0, 100);")
-                        time.sleep(1)
-            
-            if not tweet_loaded:
+            try:
+                WebDriverWait(self.driver, self.TWEET_LOAD_TIMEOUT).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, 'article[data-testid="tweet"]'))
+                )
+                logger.debug("✅ Tweets loaded")
+            except TimeoutException:
                 logger.warning("⚠️ Tweets did not load within timeout - may not find any tweets")
             
-            # Additional wait for complete rendering
-            time.sleep(2)
-            
             # Save debug info after page load
             self._save_debug_info("01_page_loaded")
             
-            # Check if login is required
-            page_source = self.driver.page_source.lower()
-            current_url = self.driver.current_url.lower()
-            
-            # More thorough login check
-            login_indicators = ['sign in', 'log in', 'login', 'create account']
-            if any(keyword in page_source for keyword in login_indicators):
-                # Check if we're actually on a login page or just seeing login button
-                if 'i/flow/login' in current_url or 'login' in current_url:
-                    logger.error("❌ COOKIES INVALID: Redirected to login page")
-                    logger.error("   Your cookies may have expired or are invalid")
-                    logger.error("   Please login again using option 6")
-                    return []  # Return empty list instead of trying to crawl
+            # Check if login is required (skipped once cookies have proven to work)
+            if not self._cookies_validated:
+                current_url = self.driver.current_url.lower()
+                
+                if self.LOGIN_PATTERN.search(self.driver.page_source):
+                    # Check if we're actually on a login page or just seeing login button
+                    if 'i/flow/login' in current_url or 'login' in current_url:
+                        logger.error("❌ COOKIES INVALID: Redirected to login page")
+                        logger.error("   Your cookies may have expired or are invalid")
+                        logger.error("   Please login again using option 6")
+                        return []  # Return empty list instead of trying to crawl
+                    else:
+                        # Just a login button visible, but may still be able to browse
+                        logger.debug("Login button visible but not on login page - continuing...")
                 else:
-                    # Just a login button visible, but may still be able to browse
-                    logger.debug("Login button visible but not on login page - continuing...")
-            else:
-                logger.debug("✅ No login required - cookies are valid")
+                    logger.debug("✅ No login required - cookies are valid")
             
             # Try multiple selectors (Twitter may have changed structure)
             selectors = [
@@ -1412,6 +1714,15 @@ class TwitterEntertainmentCrawler:
                 'article[role="article"]',       # Alternative
                 'div[data-testid="tweet"]',      # Alternative
             ]
+            selectors_xpath = [
+                '//article[@data-testid="tweet"]',
+                '//article[@role="article"]',
+                '//div[@data-testid="tweet"]',
+            ]
+            
+            # Inject the batch parser and the new-tweet observer once per navigation
+            self.driver.execute_script(self.PARSE_TWEETS_JS)
+            self.driver.execute_script(self.OBSERVE_TWEETS_JS)
             
             # Scroll and collect tweets
             last_height = self.driver.execute_script("return document.body.scrollHeight")
@@ -1420,13 +1731,25 @@ class TwitterEntertainmentCrawler:
             no_tweets_count = 0  # Track consecutive scrolls with no tweets
             
             while len(tweets) < max_results and scroll_attempts < max_scroll_attempts:
-                # Try each selector until we find tweets
-                tweet_elements = []
-                for selector in selectors:
-                    tweet_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if tweet_elements:
-                        logger.debug(f"Found {len(tweet_elements)} elements with selector: {selector}")
-                        break
+                # Parse all rendered tweets in a single WebDriver round-trip
+                try:
+                    tweet_elements = self.driver.execute_script(
+                        "return window.__parseTweets ? window.__parseTweets(arguments[0]) : null;", selectors
+                    )
+                    if tweet_elements is None:
+                        # Page was reloaded (e.g. by Twitter) - re-inject the parser
+                        self.driver.execute_script(self.PARSE_TWEETS_JS)
+                        tweet_elements = self.driver.execute_script(
+                            "return window.__parseTweets(arguments[0]);", selectors
+                        ) or []
+                except JavascriptException as e:
+                    if lxml is None:
+                        raise  # no HTML fallback without lxml
+                    # In-page parser failed - fetch the HTML once and parse it with lxml
+                    logger.debug(f"JS tweet parser failed ({e}), falling back to lxml")
+                    tweet_elements = self._parse_tweets_from_html(selectors_xpath)
+                if tweet_elements:
+                    logger.debug(f"Found {len(tweet_elements)} tweet elements")
                 
                 if not tweet_elements:
                     no_tweets_count += 1
@@ -1451,25 +1774,30 @@ class TwitterEntertainmentCrawler:
                         break
                 else:
                     no_tweets_count = 0  # Reset counter if we found tweets
+                    self._cookies_validated = True  # Tweets render, so the session works
                 
-                for tweet_elem in tweet_elements:
+                for tweet_data in tweet_elements:
                     if len(tweets) >= max_results:
                         break
                     
-                    try:
-                        parsed_tweet = self._parse_tweet_element(tweet_elem)
-                        if parsed_tweet and parsed_tweet.get('id'):
-                            tweet_id = parsed_tweet['id']
-                            if tweet_id not in seen_tweet_ids:
-                                seen_tweet_ids.add(tweet_id)
-                                tweets.append(parsed_tweet)
-                    except Exception as e:
-                        logger.debug(f"Error parsing tweet element: {e}")
-                        continue
+                    # Prefilter: skip tweets already seen in this session
+                    quick_id = tweet_data.get('id')
+                    if quick_id:
+                        if quick_id in self._seen_bloom:
+                            continue
+                        self._seen_bloom.add(quick_id)
+                        self._new_seen_ids.append(quick_id)
+                    
+                    parsed_tweet = self._parse_tweet_data(tweet_data)
+                    if parsed_tweet and parsed_tweet.get('id'):
+                        tweet_id = parsed_tweet['id']
+                        if tweet_id not in seen_tweet_ids:
+                            seen_tweet_ids.add(tweet_id)
+                            tweets.append(parsed_tweet)
                 
                 # Scroll down to load more tweets
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)  # Increased wait time for dynamic content
+                self._wait_for_new_tweets()
                 
                 # Check if we've reached the bottom
                 new_height = self.driver.execute_script("return document.body.scrollHeight")
@@ -1482,11 +1810,13 @@ class TwitterEntertainmentCrawler:
                     scroll_attempts = 0
                     last_height = new_height
                 
-                self._smart_delay(len(tweets))
+                # Each scroll fetches another page of results - throttle it like a request
+                self._throttle()
             
             logger.info(f"Collected {len(tweets)} tweets from page")
             
             if len(tweets) == 0:
+                self._cookies_validated = False  # Re-check login on next navigation
                 logger.warning("⚠️ No tweets collected. This may indicate:")
                 logger.warning("  - Twitter requires login (most common)")
                 logger.warning("  - Page structure has changed")
@@ -1494,11 +1824,24 @@ class TwitterEntertainmentCrawler:
                 logger.warning("  - Try running with headless=False to see what's happening")
             
         except Exception as e:
+            self._cookies_validated = False
             logger.error(f"Error scraping page {url}: {e}")
             raise
         
         return tweets
     
+    def _wait_for_new_tweets(self):
+        """Wait until the MutationObserver reports new DOM nodes after a scroll"""
+        try:
+            WebDriverWait(self.driver, self.SCROLL_WAIT_TIMEOUT).until(
+                lambda d: d.execute_script(
+                    "const n = window.__newTweetCount || 0; window.__newTweetCount = 0; return n > 0;"
+                )
+            )
+        except TimeoutException:
+            # Nothing new rendered (end of feed or slow network) - short grace period
+            time.sleep(self.SCROLL_FALLBACK_DELAY)
+    
     def _build_search_url(self, query: str, since: Optional[str] = None, 
                          until: Optional[str] = None) -> str:
         """
@@ -1512,24 +1855,7 @@ class TwitterEntertainmentCrawler:
         Returns:
             Twitter search URL
         """
-        base_url = "https://twitter.com/search"
-        
-        # Use sort_by: 'top' for high engagement tweets, 'latest' for newest tweets
-        sort_param = 'top' if self.sort_by == 'top' else 'live'
-        
-        params = {
-            'q': query,
-            'src': 'typed_query',
-            'f': sort_param  # 'top' = popular tweets, 'live' = latest tweets
-        }
-        
-        if since:
-            params['since'] = since
-        if until:
-            params['until'] = until
-        
-        query_string = '&'.join([f"{k}={quote_plus(str(v))}" for k, v in params.items()])
-        return f"{base_url}?{query_string}"
+        return _cached_search_url(query, since, until, self._url_suffix)
     
     def scrape_by_keywords(self, keywords: List[str], max_tweets: int = 1000,
                           since: Optional[str] = None, until: Optional[str] = None,
@@ -1547,77 +1873,101 @@ class TwitterEntertainmentCrawler:
         Returns:
             List of processed tweet dictionaries
         """
+        # Drop duplicate keywords (case-insensitive), keeping the first spelling
+        unique_keywords = {}
+        for keyword in keywords:
+            if keyword and keyword.strip():
+                unique_keywords.setdefault(keyword.strip().lower(), keyword.strip())
+        keywords = list(unique_keywords.values())
+        
         logger.info(f"Scraping tweets with keywords: {keywords}")
         logger.info(f"Max tweets: {max_tweets}, Category: {category or 'any'}")
         
-        all_tweets = []
+        if len(keywords) <= 1:
+            batches = [self._scrape_keyword(keyword, max_tweets, since, until, category)
+                       for keyword in keywords]
+            return self._merge_new_tweets(batches)
         
-        for keyword in keywords:
-            logger.info(f"Processing keyword: {keyword}")
-            
-            # Build query
-            query = f"{keyword} lang:en"  # Only English
-            
-            if since:
-                query += f" since:{since}"
-            if until:
-                query += f" until:{until}"
-            
-            logger.info(f"Query: {query}")
-            
-            count = 0
-            skipped_non_english = 0
-            skipped_wrong_category = 0
-            
+        # Serialize cookies once so worker processes don't need to re-login
+        cookies = list(self.session_cookies)
+        if self.driver:
             try:
-                # Build search URL
-                search_url = self._build_search_url(query, since, until)
-                
-                # Scrape tweets from page
-                raw_tweets = self._scrape_tweets_from_page(search_url, max_tweets)
-                
-                for raw_tweet in raw_tweets:
-                    if count >= max_tweets:
-                        break
-                    
-                    processed = self.process_tweet(raw_tweet)
-                    
-                    if not processed:
-                        skipped_non_english += 1
-                        continue
-                    
-                    if category and processed.get('entertainment_category') != category:
-                        skipped_wrong_category += 1
-                        continue
-                    
-                    all_tweets.append(processed)
-                    count += 1
-                    
-                    if count % 100 == 0:
-                        logger.info(f"Collected {count} tweets (keyword: {keyword})")
-                    
-                    self._smart_delay(count)
-                
-                logger.info(f"Keyword '{keyword}': Collected {count} tweets")
-                logger.info(f"  Skipped (non-English): {skipped_non_english}")
-                logger.info(f"  Skipped (wrong category): {skipped_wrong_category}")
+                cookies = self.driver.get_cookies() or cookies
+            except Exception as e:
+                logger.debug(f"Could not read cookies from driver: {e}")
+        
+        options = {
+            'crawler': self._worker_options,
+            'max_tweets': max_tweets,
+            'since': since,
+            'until': until,
+            'category': category,
+            # Each worker starts from a copy of this session's seen-tweet filter
+            'seen_bloom': self._seen_bloom,
+        }
+        
+        # Selenium is not thread-safe, so each keyword gets its own process + browser.
+        # Workers are capped to avoid saturating the CPU with Chrome instances.
+        max_workers = min(self.MAX_KEYWORD_WORKERS, len(keywords))
+        logger.info(f"Scraping {len(keywords)} keywords with {max_workers} worker processes")
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_scrape_one_keyword, keywords,
+                                        repeat(cookies), repeat(options)))
+        
+        # Workers filled their own copies of the filter; fold their IDs back into ours,
+        # and only then persist it so a resumed run skips worker-scraped tweets too
+        for _, seen_ids in results:
+            self._absorb_seen_ids(seen_ids)
+        self.save_persistent_state()
+        return self._merge_new_tweets([tweets for tweets, _ in results])
+    
+    def _absorb_seen_ids(self, seen_ids: Iterable[str]):
+        """
+        Add tweet IDs seen by a worker crawler to this crawler's seen-tweet filter
+        
+        Args:
+            seen_ids: IDs the worker added to its own filter
+        """
+        for tweet_id in seen_ids:
+            self._seen_bloom.add(tweet_id)
+    
+    def _merge_new_tweets(self, batches: List[List[Dict]]) -> List[Dict]:
+        """
+        Merge per-keyword results, dropping tweets already scraped in this session
+        
+        Args:
+            batches: List of processed tweet lists (one per keyword/query)
             
-            except RuntimeError as e:
-                logger.error(f"Error scraping keyword '{keyword}': {e}")
-                continue
+        Returns:
+            Flat list of tweets not seen by any earlier query
+        """
+        all_tweets = []
+        duplicates = 0
+        
+        for batch in batches:
+            for tweet in batch:
+                tweet_id = tweet.get('tweet_id')
+                if tweet_id in self._scraped_tweet_ids:
+                    duplicates += 1
+                    continue
+                self._scraped_tweet_ids.add(tweet_id)
+                all_tweets.append(tweet)
         
+        if duplicates:
+            logger.info(f"Skipped {duplicates} tweets already collected by other queries")
         logger.info(f"Total collected: {len(all_tweets)} tweets")
         return all_tweets
     
-    def scrape_by_user(self, username: str, max_tweets: int = 500,
-                      since: Optional[str] = None, until: Optional[str] = None,
-                      category: Optional[str] = None) -> List[Dict]:
+    def _scrape_keyword(self, keyword: str, max_tweets: int,
+                        since: Optional[str] = None, until: Optional[str] = None,
+                        category: Optional[str] = None) -> List[Dict]:
         """
-        Scrape tweets from a specific user
+        Scrape and process tweets for a single keyword
         
         Args:
-            username: Twitter username (without @)
-            max_tweets: Maximum number of tweets
+            keyword: Keyword/hashtag to search
+            max_tweets: Maximum number of tweets to collect for this keyword
             since: Start date (YYYY-MM-DD)
             until: End date (YYYY-MM-DD)
             category: Filter by category ('film' or 'music')
@@ -1625,10 +1975,10 @@ class TwitterEntertainmentCrawler:
         Returns:
             List of processed tweet dictionaries
         """
-        logger.info(f"Scraping tweets from user: @{username}")
+        logger.info(f"Processing keyword: {keyword}")
         
         # Build query
-        query = f"from:{username} lang:en"
+        query = f"{keyword} lang:en"  # Only English
         
         if since:
             query += f" since:{since}"
@@ -1638,18 +1988,19 @@ class TwitterEntertainmentCrawler:
         logger.info(f"Query: {query}")
         
         tweets = []
+        count = 0
         skipped_non_english = 0
         skipped_wrong_category = 0
         
         try:
-            # Build user profile URL
-            user_url = f"https://twitter.com/{username}"
+            # Build search URL
+            search_url = self._build_search_url(query, since, until)
             
-            # Scrape tweets from user profile
-            raw_tweets = self._scrape_tweets_from_page(user_url, max_tweets)
+            # Scrape tweets from page
+            raw_tweets = self._scrape_tweets_from_page(search_url, max_tweets)
             
             for raw_tweet in raw_tweets:
-                if len(tweets) >= max_tweets:
+                if count >= max_tweets:
                     break
                 
                 processed = self.process_tweet(raw_tweet)
@@ -1663,11 +2014,100 @@ class TwitterEntertainmentCrawler:
                     continue
                 
                 tweets.append(processed)
+                count += 1
                 
-                if len(tweets) % 50 == 0:
-                    logger.info(f"Collected {len(tweets)} tweets from @{username}")
+                if count % 100 == 0:
+                    logger.info(f"Collected {count} tweets (keyword: {keyword})")
+            
+            logger.info(f"Keyword '{keyword}': Collected {count} tweets")
+            logger.info(f"  Skipped (non-English): {skipped_non_english}")
+            logger.info(f"  Skipped (wrong category): {skipped_wrong_category}")
+        
+        except RuntimeError as e:
+            logger.error(f"Error scraping keyword '{keyword}': {e}")
+        
+        return tweets
+    
+    def scrape_by_user(self, username: str, max_tweets: int = 500,
+                      since: Optional[str] = None, until: Optional[str] = None,
+                      category: Optional[str] = None, stream_jsonl: bool = False) -> List[Dict]:
+        """
+        Scrape tweets from a specific user
+        
+        Args:
+            username: Twitter username (without @)
+            max_tweets: Maximum number of tweets
+            since: Start date (YYYY-MM-DD)
+            until: End date (YYYY-MM-DD)
+            category: Filter by category ('film' or 'music')
+            stream_jsonl: Also append each processed tweet to
+                data/{output_folder}/user_{username}_*.jsonl (off by default; the
+                timeline is fetched in full first, so this does not survive a crash
+                during the fetch itself)
+            
+        Returns:
+            List of processed tweet dictionaries
+        """
+        logger.info(f"Scraping tweets from user: @{username}")
+        
+        # Build query
+        query = f"from:{username} lang:en"
+        
+        if since:
+            query += f" since:{since}"
+        if until:
+            query += f" until:{until}"
+        
+        logger.info(f"Query: {query}")
+        
+        tweets = []
+        skipped_non_english = 0
+        skipped_wrong_category = 0
+        
+        try:
+            # Fast path: fetch the timeline JSON directly, no browser rendering
+            raw_tweets = self._fetch_user_tweets_http(username, max_tweets)
+            
+            if raw_tweets is None:
+                # Build user profile URL
+                user_url = f"https://twitter.com/{username}"
                 
-                self._smart_delay(len(tweets))
+                # Scrape tweets from user profile
+                raw_tweets = self._scrape_tweets_from_page(user_url, max_tweets)
+            
+            stream = None
+            if stream_jsonl:
+                output_dir = Path(f'data/{self.output_folder}')
+                output_dir.mkdir(parents=True, exist_ok=True)
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                stream_file = output_dir / f"user_{username}_{timestamp}.jsonl"
+                stream = open(stream_file, 'wb')
+            
+            try:
+                for raw_tweet in raw_tweets:
+                    if len(tweets) >= max_tweets:
+                        break
+                    
+                    processed = self.process_tweet(raw_tweet)
+                    
+                    if not processed:
+                        skipped_non_english += 1
+                        continue
+                    
+                    if category and processed.get('entertainment_category') != category:
+                        skipped_wrong_category += 1
+                        continue
+                    
+                    tweets.append(processed)
+                    if stream is not None:
+                        stream.write(self._jsonl_line(processed))
+                    
+                    if len(tweets) % 50 == 0:
+                        logger.info(f"Collected {len(tweets)} tweets from @{username}")
+            finally:
+                if stream is not None:
+                    stream.close()
+                    logger.info(f"Streamed JSON Lines: {stream_file}")
             
             logger.info(f"Collected {len(tweets)} tweets from @{username}")
             logger.info(f"  Skipped (non-English): {skipped_non_english}")
@@ -1678,6 +2118,211 @@ class TwitterEntertainmentCrawler:
         
         return tweets
     
+    def scrape_by_users(self, usernames: List[str], max_tweets: int = 500,
+                        since: Optional[str] = None, until: Optional[str] = None,
+                        category: Optional[str] = None) -> List[Dict]:
+        """
+        Scrape several users concurrently, one pooled browser per worker thread
+        
+        Args:
+            usernames: Twitter usernames (with or without @)
+            max_tweets: Maximum number of tweets per user
+            since: Start date (YYYY-MM-DD)
+            until: End date (YYYY-MM-DD)
+            category: Filter by category ('film' or 'music')
+            
+        Returns:
+            List of processed tweet dictionaries (deduplicated across users)
+        """
+        usernames = list(dict.fromkeys(u.strip().lstrip('@') for u in usernames if u and u.strip()))
+        if len(usernames) <= 1:
+            batches = [self.scrape_by_user(u, max_tweets, since, until, category) for u in usernames]
+            return self._merge_new_tweets(batches)
+        
+        cookies = list(self.session_cookies)
+        if self.driver:
+            try:
+                cookies = self.driver.get_cookies() or cookies
+            except Exception as e:
+                logger.debug(f"Could not read cookies from driver: {e}")
+        
+        # Page loads are network-bound, so threads suffice; each thread borrows its own browser
+        max_workers = min(self.MAX_USER_WORKERS, len(usernames))
+        logger.info(f"Scraping {len(usernames)} users with {max_workers} pooled browsers")
+        
+        def scrape(username: str) -> List[Dict]:
+            crawler = pool.acquire()
+            try:
+                return crawler.scrape_by_user(username, max_tweets, since, until, category)
+            except Exception as e:
+                logger.error(f"Worker failed for user @{username}: {e}")
+                return []
+            finally:
+                pool.release(crawler)
+        
+        with DriverPool(self._worker_options, cookies, max_size=max_workers) as pool, \
+                ThreadPoolExecutor(max_workers=max_workers) as executor:
+            batches = list(executor.map(scrape, usernames))
+            for crawler in pool.crawlers():
+                self._absorb_seen_ids(crawler._new_seen_ids)
+        self.save_persistent_state()
+        
+        return self._merge_new_tweets(batches)
+    
+    def _http_session_cookies(self) -> Dict[str, str]:
+        """Return current session cookies as a name -> value dict"""
+        cookies = self.session_cookies
+        if self.driver:
+            try:
+                cookies = self.driver.get_cookies() or cookies
+            except Exception as e:
+                logger.debug(f"Could not read cookies from driver: {e}")
+        return {c['name']: c['value'] for c in cookies if 'name' in c and 'value' in c}
+    
+    def _fetch_user_tweets_http(self, username: str, max_tweets: int) -> Optional[List[Dict]]:
+        """
+        Fetch a user's timeline through the GraphQL API instead of Selenium
+        
+        Args:
+            username: Twitter username (without @)
+            max_tweets: Maximum number of tweets
+            
+        Returns:
+            List of raw tweet dicts, or None if the HTTP path is unavailable
+            (httpx missing, not logged in, auth failure) and Selenium should be used
+        """
+        if httpx is None:
+            return None
+        
+        cookies = self._http_session_cookies()
+        if 'auth_token' not in cookies or 'ct0' not in cookies:
+            logger.debug("No logged-in session cookies - using Selenium")
+            return None
+        
+        try:
+            return asyncio.run(self._fetch_users_tweets_http([username], max_tweets, cookies))[0]
+        except Exception as e:
+            logger.warning(f"GraphQL fetch failed for @{username} ({e}) - falling back to Selenium")
+            return None
+    
+    async def _fetch_users_tweets_http(self, usernames: List[str], max_tweets: int,
+                                       cookies: Dict[str, str]) -> List[List[Dict]]:
+        """Fetch several user timelines concurrently over one HTTP client"""
+        headers = {
+            'authorization': f"Bearer {self.GRAPHQL_BEARER_TOKEN}",
+            'x-csrf-token': cookies['ct0'],
+            'x-twitter-auth-type': 'OAuth2Session',
+            'x-twitter-active-user': 'yes',
+        }
+        http2 = importlib.util.find_spec('h2') is not None
+        async with httpx.AsyncClient(http2=http2, cookies=cookies, headers=headers,
+                                     timeout=30.0) as client:
+            return await asyncio.gather(
+                *(self._fetch_user_timeline(client, username, max_tweets) for username in usernames)
+            )
+    
+    async def _graphql_get(self, client, endpoint: str, variables: Dict) -> Dict:
+        """GET a GraphQL endpoint and return the decoded JSON payload"""
+        response = await client.get(
+            f"{self.GRAPHQL_BASE_URL}/{endpoint}",
+            params={
+                'variables': json.dumps(variables),
+                'features': json.dumps(self.GRAPHQL_FEATURES),
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def _fetch_user_timeline(self, client, username: str, max_tweets: int) -> List[Dict]:
+        """Page through UserTweets for one user"""
+        user_data = await self._graphql_get(
+            client, self.GRAPHQL_USER_BY_SCREEN_NAME,
+            {'screen_name': username, 'withSafetyModeUserFields': True}
+        )
+        user_id = user_data['data']['user']['result']['rest_id']
+        
+        tweets = []
+        cursor = None
+        while len(tweets) < max_tweets:
+            variables = {
+                'userId': user_id,
+                'count': self.GRAPHQL_PAGE_SIZE,
+                'includePromotedContent': False,
+                'withVoice': True,
+                'withV2Timeline': True,
+            }
+            if cursor:
+                variables['cursor'] = cursor
+            
+            payload = await self._graphql_get(client, self.GRAPHQL_USER_TWEETS, variables)
+            page_tweets, cursor = self._parse_timeline_payload(payload)
+            tweets.extend(page_tweets)
+            
+            if not page_tweets or not cursor:
+                break
+            await asyncio.sleep(self._get_random_delay())
+        
+        logger.info(f"Fetched {len(tweets)} tweets from @{username} via GraphQL")
+        return tweets[:max_tweets]
+    
+    def _parse_timeline_payload(self, payload: Dict):
+        """
+        Extract raw tweets and the bottom cursor from a UserTweets response
+        
+        Returns:
+            Tuple (list of raw tweet dicts, next cursor or None)
+        """
+        tweets = []
+        cursor = None
+        
+        timeline = payload['data']['user']['result']['timeline_v2']['timeline']
+        for instruction in timeline.get('instructions', []):
+            for entry in instruction.get('entries', []):
+                content = entry.get('content', {})
+                if content.get('cursorType') == 'Bottom':
+                    cursor = content.get('value')
+                    continue
+                
+                result = (content.get('itemContent') or {}).get('tweet_results', {}).get('result')
+                if not result:
+                    continue
+                result = result.get('tweet', result)  # unwrap TweetWithVisibilityResults
+                legacy = result.get('legacy')
+                if not legacy:
+                    continue
+                
+                user_legacy = (result.get('core', {}).get('user_results', {})
+                               .get('result', {}).get('legacy', {}))
+                
+                published_at = legacy.get('created_at')
+                try:
+                    published_at = datetime.strptime(published_at, '%a %b %d %H:%M:%S %z %Y').isoformat()
+                except (TypeError, ValueError):
+                    pass
+                
+                media = legacy.get('extended_entities', {}).get('media', [])
+                tweets.append({
+                    'rawContent': legacy.get('full_text', ''),
+                    'id': legacy.get('id_str') or result.get('rest_id'),
+                    'tweetId': legacy.get('id_str') or result.get('rest_id'),
+                    'date': published_at,
+                    'lang': legacy.get('lang'),
+                    'likeCount': legacy.get('favorite_count', 0),
+                    'retweetCount': legacy.get('retweet_count', 0),
+                    'replyCount': legacy.get('reply_count', 0),
+                    'quoteCount': legacy.get('quote_count', 0),
+                    'user': {
+                        'username': user_legacy.get('screen_name'),
+                        'id': legacy.get('user_id_str'),
+                        'verified': user_legacy.get('verified', False),
+                        'followersCount': user_legacy.get('followers_count')
+                    },
+                    'inReplyToTweetId': legacy.get('in_reply_to_status_id_str'),
+                    'media': [{'type': 'photo' if m.get('type') == 'photo' else 'video'} for m in media]
+                })
+        
+        return tweets, cursor
+    
     def scrape_film_tweets(self, max_tweets: int = 1000,
                           since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
         """Scrape tweets about films"""
@@ -1710,17 +2355,19 @@ class TwitterEntertainmentCrawler:
         """
         logger.info("Scraping all entertainment tweets...")
         
-        film_tweets = self.scrape_film_tweets(
+        # Search film and music keywords together with OR queries so tweets matching
+        # both lists are loaded once, then split by detected category.
+        queries = self._build_or_queries(self.FILM_KEYWORDS + self.MUSIC_KEYWORDS)
+        tweets = self.scrape_by_keywords(
+            queries,
             max_tweets=max_tweets // 2,
             since=since,
             until=until
         )
         
-        music_tweets = self.scrape_music_tweets(
-            max_tweets=max_tweets // 2,
-            since=since,
-            until=until
-        )
+        per_category = max_tweets // 2
+        film_tweets = [t for t in tweets if t.get('entertainment_category') == 'film'][:per_category]
+        music_tweets = [t for t in tweets if t.get('entertainment_category') == 'music'][:per_category]
         
         return {
             'film': film_tweets,
@@ -1728,8 +2375,30 @@ class TwitterEntertainmentCrawler:
             'total': len(film_tweets) + len(music_tweets)
         }
     
+    def _build_or_queries(self, keywords: List[str]) -> List[str]:
+        """
+        Group keywords into Twitter OR queries, e.g. '(#movie OR "box office")'
+        
+        Args:
+            keywords: List of keywords/hashtags
+            
+        Returns:
+            List of search queries with at most KEYWORDS_PER_QUERY keywords each
+        """
+        unique_keywords = {}
+        for keyword in keywords:
+            unique_keywords.setdefault(keyword.strip().lower(), keyword.strip())
+        
+        # Quote multi-word phrases so OR applies to the whole phrase
+        terms = [f'"{k}"' if ' ' in k else k for k in unique_keywords.values()]
+        
+        return [
+            f"({' OR '.join(terms[i:i + self.KEYWORDS_PER_QUERY])})"
+            for i in range(0, len(terms), self.KEYWORDS_PER_QUERY)
+        ]
+    
     def clean_and_save(self, tweets: List[Dict], filename: str = None,
-                      clean_data: bool = True, save_format: str = 'both') -> Dict:
+                      clean_data: bool = True, save_format: str = 'parquet') -> Dict:
         """
         Clean data and save to file
         
@@ -1737,7 +2406,8 @@ class TwitterEntertainmentCrawler:
             tweets: List of tweet dictionaries
             filename: Output filename (without extension)
             clean_data: Whether to clean data
-            save_format: 'csv', 'json', or 'both'
+            save_format: 'parquet' (default, zstd-compressed), 'csv', 'json'
+                (newline-delimited .jsonl), or 'both' (csv + json)
             
         Returns:
             Dict with file paths
@@ -1755,35 +2425,73 @@ class TwitterEntertainmentCrawler:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"entertainment_tweets_{timestamp}"
         
+        if save_format == 'parquet' and pa is None:
+            logger.warning("pyarrow not installed - saving as CSV instead (pip install pyarrow)")
+            save_format = 'csv'
+        
         saved_files = {}
         
-        # Clean data if requested
+        # Clean data if requested (works on the dicts directly, no DataFrame round-trip)
+        columns = list(self.TWEET_COLUMNS)
+        records = tweets
         if clean_data:
             logger.info(f"Cleaning {len(tweets)} tweets...")
-            df = pd.DataFrame(tweets)
-            cleaned_df = self.cleaner.clean_dataframe(df)
-            tweets_df = cleaned_df
-        else:
-            tweets_df = pd.DataFrame(tweets)
-        
-        # Save CSV
+            records = self.cleaner.clean_records(tweets)
+            columns += [c for c in self.cleaner.CLEANED_COLUMNS if c not in columns]
+        
+        # Save Parquet (Arrow table built column by column, no DataFrame)
+        if save_format == 'parquet':
+            parquet_file = output_dir / f"{filename}.parquet"
+            table = pa.Table.from_pydict({col: [r.get(col) for r in records] for col in columns})
+            pq.write_table(table, parquet_file, compression='zstd', row_group_size=10000)
+            saved_files['parquet'] = str(parquet_file)
+            logger.info(f"Saved Parquet: {parquet_file}")
+        
+        # Save CSV (streamed row by row)
         if save_format in ('csv', 'both'):
             csv_file = output_dir / f"{filename}.csv"
-            tweets_df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+            with open(csv_file, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+                writer.writeheader()
+                for record in records:
+                    writer.writerow(self._serialize_list_fields(record))
             saved_files['csv'] = str(csv_file)
             logger.info(f"Saved CSV: {csv_file}")
         
-        # Save JSON
+        # Save JSON Lines (one record per line, streamable, no indentation)
         if save_format in ('json', 'both'):
-            json_file = output_dir / f"{filename}.json"
-            tweets_dict = tweets_df.to_dict('records')
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(tweets_dict, f, indent=2, ensure_ascii=False, default=str)
+            json_file = output_dir / f"{filename}.jsonl"
+            with open(json_file, 'wb') as f:
+                for record in records:
+                    f.write(self._jsonl_line(record))
             saved_files['json'] = str(json_file)
-            logger.info(f"Saved JSON: {json_file}")
+            logger.info(f"Saved JSON Lines: {json_file}")
         
         return saved_files
     
+    def _jsonl_line(self, record: Dict) -> bytes:
+        """Encode one record as a JSON Lines row (orjson when installed)"""
+        if orjson is not None:
+            return orjson.dumps(record, default=str, option=orjson.OPT_NON_STR_KEYS) + b'\n'
+        return (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+    
+    def _serialize_list_fields(self, record: Dict) -> Dict:
+        """
+        Encode list fields (hashtags, mentions, urls) as JSON strings for CSV output
+        
+        Args:
+            record: Processed tweet dict
+            
+        Returns:
+            Shallow copy of record with list fields replaced by JSON strings
+        """
+        encoded = dict(record)
+        for col in self.LIST_COLUMNS:
+            value = encoded.get(col)
+            if isinstance(value, list):
+                encoded[col] = orjson.dumps(value).decode() if orjson is not None else json.dumps(value)
+        return encoded
+    
     def get_stats(self, tweets: List[Dict]) -> Dict:
         """Get statistics about collected tweets"""
         if not tweets:
@@ -1791,22 +2499,39 @@ class TwitterEntertainmentCrawler:
         
         df = pd.DataFrame(tweets)
         
+        # One aggregation pass over the numeric engagement columns
+        agg_spec = {
+            'like_count': ['sum', 'mean'],
+            'retweet_count': ['sum', 'mean'],
+            'reply_count': ['sum'],
+        }
+        agg_spec = {col: funcs for col, funcs in agg_spec.items() if col in df.columns}
+        agg = df.agg(agg_spec) if agg_spec else pd.DataFrame()
+        
+        def agg_value(col: str, func: str, cast):
+            if col in agg.columns and pd.notna(agg.at[func, col]):
+                return cast(agg.at[func, col])
+            return cast(0)
+        
+        categories = (df['entertainment_category'].value_counts()
+                      if 'entertainment_category' in df.columns else pd.Series(dtype='int64'))
+        
         stats = {
             'total_tweets': len(tweets),
-            'film_tweets': len(df[df.get('entertainment_category') == 'film']) if 'entertainment_category' in df.columns else 0,
-            'music_tweets': len(df[df.get('entertainment_category') == 'music']) if 'entertainment_category' in df.columns else 0,
-            'total_likes': int(df['like_count'].sum()) if 'like_count' in df.columns else 0,
-            'total_retweets': int(df['retweet_count'].sum()) if 'retweet_count' in df.columns else 0,
-            'total_replies': int(df['reply_count'].sum()) if 'reply_count' in df.columns else 0,
-            'avg_likes': float(df['like_count'].mean()) if 'like_count' in df.columns else 0,
-            'avg_retweets': float(df['retweet_count'].mean()) if 'retweet_count' in df.columns else 0,
-            'tweets_with_media': len(df[df.get('media_type').notna()]) if 'media_type' in df.columns else 0,
-            'verified_users': len(df[df.get('user_verified') == True]) if 'user_verified' in df.columns else 0,
+            'film_tweets': int(categories.get('film', 0)),
+            'music_tweets': int(categories.get('music', 0)),
+            'total_likes': agg_value('like_count', 'sum', int),
+            'total_retweets': agg_value('retweet_count', 'sum', int),
+            'total_replies': agg_value('reply_count', 'sum', int),
+            'avg_likes': agg_value('like_count', 'mean', float),
+            'avg_retweets': agg_value('retweet_count', 'mean', float),
+            'tweets_with_media': int(df['media_type'].notna().sum()) if 'media_type' in df.columns else 0,
+            'verified_users': int((df['user_verified'] == True).sum()) if 'user_verified' in df.columns else 0,
         }
         
         # Date range
         if 'published_at' in df.columns:
-            dates = pd.to_datetime(df['published_at'], errors='coerce')
+            dates = pd.to_datetime(df['published_at'], errors='coerce', cache=True)
             stats['date_range'] = {
                 'earliest': dates.min().isoformat() if not dates.empty else None,
                 'latest': dates.max().isoformat() if not dates.empty else None
@@ -1819,20 +2544,119 @@ class TwitterEntertainmentCrawler:
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit - cleanup driver"""
+        """Context manager exit - persist state and cleanup driver"""
+        self.save_persistent_state()
         self._close_driver()
 
 
+class DriverPool:
+    """
+    Lazily created crawlers (one browser each) shared by worker threads
+    
+    At most `max_size` crawlers are created; acquire() blocks until one is free.
+    """
+    
+    def __init__(self, crawler_kwargs: Dict, cookies: List[Dict], max_size: int = 4):
+        self.crawler_kwargs = crawler_kwargs
+        self.cookies = cookies
+        self.max_size = max_size
+        self._idle = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> 'TwitterEntertainmentCrawler':
+        """Borrow an idle crawler, creating one if the pool is not full yet"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.max_size:
+                crawler = TwitterEntertainmentCrawler(**self.crawler_kwargs)
+                crawler.session_cookies = list(self.cookies)
+                self._all.append(crawler)
+                return crawler
+        return self._idle.get()
+    
+    def release(self, crawler: 'TwitterEntertainmentCrawler'):
+        """Return a crawler to the pool"""
+        self._idle.put(crawler)
+    
+    def crawlers(self) -> List['TwitterEntertainmentCrawler']:
+        """Every crawler created so far (busy or idle)"""
+        with self._lock:
+            return list(self._all)
+    
+    def close(self):
+        """Close every browser created by the pool"""
+        for crawler in self._all:
+            crawler._close_driver()
+        self._all.clear()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+@lru_cache(maxsize=256)
+def _cached_search_url(query: str, since: Optional[str], until: Optional[str],
+                       url_suffix: str) -> str:
+    """Assemble (and memoize) a Twitter search URL"""
+    url = f"https://twitter.com/search?q={quote_plus(query)}{url_suffix}"
+    if since:
+        url += f"&since={quote_plus(since)}"
+    if until:
+        url += f"&until={quote_plus(until)}"
+    return url
+
+
+def _scrape_one_keyword(keyword: str, cookies: List[Dict],
+                        options: Dict) -> Tuple[List[Dict], List[str]]:
+    """
+    Worker entry point for parallel keyword scraping (must be top-level to be picklable)
+    
+    Args:
+        keyword: Keyword/hashtag to search
+        cookies: Session cookies copied from the parent crawler
+        options: Dict with 'crawler' constructor kwargs, scrape parameters and the
+            parent's 'seen_bloom' filter
+        
+    Returns:
+        (processed tweet dictionaries, tweet IDs this worker added to its seen-tweet
+        filter - the parent merges them into its own filter)
+    """
+    crawler = TwitterEntertainmentCrawler(**options['crawler'])
+    crawler.session_cookies = cookies
+    if options.get('seen_bloom') is not None:
+        crawler._seen_bloom = options['seen_bloom']
+    try:
+        tweets = crawler._scrape_keyword(
+            keyword,
+            options['max_tweets'],
+            since=options.get('since'),
+            until=options.get('until'),
+            category=options.get('category')
+        )
+    except Exception as e:
+        logger.error(f"Worker failed for keyword '{keyword}': {e}")
+        tweets = []
+    finally:
+        crawler._close_driver()
+    return tweets, crawler._new_seen_ids
+
+
 def interactive_mode():
     """Interactive menu for crawler"""
     print("\n" + "="*70)
     print("🐦 TWITTER ENTERTAINMENT CRAWLER")
     print("="*70)
     print("\n⚠️ LƯU Ý QUAN TRỌNG:")
-    print("   1. Mỗi lần chạy cần LOGIN lại (option 6)")
-    print("   2. Cookies chỉ tồn tại trong phiên làm việc này")
+    print("   1. Lần đầu chạy cần LOGIN (option 6)")
+    print("   2. Cookies được lưu vào .twitter_cache/ và dùng lại trong 24 giờ")
     print("   3. Sau khi login xong, có thể scrape nhiều lần trong cùng phiên")
-    print("   4. Đóng terminal = mất cookies, phải login lại lần sau")
+    print("   4. Sau 24 giờ cookies hết hạn, phải login lại")
     
     # Ask user which browser to use
     print("\n🌐 CHỌN BROWSER:")
@@ -1925,8 +2749,8 @@ def interactive_mode():
                     
                     print("   ✅ Browser login đã đóng.")
                     print("\n🎯 Bạn có thể scrape tweets ngay bây giờ!")
-                    print("   Crawler sẽ tự động sử dụng cookies đã lưu trong phiên này.")
-                    print("   ⚠️  Cookies chỉ tồn tại trong phiên này (không lưu ra file)")
+                    print("   Crawler sẽ tự động sử dụng cookies đã lưu.")
+                    print("   💾 Cookies sẽ được lưu vào .twitter_cache/ khi thoát (dùng lại trong 24 giờ)")
                 else:
                     print("\n❌ Login không thành công hoặc timeout.")
                     print("   Có thể do:")
@@ -2008,12 +2832,13 @@ def interactive_mode():
                     )
                 
                 elif choice == "5":
-                    username = input("\nNhập username (không cần @): ").strip().lstrip('@')
+                    usernames_input = input("\nNhập username (không cần @, nhiều user cách nhau bằng dấu phẩy): ").strip()
+                    usernames = [u.strip().lstrip('@') for u in usernames_input.split(',') if u.strip()]
                     category = input("Category filter (film/music/none, default=none): ").strip().lower() or None
                     
-                    print(f"\n🔍 Scraping tweets from @{username}...")
-                    tweets = crawler.scrape_by_user(
-                        username=username,
+                    print(f"\n🔍 Scraping tweets from {', '.join('@' + u for u in usernames)}...")
+                    tweets = crawler.scrape_by_users(
+                        usernames=usernames,
                         max_tweets=max_tweets,
                         since=since,
                         until=until,
@@ -2037,7 +2862,7 @@ def interactive_mode():
                     # Save data
                     save = input("\n💾 Lưu dữ liệu? (y/n, default=y): ").strip().lower() != 'n'
                     if save:
-                        save_format = input("Format (csv/json/both, default=both): ").strip().lower() or "both"
+                        save_format = input("Format (parquet/csv/json/both, default=parquet): ").strip().lower() or "parquet"
                         saved_files = crawler.clean_and_save(
                             tweets,
                             clean_data=clean_data,
@@ -2058,20 +2883,112 @@ def interactive_mode():
                 print(f"\n❌ Error: {e}")
                 logger.error(f"Error in interactive mode: {e}", exc_info=True)
     finally:
+        crawler.save_persistent_state()
         crawler._close_driver()
 
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line flags (no --mode = interactive menu)"""
+    parser = argparse.ArgumentParser(description='Twitter/X Entertainment Crawler (film/music)')
+    parser.add_argument('--mode', choices=['film', 'music', 'all', 'keywords', 'user'],
+                        help='Chế độ scrape; bỏ trống để dùng menu tương tác')
+    parser.add_argument('--query', action='append', default=[],
+                        help='keywords mode: danh sách keywords cách nhau bằng dấu phẩy; '
+                             'user mode: username. Lặp lại để chạy nhiều query trong cùng một browser')
+    parser.add_argument('--max-tweets', type=int, default=500, help='Số tweets tối đa mỗi query')
+    parser.add_argument('--since', help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--until', help='End date (YYYY-MM-DD)')
+    parser.add_argument('--category', choices=['film', 'music'],
+                        help='Category filter cho keywords/user mode')
+    parser.add_argument('--save-format', choices=['parquet', 'csv', 'json', 'both'], default='parquet',
+                        help='Định dạng output (mặc định: parquet)')
+    parser.add_argument('--output-folder', default='twitter_entertainment',
+                        help='Thư mục con trong data/ để lưu dữ liệu')
+    parser.add_argument('--sort-by', choices=['top', 'latest'], default='top',
+                        help='Sắp xếp tweets (mặc định: top)')
+    parser.add_argument('--browser', choices=['chrome', 'firefox', 'undetected'], default='chrome',
+                        help='Browser dùng để scrape')
+    parser.add_argument('--no-headless', action='store_true', help='Hiện cửa sổ browser')
+    parser.add_argument('--no-clean', action='store_true', help='Skip data cleaning')
+    parser.add_argument('--debug', action='store_true', help='Lưu screenshots/HTML vào debug_output/')
+    
+    args = parser.parse_args(argv)
+    if args.mode in ('keywords', 'user') and not args.query:
+        parser.error(f"--mode {args.mode} cần ít nhất một --query")
+    return args
+
+
+def run_batch(args: argparse.Namespace) -> Dict:
+    """
+    Run every requested query with one crawler (one browser startup), then save once
+    
+    Args:
+        args: Parsed command-line flags (see parse_args)
+        
+    Returns:
+        Dict with saved file paths (empty if nothing was collected)
+    """
+    with TwitterEntertainmentCrawler(
+        headless=not args.no_headless,
+        use_firefox=(args.browser == 'firefox'),
+        use_undetected=(args.browser == 'undetected'),
+        output_folder=args.output_folder,
+        debug_mode=args.debug,
+        sort_by=args.sort_by
+    ) as crawler:
+        common = {'max_tweets': args.max_tweets, 'since': args.since, 'until': args.until}
+        tweets = []
+        
+        if args.mode == 'film':
+            tweets = crawler.scrape_film_tweets(**common)
+        elif args.mode == 'music':
+            tweets = crawler.scrape_music_tweets(**common)
+        elif args.mode == 'all':
+            result = crawler.scrape_all_entertainment(**common)
+            tweets = result['film'] + result['music']
+        elif args.mode == 'keywords':
+            for query in args.query:
+                keywords = [k.strip() for k in query.split(',')]
+                logger.info(f"🔍 Batch query: {keywords}")
+                tweets += crawler.scrape_by_keywords(keywords=keywords, category=args.category, **common)
+        elif args.mode == 'user':
+            logger.info(f"🔍 Batch users: {args.query}")
+            tweets = crawler.scrape_by_users(usernames=args.query, category=args.category, **common)
+        
+        if not tweets:
+            logger.warning("❌ Không có tweets nào được thu thập!")
+            return {}
+        
+        stats = crawler.get_stats(tweets)
+        logger.info(f"📊 Total: {stats['total_tweets']} (film: {stats['film_tweets']}, "
+                    f"music: {stats['music_tweets']}), total likes: {stats['total_likes']:,}")
+        
+        saved_files = crawler.clean_and_save(
+            tweets,
+            clean_data=not args.no_clean,
+            save_format=args.save_format
+        )
+        for fmt, path in saved_files.items():
+            print(f"✅ {fmt.upper()}: {path}")
+        return saved_files
+
+
 def main():
     """Main function"""
+    args = parse_args()
+    if args.mode:
+        run_batch(args)
+        return
+    
     print("\n" + "="*70)
-    print("🐦 TWITTER ENTERTAINMENT CRAWLER - Using Selenium/BeautifulSoup")
+    print("🐦 TWITTER ENTERTAINMENT CRAWLER - Using Selenium/lxml")
     print("="*70)
     print("\nTÍNH NĂNG:")
     print("  ✅ Scrape tweets về films và music")
     print("  ✅ Lọc chỉ English tweets")
     print("  ✅ Hỗ trợ nhiều search modes")
     print("  ✅ Filter by date range")
-    print("  ✅ Export CSV/JSON")
+    print("  ✅ Export Parquet/CSV/JSON Lines")
     print("  ✅ Tích hợp data cleaning")
     
     print("\n⚠️ LƯU Ý QUAN TRỌNG:")
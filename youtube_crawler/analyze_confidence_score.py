@@ -8,11 +8,30 @@ from pathlib import Path
 
 # Cấu hình
 CSV_FILE = "youtube_raw_comments_labeled_full_merged.csv"
+ANALYSIS_COLUMNS = ['sentiment_score', 'sentiment_label']
+ANALYSIS_DTYPES = {'sentiment_score': 'float32', 'sentiment_label': 'category'}
 
 def load_data(file_path):
-    """Đọc file CSV"""
+    """Đọc file CSV, hoặc Parquet/Feather (nên dùng cho file trung gian - đọc nhanh hơn nhiều)"""
     print(f"Đang đọc file: {file_path}")
-    df = pd.read_csv(file_path)
+    suffix = Path(file_path).suffix.lower()
+    if suffix == '.parquet':
+        # pyarrow chỉ giải mã các cột cần phân tích
+        df = pd.read_parquet(file_path, columns=ANALYSIS_COLUMNS)
+    elif suffix == '.feather':
+        df = pd.read_feather(file_path, columns=ANALYSIS_COLUMNS)
+    if suffix in ('.parquet', '.feather'):
+        # Cùng dtype gọn như nhánh CSV (Parquet thường lưu float64 + string)
+        df = df.astype(ANALYSIS_DTYPES)
+    else:
+        # Chỉ parse 2 cột cần phân tích; float32 + category giảm một nửa bộ nhớ và tăng tốc groupby
+        usecols = lambda column: column in ANALYSIS_COLUMNS
+        try:
+            df = pd.read_csv(file_path, usecols=usecols, dtype=ANALYSIS_DTYPES, engine='c')
+        except ValueError:
+            # sentiment_score có giá trị không phải số - để analyze_confidence_scores tự ép kiểu
+            df = pd.read_csv(file_path, usecols=usecols,
+                             dtype={'sentiment_label': 'category'}, engine='c')
     print(f"Tổng số dòng: {len(df):,}")
     print(f"Số cột: {len(df.columns)}")
     return df
@@ -20,15 +39,12 @@ def load_data(file_path):
 def analyze_confidence_scores(df):
     """Phân tích chi tiết confidence scores"""
     
-    # Làm sạch dữ liệu - loại bỏ các giá trị null hoặc không hợp lệ
-    df_clean = df[df['sentiment_score'].notna()].copy()
-    df_clean['sentiment_score'] = pd.to_numeric(df_clean['sentiment_score'], errors='coerce')
-    df_clean = df_clean[df_clean['sentiment_score'].notna()]
-    
-    # Loại bỏ các sample có confidence score = 0
-    initial_count = len(df_clean)
-    df_clean = df_clean[df_clean['sentiment_score'] != 0].copy()
-    removed_count = initial_count - len(df_clean)
+    # Làm sạch dữ liệu - loại bỏ giá trị null/không hợp lệ và score = 0 bằng một mask duy nhất
+    raw = pd.to_numeric(df['sentiment_score'], errors='coerce').to_numpy(dtype=np.float32)
+    valid = np.isfinite(raw)
+    mask = valid & (raw != 0.0)
+    removed_count = int(valid.sum() - mask.sum())
+    df_clean = df.loc[mask].assign(sentiment_score=raw[mask])
     if removed_count > 0:
         print(f"\nĐã loại bỏ {removed_count:,} samples có confidence score = 0")
     
@@ -42,22 +58,18 @@ def analyze_confidence_scores(df):
     # Thống kê cơ bản
     print("\n1. THỐNG KÊ CƠ BẢN:")
     print("-" * 40)
+    basic = scores.agg(['mean', 'median', 'std', 'min', 'max'])
     print(f"Tổng số comments có confidence score (sau khi loại bỏ score = 0): {len(scores):,}")
-    print(f"Giá trị trung bình (Mean): {scores.mean():.4f}")
-    print(f"Giá trị trung vị (Median): {scores.median():.4f}")
-    print(f"Độ lệch chuẩn (Std): {scores.std():.4f}")
-    print(f"Giá trị nhỏ nhất (Min): {scores.min():.4f}")
-    print(f"Giá trị lớn nhất (Max): {scores.max():.4f}")
+    print(f"Giá trị trung bình (Mean): {basic['mean']:.4f}")
+    print(f"Giá trị trung vị (Median): {basic['median']:.4f}")
+    print(f"Độ lệch chuẩn (Std): {basic['std']:.4f}")
+    print(f"Giá trị nhỏ nhất (Min): {basic['min']:.4f}")
+    print(f"Giá trị lớn nhất (Max): {basic['max']:.4f}")
     
-    # Quartiles
+    # Quartiles - tính tất cả phân vị trong một lần gọi
     print("\n2. PHÂN VỊ (QUARTILES):")
     print("-" * 40)
-    q25 = scores.quantile(0.25)
-    q50 = scores.quantile(0.50)
-    q75 = scores.quantile(0.75)
-    q90 = scores.quantile(0.90)
-    q95 = scores.quantile(0.95)
-    q99 = scores.quantile(0.99)
+    q25, q50, q75, q90, q95, q99 = scores.quantile([0.25, 0.50, 0.75, 0.90, 0.95, 0.99]).values
     print(f"Q25 (25th percentile): {q25:.4f}")
     print(f"Q50 (50th percentile - Median): {q50:.4f}")
     print(f"Q75 (75th percentile): {q75:.4f}")
@@ -70,35 +82,50 @@ def analyze_confidence_scores(df):
     print("-" * 40)
     bins = [0.0, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0]
     labels = ['0.0-0.5', '0.5-0.6', '0.6-0.7', '0.7-0.8', '0.8-0.9', '0.9-0.95', '0.95-1.0']
-    df_clean['score_range'] = pd.cut(scores, bins=bins, labels=labels, include_lowest=True)
-    range_counts = df_clean['score_range'].value_counts().sort_index()
-    for range_name, count in range_counts.items():
-        percentage = (count / len(scores)) * 100
-        print(f"{range_name}: {count:,} ({percentage:.2f}%)")
+    # Khoảng đóng bên phải (a, b] như pd.cut(include_lowest=True), đếm bằng một lượt searchsorted.
+    # Mốc chia cùng dtype với scores (float32): float32(0.6) > 0.6 (float64) nên so khác dtype
+    # sẽ đẩy score nằm đúng mốc sang khoảng trên
+    values = scores.to_numpy()
+    edges = np.array(bins, dtype=values.dtype)
+    in_range = (values >= edges[0]) & (values <= edges[-1])
+    bin_index = np.maximum(np.searchsorted(edges, values[in_range], side='left'), 1) - 1
+    range_counts = np.bincount(bin_index, minlength=len(labels))
+    percentages = range_counts / len(scores) * 100
+    print("\n".join(
+        f"{range_name}: {count:,} ({percentage:.2f}%)"
+        for range_name, count, percentage in zip(labels, range_counts.tolist(), percentages.tolist())
+    ))
     
     # Phân tích theo sentiment label
     print("\n4. PHÂN TÍCH THEO SENTIMENT LABEL:")
     print("-" * 40)
     if 'sentiment_label' in df_clean.columns:
-        label_stats = df_clean.groupby('sentiment_label')['sentiment_score'].agg([
+        label_stats = df_clean.groupby('sentiment_label', observed=True)['sentiment_score'].agg([
             'count', 'mean', 'median', 'std', 'min', 'max'
         ]).round(4)
-        print(label_stats)
+        print(label_stats.to_string())
     
     # Đếm số lượng các giá trị unique
     print("\n5. CÁC GIÁ TRỊ UNIQUE:")
     print("-" * 40)
-    unique_scores = sorted(scores.unique())
-    print(f"Số giá trị unique: {len(unique_scores)}")
-    print(f"Các giá trị: {unique_scores[:20]}...")  # Hiển thị 20 giá trị đầu
+    n_unique = scores.nunique()
+    # In bằng float64 đã làm tròn để không hiện nhiễu float32 (0.6000000238418579)
+    unique_scores = np.unique(scores.to_numpy())[:20].astype(np.float64).round(4).tolist()
+    print(f"Số giá trị unique: {n_unique}")
+    print(f"Các giá trị: {unique_scores}...")  # Hiển thị 20 giá trị đầu
     
     # Top và bottom scores
     print("\n6. TOP 10 SCORES CAO NHẤT:")
     print("-" * 40)
-    top_scores = scores.value_counts().head(10)
-    for score, count in top_scores.items():
-        percentage = (count / len(scores)) * 100
-        print(f"Score {score:.2f}: {count:,} comments ({percentage:.2f}%)")
+    # nlargest dùng heap (O(n log 10)) thay vì sắp xếp toàn bộ histogram
+    top_scores = scores.value_counts(sort=False).nlargest(10)
+    top_percentages = top_scores.to_numpy() / len(scores) * 100
+    print("\n".join(
+        f"Score {score:.2f}: {count:,} comments ({percentage:.2f}%)"
+        for score, count, percentage in zip(
+            top_scores.index.tolist(), top_scores.tolist(), top_percentages.tolist()
+        )
+    ))
     
     return df_clean, scores
 
@@ -0,0 +1,9 @@
+"""
+Cấu hình mặc định cho YouTube crawler
+
+Module này không import thư viện nặng (pandas, googleapiclient, ...) để CLI
+có thể dựng argparse và in --help mà không phải nạp chúng.
+"""
+
+DEFAULT_CONCURRENCY = 20  # Số video crawl đồng thời khi dùng CSV
+DEFAULT_REQUESTS_PER_SECOND = 10.0  # Giới hạn tổng số request API mỗi giây (quota)
@@ -14,6 +14,9 @@ from logger_config import get_cleaner_logger
 logger = get_cleaner_logger()
 
 class CommentDataCleaner:
+    # Các cột được thêm vào bởi validate_comment
+    CLEANED_COLUMNS = ('comment_text_clean', 'text_length', 'word_count', 'is_valid', 'cleaned_at')
+    
     def __init__(self):
         """
         Khởi tạo Comment Data Cleaner
@@ -167,6 +170,33 @@ class CommentDataCleaner:
         
         return cleaned_comment
     
+    def clean_records(self, records: List[Dict]) -> List[Dict]:
+        """
+        Làm sạch list các comment dạng dict (không cần tạo DataFrame)
+        
+        Args:
+            records (List[Dict]): Danh sách comments
+            
+        Returns:
+            List[Dict]: Danh sách comments đã được làm sạch
+        """
+        logger.info(f"Bắt đầu làm sạch {len(records)} comments...")
+        
+        cleaned_comments = []
+        for idx, comment in enumerate(records):
+            try:
+                cleaned_comments.append(self.validate_comment(comment))
+            except Exception as e:
+                logger.warning(f"Lỗi khi làm sạch comment {idx}: {e}")
+                # Giữ nguyên comment gốc nếu có lỗi
+                cleaned_comments.append(dict(comment))
+        
+        valid_count = sum(1 for c in cleaned_comments if c.get('is_valid') is True)
+        logger.info(f"Hoàn thành làm sạch:")
+        logger.info(f"  - Comments hợp lệ: {valid_count}/{len(cleaned_comments)}")
+        
+        return cleaned_comments
+    
     def clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Làm sạch toàn bộ DataFrame
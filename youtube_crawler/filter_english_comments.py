@@ -3,22 +3,95 @@ Utility script to filter out non-English YouTube comments from a CSV file.
 Prompts the user for required inputs via the console instead of CLI arguments.
 """
 
+import multiprocessing.pool
 import os
-from typing import Optional, Tuple
+from functools import partial
+from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+# Optional: fastText language ID (pip install fasttext + download lid.176.bin)
 try:
-    from langdetect import DetectorFactory, LangDetectException, detect_langs
+    import fasttext
+except ImportError:
+    fasttext = None
+
+# Optional: Parquet/Feather output (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    from langdetect import DetectorFactory, LangDetectException
+    from langdetect.detector_factory import PROFILES_DIRECTORY
 except ImportError as exc:
-    raise ImportError(
-        "Missing dependency 'langdetect'. Install it with 'pip install langdetect'."
-    ) from exc
+    if fasttext is None:
+        raise ImportError(
+            "Missing dependency 'langdetect'. Install it with 'pip install langdetect'."
+        ) from exc
+    DetectorFactory = LangDetectException = PROFILES_DIRECTORY = None
 
 from logger_config import get_crawler_logger
 
 logger = get_crawler_logger()
-DetectorFactory.seed = 42
+if DetectorFactory is not None:
+    DetectorFactory.seed = 42
+
+FASTTEXT_MODEL_PATH = os.environ.get("FASTTEXT_LID_MODEL", "lid.176.bin")
+CSV_CHUNK_SIZE = 100_000
+LANGDETECT_BATCH_SIZE = 5_000
+SHORT_TEXT_LENGTH = 10
+
+# ASCII-ratio thresholds for skipping langdetect on clear-cut texts
+ASCII_ACCEPT_RATIO = 0.98
+ASCII_REJECT_RATIO = 0.3
+# Only short texts are accepted on ASCII ratio alone: longer unaccented Vietnamese,
+# Indonesian or Spanish comments are just as ASCII and must go through langdetect
+ASCII_ACCEPT_MAX_LENGTH = 40
+
+_fasttext_model = None
+_fasttext_missing_logged = False
+_detector_factory = None
+
+
+def load_fasttext_model():
+    """
+    Load (once) the fastText language identification model.
+
+    Returns:
+        The fastText model, or None if fasttext or the model file is unavailable.
+    """
+    global _fasttext_model, _fasttext_missing_logged
+    if _fasttext_model is None and fasttext is not None:
+        if os.path.isfile(FASTTEXT_MODEL_PATH):
+            _fasttext_model = fasttext.load_model(FASTTEXT_MODEL_PATH)
+        elif not _fasttext_missing_logged:
+            # Called once per chunk; warn only the first time
+            _fasttext_missing_logged = True
+            logger.warning(
+                "fastText model '%s' not found, falling back to langdetect.",
+                FASTTEXT_MODEL_PATH,
+            )
+    return _fasttext_model
+
+
+def get_detector_factory():
+    """
+    Load (once per process) the langdetect profiles into a reusable DetectorFactory.
+
+    Returns:
+        DetectorFactory: Factory whose create() yields a fresh, cheap Detector.
+    """
+    global _detector_factory
+    if _detector_factory is None:
+        factory = DetectorFactory()
+        factory.load_profile(PROFILES_DIRECTORY)
+        factory.seed = 42
+        _detector_factory = factory
+    return _detector_factory
 
 
 def is_english_text(text: str, min_probability: float = 0.9) -> bool:
@@ -32,11 +105,23 @@ def is_english_text(text: str, min_probability: float = 0.9) -> bool:
     Returns:
         bool: True if text is detected as English, False otherwise.
     """
-    if not text or not text.strip():
+    stripped = text.strip() if text else ""
+    if not stripped:
         return False
 
+    # langdetect is unreliable on very short replies ("lol", "ok", emoji); decide by script
+    if len(stripped) < SHORT_TEXT_LENGTH:
+        return stripped.isascii() and any(c.isalpha() for c in stripped)
+
+    if DetectorFactory is None:
+        raise ImportError(
+            "Missing dependency 'langdetect'. Install it with 'pip install langdetect'."
+        )
+
     try:
-        detections = detect_langs(text)
+        detector = get_detector_factory().create()
+        detector.append(text)
+        detections = detector.get_probabilities()
     except LangDetectException:
         return False
 
@@ -46,56 +131,228 @@ def is_english_text(text: str, min_probability: float = 0.9) -> bool:
     return False
 
 
+def _init_langdetect_worker() -> None:
+    """Pool initializer: load the seeded langdetect profiles once per worker."""
+    DetectorFactory.seed = 42
+    get_detector_factory()
+
+
+def _classify_chunk(texts: List[str], min_probability: float = 0.9) -> List[bool]:
+    """Run is_english_text over one sub-list of texts (executed inside a worker)."""
+    return [is_english_text(text, min_probability=min_probability) for text in texts]
+
+
+def english_mask(
+    texts: pd.Series,
+    min_probability: float = 0.9,
+    pool: Optional[multiprocessing.pool.Pool] = None,
+) -> np.ndarray:
+    """
+    Classify a batch of texts, using fastText when available and langdetect otherwise.
+
+    Args:
+        texts (pd.Series): Texts to evaluate.
+        min_probability (float): Minimum probability required to classify as English.
+        pool (Optional[multiprocessing.pool.Pool]): Worker pool used to spread
+            langdetect calls across cores. If None, langdetect runs in-process.
+
+    Returns:
+        np.ndarray: Boolean mask, True where the text is English.
+    """
+    # Comments are heavily duplicated ("First!", emoji, spam): classify each distinct text once
+    codes, unique_texts = pd.factorize(texts.fillna("").astype(str))
+    unique_mask = _unique_english_mask(
+        pd.Series(unique_texts, dtype=object), min_probability=min_probability, pool=pool
+    )
+    return unique_mask[codes]
+
+
+def _unique_english_mask(
+    texts: pd.Series,
+    min_probability: float = 0.9,
+    pool: Optional[multiprocessing.pool.Pool] = None,
+) -> np.ndarray:
+    """Classify already de-duplicated texts (see english_mask)."""
+    model = load_fasttext_model()
+    if model is None:
+        # Vectorized pre-filter: short, mostly-ASCII text with letters is accepted and
+        # mostly non-ASCII text (CJK, Cyrillic, Arabic, ...) rejected without langdetect
+        lengths = texts.str.len()
+        ascii_ratio = texts.str.count(r"[\x00-\x7f]") / lengths.clip(lower=1)
+        definite_en = (
+            (lengths <= ASCII_ACCEPT_MAX_LENGTH)
+            & (ascii_ratio > ASCII_ACCEPT_RATIO)
+            & texts.str.contains(r"[A-Za-z]", regex=True)
+        )
+        definite_non_en = ascii_ratio < ASCII_REJECT_RATIO
+        ambiguous = (~(definite_en | definite_non_en)).to_numpy()
+
+        mask = definite_en.to_numpy(dtype=bool, copy=True)
+        pending = texts.to_numpy()[ambiguous]
+        if pool is None or len(pending) <= LANGDETECT_BATCH_SIZE:
+            # Plain loop over the object array: no Series.apply dispatch or result inference
+            mask[ambiguous] = np.fromiter(
+                (is_english_text(text, min_probability) for text in pending),
+                dtype=bool,
+                count=len(pending),
+            )
+        else:
+            pending = pending.tolist()
+            sub_lists = [
+                pending[i:i + LANGDETECT_BATCH_SIZE]
+                for i in range(0, len(pending), LANGDETECT_BATCH_SIZE)
+            ]
+            results = pool.imap(
+                partial(_classify_chunk, min_probability=min_probability),
+                sub_lists,
+                chunksize=1,
+            )
+            mask[ambiguous] = [flag for result in results for flag in result]
+        return mask
+
+    # fastText rejects newlines and classifies the whole list in one C++ call
+    lines = texts.str.replace("\n", " ", regex=False).tolist()
+    labels, probs = model.predict(lines, k=1)
+    return np.fromiter(
+        (
+            bool(text.strip()) and lab[0] == "__label__en" and p[0] >= min_probability
+            for text, lab, p in zip(lines, labels, probs)
+        ),
+        dtype=bool,
+        count=len(lines),
+    )
+
+
+def _write_chunks(chunks: Iterable[pd.DataFrame], output_path: str) -> None:
+    """
+    Stream DataFrame chunks to CSV, or to zstd-compressed Parquet/Feather by file suffix.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks sharing the same columns.
+        output_path (str): Destination file (.parquet, .feather or anything else for CSV).
+    """
+    suffix = os.path.splitext(output_path)[1].lower()
+    if suffix not in (".parquet", ".feather"):
+        # One handle for the whole run so each chunk is appended without reopening the file
+        with open(output_path, "w", encoding="utf-8", newline="") as out:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(out, header=(i == 0), index=False)
+        return
+
+    if pa is None:
+        raise ImportError(
+            "Missing dependency 'pyarrow' for Parquet/Feather output. Install it with 'pip install pyarrow'."
+        )
+
+    writer = None
+    schema = None
+    try:
+        for chunk in chunks:
+            # Later chunks are cast to the first chunk's schema so the file stays consistent
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                if suffix == ".parquet":
+                    writer = pq.ParquetWriter(output_path, schema, compression="zstd")
+                else:
+                    writer = pa.ipc.new_file(
+                        output_path,
+                        schema,
+                        options=pa.ipc.IpcWriteOptions(compression="zstd"),
+                    )
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
 def filter_english_comments(
     input_csv: str,
     output_csv: Optional[str] = None,
     text_column: str = "comment_text",
     min_probability: float = 0.9,
-) -> str:
+    like_column: str = "like_count",
+) -> Tuple[str, pd.DataFrame]:
     """
     Filter a CSV file, keeping only rows where the comment text is detected as English.
 
+    Intermediate files of the analysis pipeline should be written as .parquet
+    (or .feather); export CSV only at the final boundary.
+
     Args:
         input_csv (str): Path to the input CSV file.
-        output_csv (Optional[str]): Desired path for the filtered CSV. If None,
-            "_en" is appended before the file extension of the input file.
+        output_csv (Optional[str]): Desired output path. A .parquet or .feather
+            suffix writes zstd-compressed Arrow output, anything else writes CSV.
+            If None, "_filtered.csv" replaces the extension of the input file.
         text_column (str): Name of the column containing comment text.
         min_probability (float): Minimum probability threshold for English detection.
+        like_column (str): Column kept in the returned summary frame, if present.
 
     Returns:
-        str: Path to the saved filtered CSV file.
+        Tuple[str, pd.DataFrame]: Path to the saved filtered file, and the kept
+            rows restricted to like_column (enough for summarize_filtered_data
+            without re-reading the output).
     """
     if not os.path.isfile(input_csv):
         raise FileNotFoundError(f"Input CSV does not exist: {input_csv}")
 
-    df = pd.read_csv(input_csv)
-
-    if text_column not in df.columns:
-        raise ValueError(f"Column '{text_column}' not found in the CSV file.")
-
     logger.info(
         "Filtering comments in '%s' by English language with min_probability=%.2f",
         input_csv,
         min_probability,
     )
 
-    english_mask = df[text_column].astype(str).apply(
-        lambda text: is_english_text(text, min_probability=min_probability)
-    )
-    filtered_df = df[english_mask].reset_index(drop=True)
-
     if output_csv is None:
         base, _ = os.path.splitext(input_csv)
         output_csv = f"{base}_filtered.csv"
 
-    filtered_df.to_csv(output_csv, index=False, encoding="utf-8")
+    # langdetect is pure Python, so spread it across cores (fastText needs no pool)
+    pool = None
+    if load_fasttext_model() is None:
+        # Fail here rather than in every worker's initializer (which would hang the pool)
+        if DetectorFactory is None:
+            raise ImportError(
+                f"No language detector available: fastText model '{FASTTEXT_MODEL_PATH}' "
+                "not found and 'langdetect' is not installed. "
+                "Install it with 'pip install langdetect'."
+            )
+        pool = multiprocessing.Pool(os.cpu_count(), initializer=_init_langdetect_worker)
+
+    counts = {"total": 0, "kept": 0}
+    summary_parts = []
+    reader = pd.read_csv(input_csv, chunksize=CSV_CHUNK_SIZE, dtype={text_column: str})
+
+    def english_chunks():
+        for chunk in reader:
+            if text_column not in chunk.columns:
+                raise ValueError(f"Column '{text_column}' not found in the CSV file.")
+
+            mask = english_mask(chunk[text_column], min_probability=min_probability, pool=pool)
+            counts["total"] += len(chunk)
+            counts["kept"] += int(mask.sum())
+            kept = chunk[mask]
+            summary_parts.append(kept[[c for c in (like_column,) if c in kept.columns]])
+            yield kept
+            del chunk, mask, kept
+
+    try:
+        _write_chunks(english_chunks(), output_csv)
+    finally:
+        reader.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+
     logger.info(
         "Saved %d English comments (from %d rows) to '%s'.",
-        len(filtered_df),
-        len(df),
+        counts["kept"],
+        counts["total"],
         output_csv,
     )
-    return output_csv
+    summary_df = (
+        pd.concat(summary_parts, ignore_index=True) if summary_parts else pd.DataFrame()
+    )
+    return output_csv, summary_df
 
 
 def summarize_filtered_data(df: pd.DataFrame, like_column: str = "like_count") -> None:
@@ -176,14 +433,14 @@ def main():
             min_probability,
         ) = prompt_user_inputs()
 
-        output_path = filter_english_comments(
+        output_path, filtered_df = filter_english_comments(
             input_csv=input_csv,
             output_csv=output_csv,
             text_column=text_column,
             min_probability=min_probability,
+            like_column=like_column,
         )
 
-        filtered_df = pd.read_csv(output_path)
         summarize_filtered_data(filtered_df, like_column=like_column)
 
         print(f"✅ Saved filtered comments to: {output_path}")
@@ -12,21 +12,43 @@ The script will prompt for:
     3. Row range [l, r] to label (defaults to the entire file if blank).
     4. Optional output path (defaults to `<input_stem>_l<l>_r<r>_labeled.csv` if blank).
 
+Pass ``--backend local-int8`` to label with a small int8-quantized ONNX model on the
+CPU instead of Gemini (needs ``optimum[onnxruntime]``; no API key, no rate limits).
+
+Pass ``--output-format parquet`` to write a zstd Parquet file instead of CSV
+(dictionary-encoded labels, float32 scores, one row group per batch).
+
 Only the columns `comment_id`, `like_count`, and `comment_text` are sent to Gemini.
 Each labeled row receives a `sentiment_label` (neutral/negative/positive) and
 `sentiment_score` (float 0-1). Existing values in those columns are overwritten.
 You can specify a subset range of rows to label. Labeled samples are appended to
-an output CSV incrementally after each batch so progress persists automatically.
+an output CSV incrementally by a background writer thread, flushed every few
+batches, so progress persists automatically.
+Several batches are kept in flight at once (``--concurrency``); rows are still
+written in their original order.
 """
 
 from __future__ import annotations
 
+import asyncio
+import atexit
 import csv
+import functools
+import hashlib
+import io
+import itertools
 import json
+import mmap
+import operator
+import queue
+import re
+import sqlite3
 import sys
+import threading
 import time
+from collections import Counter, deque
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 try:
     import google.generativeai as genai
@@ -38,11 +60,191 @@ except ImportError as exc:  # pragma: no cover - guidance for setup issues
     )
     raise
 
+# Optional: fast JSON codec for prompt payloads and responses (pip install orjson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: SIMD 64-bit hash for the label cache keys (pip install xxhash)
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Optional: vectorized parsing and the CSV offset index (pip install numpy)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Optional: multi-threaded C++ CSV parser (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pa_csv = pq = None
+
+try:
+    from google.api_core.exceptions import ResourceExhausted
+except ImportError:  # pragma: no cover - ships with google-generativeai
+    ResourceExhausted = None
+
 
 MODEL_NAME = "gemini-2.5-pro"
 MODEL_MAX_INPUT_TOKENS = 2_000_000  # per Gemini 2.5 Pro public specs
-DEFAULT_BATCH_SIZE = 100
+DEFAULT_BATCH_SIZE = 100  # first batch; later batches are sized from observed comment length
+TARGET_PROMPT_TOKENS = 200_000  # ~10% of the input window, leaves headroom for the response
+MIN_BATCH_SIZE = 10
+MAX_BATCH_SIZE = 1000
+MAX_COMMENT_CHARS = 4000  # longer comments are truncated before they reach the prompt
+BATCH_EWMA_ALPHA = 0.2
+DEFAULT_CONCURRENCY = 8  # max batches awaiting Gemini at the same time (AIMD ceiling)
+DEFAULT_RPM = 60  # Google AI profile: requests per minute
+DEFAULT_TPM = 100_000  # Google AI profile: input tokens per minute
 VALID_LABELS = ("neutral", "negative", "positive")
+# Millions of output rows share these few strings; keep a single object for each
+_LABELS = tuple(sys.intern(label) for label in VALID_LABELS)
+_LABEL_LOOKUP = {label: label for label in _LABELS}
+_NEUTRAL = _LABEL_LOOKUP["neutral"]
+_EMPTY = sys.intern("")
+_VALID_LABEL_ARRAY = np.array(VALID_LABELS) if np is not None else None
+_SCORE_CACHE = {i / 10000: f"{i / 10000:.4f}" for i in range(10001)}
+# Constrained decoding: Gemini must answer with exactly the JSON the parser expects
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "row_index": {"type": "integer"},
+                    "sentiment_label": {"type": "string", "enum": list(VALID_LABELS)},
+                    "sentiment_score": {"type": "number"},
+                },
+                "required": ["row_index", "sentiment_label", "sentiment_score"],
+            },
+        }
+    },
+    "required": ["results"],
+}
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": RESPONSE_SCHEMA,
+}
+# Comments that are trivially neutral never reach Gemini (see prefilter_reason)
+RE_URL_ONLY = re.compile(r"^\s*(https?://\S+\s*)+$")
+RE_EMOJI_ONLY = re.compile(r"^[\s\W_]+$", re.UNICODE)
+MIN_COMMENT_CHARS = 3
+PREFILTER_SCORE = 0.5
+PREFILTER_SKIPS: Counter = Counter()  # reason -> rows labeled locally in this process
+BACKENDS = ("gemini", "local-int8")
+LOCAL_MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+LOCAL_MODEL_DIR = Path(__file__).resolve().parent / ".local_models"
+LOCAL_BATCH_SIZE = 64  # texts per ONNX Runtime forward pass
+LOCAL_SEQ_BUCKETS = (64, 128, 256)  # pad to a few fixed lengths; longer texts are truncated
+LABEL_CACHE_PATH = Path(__file__).resolve().parent / ".label_cache.sqlite3"
+LABEL_CACHE_LOOKUP_CHUNK = 500  # keys per SELECT ... IN (...), under SQLite's variable limit
+PROMPT_CACHE_TTL = "21600s"  # 6 h; the cached preamble is deleted at exit anyway
+OFFSET_SCAN_CHUNK = 64 << 20  # bytes compared per NumPy pass when indexing row starts
+ARROW_CSV_BLOCK_SIZE = 8 << 20  # bytes per block parsed by the streaming pyarrow reader
+RETRY_DELAY_PATTERN = re.compile(
+    r"retry(?:_delay)?\s*(?:in|\{\s*seconds:)\s*([\d.]+)", re.IGNORECASE
+)
+
+
+class RateLimiter:
+    """
+    Sliding-window RPM/TPM limiter with AIMD concurrency control.
+
+    Requests and their estimated input tokens are kept for the last 60 s. The
+    number of in-flight permits halves on every 429 (and honours Retry-After)
+    and grows by one on every success, up to ``max_concurrency``.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(
+        self,
+        rpm: int = DEFAULT_RPM,
+        tpm: int = DEFAULT_TPM,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.permits = float(max_concurrency)
+        self.in_flight = 0
+        self._window: deque = deque()  # (timestamp, est_tokens)
+        self._window_tokens = 0
+        self._blocked_until = 0.0
+        self._cond = asyncio.Condition()
+
+    def _expire(self, now: float) -> None:
+        while self._window and now - self._window[0][0] >= self.WINDOW_SECONDS:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _wait_time(self, now: float, est_tokens: int) -> float | None:
+        """Seconds until a request may start; 0 = now, None = wait for a release."""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        window_full = len(self._window) >= self.rpm or (
+            self._window and self._window_tokens + est_tokens > self.tpm
+        )
+        if window_full:
+            return self._window[0][0] + self.WINDOW_SECONDS - now
+        if self.in_flight >= int(self.permits):
+            return None
+        return 0.0
+
+    async def acquire(self, est_tokens: int) -> None:
+        async with self._cond:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait_time(now, est_tokens)
+                if wait == 0.0:
+                    self._window.append((now, est_tokens))
+                    self._window_tokens += est_tokens
+                    self.in_flight += 1
+                    return
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, throttled: bool = False, retry_after: float | None = None) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.permits = max(1.0, self.permits * 0.5)
+                if retry_after:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            else:
+                self.permits = min(float(self.max_concurrency), self.permits + 1)
+            self._cond.notify_all()
+
+
+def is_rate_limited(err: Exception) -> bool:
+    if ResourceExhausted is not None and isinstance(err, ResourceExhausted):
+        return True
+    return "429" in str(err) or "quota" in str(err).lower()
+
+
+def retry_after_seconds(err: Exception) -> float | None:
+    """Read the server-suggested delay from a Retry-After header or the error text."""
+    headers = getattr(getattr(err, "response", None), "headers", None)
+    if headers is not None and headers.get("Retry-After"):
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+    match = RETRY_DELAY_PATTERN.search(str(err))
+    return float(match.group(1)) if match else None
+
 
 def ask_csv_path() -> Path:
     raw_path = input("Enter the absolute path to the CSV file: ").strip()
@@ -103,11 +305,43 @@ def ask_sample_range(total_rows: int) -> Tuple[int, int]:
 
 
 def configure_model(api_key: str):
+    """
+    Build the model with the static prompt preamble stored once via Gemini context
+    caching; falls back to a plain system instruction if the cache cannot be created
+    (e.g. the preamble is below the model's minimum cacheable size).
+    """
     genai.configure(api_key=api_key)
-    return genai.GenerativeModel(MODEL_NAME)
+    try:
+        cached = genai.caching.CachedContent.create(
+            model=MODEL_NAME, system_instruction=PROMPT_PREAMBLE, ttl=PROMPT_CACHE_TTL
+        )
+    except Exception as err:
+        print(f"Context caching unavailable ({err}); sending the preamble with each call.")
+        return genai.GenerativeModel(
+            MODEL_NAME, system_instruction=PROMPT_PREAMBLE, generation_config=GENERATION_CONFIG
+        )
+    atexit.register(cached.delete)
+    return genai.GenerativeModel.from_cached_content(cached, generation_config=GENERATION_CONFIG)
+
+
+def create_keyed_model(api_key: str):
+    """
+    Build a model bound to its own async client. genai.configure() is process-global,
+    so this is what lets several API keys label concurrently in one event loop.
+    The preamble goes in as a system instruction (cached contents belong to the
+    globally configured key).
+    """
+    from google.ai import generativelanguage as glm
+
+    model = genai.GenerativeModel(
+        MODEL_NAME, system_instruction=PROMPT_PREAMBLE, generation_config=GENERATION_CONFIG
+    )
+    # generate_content_async() only creates the default (global-key) client when unset
+    model._async_client = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+    return model
 
 
-PROMPT_TEMPLATE = """
+PROMPT_PREAMBLE = """
 Role: You are an expert sentiment analysis specialist focused on entertainment content on social media, especially YouTube comments related to movies, music, artists, film production, and other entertainment topics. You are highly experienced in identifying subtle emotional nuances, including sarcasm, praise, and neutrality.
 
 Goal: To accurately and consistently classify the sentiment of YouTube comments regarding the main topic (artist, product, film or music project), in order to create high-quality data labels for a Sentiment Analysis task. Ensure labels use only valid classes, with a confidence score reflecting certainty, to support effective AI model training.
@@ -129,8 +363,10 @@ Batch instructions:
 - You will receive a JSON array named "comments". Each item includes "row_index", "comment_id", "like_count", and "comment_text".
 - Produce a JSON object with key "results" that contains an array of objects: {{"row_index": int, "sentiment_label": str, "sentiment_score": float}}.
 - Maintain the same ordering as provided. Do not include any text outside the JSON object.
+""".format(valid_labels=VALID_LABELS)
 
-comments:
+# Only this part changes per batch; the preamble is sent once (cached / system instruction)
+PROMPT_TAIL = """comments:
 {comments_json}
 """
 
@@ -143,72 +379,294 @@ def build_batch_prompt(items: List[Dict[str, Any]]) -> str:
                 "row_index": item["row_index"],
                 "comment_id": item["comment_id"],
                 "like_count": item["like_count"],
-                "comment_text": (item["comment_text"] or "").strip(),
+                "comment_text": (item["comment_text"] or "").strip()[:MAX_COMMENT_CHARS],
             }
         )
-    comments_json = json.dumps(payload, ensure_ascii=False)
-    return PROMPT_TEMPLATE.format(valid_labels=VALID_LABELS, comments_json=comments_json)
+    if orjson is not None:
+        # orjson emits UTF-8 without escaping non-ASCII, like ensure_ascii=False
+        comments_json = orjson.dumps(payload).decode("utf-8")
+    else:
+        comments_json = json.dumps(payload, ensure_ascii=False)
+    return PROMPT_TAIL.format(comments_json=comments_json)
 
 
 def parse_batch_response(text: str) -> Dict[int, Tuple[str, float]]:
     """
-    Attempt to extract {"results": [...]} JSON payload from the model's response.
+    Decode the {"results": [...]} JSON payload (the response is schema-constrained).
     Raises ValueError if parsing fails or labels are invalid.
     """
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        raise ValueError("No JSON object found in response.")
-    snippet = text[start : end + 1]
-    data = json.loads(snippet)
+    data = orjson.loads(text) if orjson is not None else json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("Response JSON is not an object.")
     results = data.get("results")
     if not isinstance(results, list):
         raise ValueError("Response JSON missing 'results' array.")
 
-    parsed: Dict[int, Tuple[str, float]] = {}
-    for item in results:
-        if not isinstance(item, dict):
-            continue
-        row_idx = item.get("row_index")
-        if not isinstance(row_idx, int):
-            continue
-        label = str(item.get("sentiment_label", "")).lower()
-        if label not in VALID_LABELS:
-            raise ValueError(f"Invalid sentiment_label: {label}")
-        score = float(item.get("sentiment_score", 0))
-        score = max(0.0, min(1.0, score))
-        parsed[row_idx] = (label, score)
-    if not parsed:
+    items = [
+        item for item in results
+        if isinstance(item, dict) and isinstance(item.get("row_index"), int)
+    ]
+    if not items:
         raise ValueError("No valid entries parsed from response.")
-    return parsed
+    row_indices = [item["row_index"] for item in items]
+    raw_labels = [item.get("sentiment_label", _EMPTY) for item in items]
+    raw_scores = [item.get("sentiment_score", 0) for item in items]
 
+    if np is None:
+        parsed: Dict[int, Tuple[str, float]] = {}
+        for row_idx, raw_label, raw_score in zip(row_indices, raw_labels, raw_scores):
+            label = _LABEL_LOOKUP.get(raw_label) or _LABEL_LOOKUP.get(str(raw_label).lower())
+            if label is None:
+                raise ValueError(f"Invalid sentiment_label: {raw_label}")
+            parsed[row_idx] = (label, max(0.0, min(1.0, float(raw_score))))
+        return parsed
 
-def label_batch(
+    # Validate and clamp the whole batch in NumPy instead of per item
+    labels = np.char.lower(np.asarray(raw_labels, dtype=str))
+    valid_mask = np.isin(labels, _VALID_LABEL_ARRAY)
+    if not valid_mask.all():
+        raise ValueError(f"Invalid sentiment_label: {raw_labels[int(np.argmin(valid_mask))]}")
+    scores = np.asarray(raw_scores, dtype=np.float64)
+    np.clip(scores, 0.0, 1.0, out=scores)
+    return dict(
+        zip(row_indices, zip(map(_LABEL_LOOKUP.__getitem__, labels.tolist()), scores.tolist()))
+    )
+
+
+async def label_batch(
     model,
     batch_items: List[Dict[str, Any]],
+    limiter: RateLimiter,
     max_attempts: int = 3,
 ) -> Dict[int, Tuple[str, float]]:
     prompt = build_batch_prompt(batch_items)
+    est_tokens = len(prompt) // 4
     last_error: Exception | None = None
 
     for attempt in range(1, max_attempts + 1):
+        await limiter.acquire(est_tokens)
         try:
-            response = model.generate_content(prompt)
-            return parse_batch_response(response.text)
+            response = await model.generate_content_async(prompt)
         except Exception as err:
             last_error = err
-            wait = 2**attempt
+            throttled = is_rate_limited(err)
+            # 429: the limiter halves concurrency and blocks new calls until Retry-After;
+            # anything else is treated as a transient blip and retried quickly
+            wait = (retry_after_seconds(err) or 2**attempt) if throttled else 1
+            await limiter.release(throttled=throttled, retry_after=wait if throttled else None)
             print(
                 f"[Attempt {attempt}/{max_attempts}] Failed to label batch: {err}. "
                 f"Retrying in {wait}s...",
                 file=sys.stderr,
             )
-            time.sleep(wait)
+            if not throttled:
+                await asyncio.sleep(wait)
+            continue
+
+        await limiter.release()
+        # Output is schema-constrained, so a bad payload is not worth another full call
+        return parse_batch_response(response.text)
 
     assert last_error is not None
     raise RuntimeError(f"Failed to label batch after {max_attempts} attempts.") from last_error
 
 
+def prefilter_reason(comment_text: str) -> str | None:
+    """Return why a non-empty comment can be labeled neutral without Gemini, else None."""
+    stripped = comment_text.strip()
+    if len(stripped) < MIN_COMMENT_CHARS:
+        return "too_short"
+    if RE_URL_ONLY.match(stripped):
+        return "url_only"
+    if RE_EMOJI_ONLY.match(stripped):
+        return "emoji_only"
+    return None
+
+
+def load_local_int8_model(model_name: str = LOCAL_MODEL_NAME):
+    """
+    Load a sentiment classifier as a graph-fused, dynamically int8-quantized ONNX
+    model for CPU. The export is built once and reused from LOCAL_MODEL_DIR.
+    """
+    try:
+        import onnxruntime
+        from optimum.onnxruntime import (
+            ORTModelForSequenceClassification,
+            ORTOptimizer,
+            ORTQuantizer,
+        )
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig, OptimizationConfig
+        from transformers import AutoTokenizer
+    except ImportError:
+        print(
+            "The local-int8 backend needs optimum[onnxruntime]. "
+            "Install it with `pip install optimum[onnxruntime]` and rerun.",
+            file=sys.stderr,
+        )
+        raise
+
+    import platform
+
+    save_dir = LOCAL_MODEL_DIR / f"{model_name.replace('/', '__')}-int8"
+    quantized_file = save_dir / "model_optimized_quantized.onnx"
+    if not quantized_file.exists():
+        print(f"Exporting {model_name} to ONNX, fusing and quantizing to int8 (one-time)...")
+        ort_model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        # Fuse attention, LayerNorm+Add and GELU into single kernels before quantizing
+        ORTOptimizer.from_pretrained(ort_model).optimize(
+            save_dir=save_dir,
+            optimization_config=OptimizationConfig(optimization_level=2, optimize_for_gpu=False),
+        )
+        quantizer = ORTQuantizer.from_pretrained(save_dir, file_name="model_optimized.onnx")
+        if platform.machine().lower() in ("arm64", "aarch64"):
+            qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+        else:
+            qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=save_dir, quantization_config=qconfig)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(save_dir)
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    tokenizer = AutoTokenizer.from_pretrained(save_dir)
+    ort_model = ORTModelForSequenceClassification.from_pretrained(
+        save_dir, file_name=quantized_file.name, session_options=session_options
+    )
+    return tokenizer, ort_model
+
+
+def label_batch_local(tokenizer, ort_model, texts: List[str]) -> List[Tuple[str, float]]:
+    """
+    Classify ``texts`` with the local model. Texts are length-sorted and padded to
+    the smallest bucket in LOCAL_SEQ_BUCKETS, LOCAL_BATCH_SIZE per forward pass.
+    """
+    id2label = {
+        idx: _LABEL_LOOKUP[str(name).lower()]
+        for idx, name in ort_model.config.id2label.items()
+    }
+    encoded = tokenizer(texts, truncation=True, max_length=LOCAL_SEQ_BUCKETS[-1])["input_ids"]
+    order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+    results: List[Tuple[str, float]] = [(_NEUTRAL, 0.0)] * len(texts)
+
+    for start in range(0, len(order), LOCAL_BATCH_SIZE):
+        chunk = order[start : start + LOCAL_BATCH_SIZE]
+        longest = max(len(encoded[i]) for i in chunk)
+        bucket = next(size for size in LOCAL_SEQ_BUCKETS if size >= longest)
+        inputs = tokenizer.pad(
+            {"input_ids": [encoded[i] for i in chunk]},
+            padding="max_length",
+            max_length=bucket,
+            return_tensors="np",
+        )
+        logits = np.asarray(
+            ort_model(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]).logits,
+            dtype=np.float32,
+        )
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        for i, cls, prob in zip(chunk, best.tolist(), probs.max(axis=1).tolist()):
+            results[i] = (id2label[cls], prob)
+    return results
+
+
+class LocalSentimentLabeler:
+    """
+    Async labeler backed by a local int8 ONNX model; same interface as a Gemini labeler
+    (``await labeler(batch_items) -> {row_index: (label, score)}``).
+    """
+
+    def __init__(self, model_name: str = LOCAL_MODEL_NAME) -> None:
+        if np is None:
+            raise ImportError("The local-int8 backend needs numpy. Install it with `pip install numpy`.")
+        self.model_name = f"{model_name}@int8"
+        self.tokenizer, self.ort_model = load_local_int8_model(model_name)
+        # ONNX Runtime already uses every core per call; run one forward pass at a time
+        self._lock = threading.Lock()
+
+    def _label(self, batch_items: List[Dict[str, Any]]) -> Dict[int, Tuple[str, float]]:
+        texts = [(item["comment_text"] or "").strip()[:MAX_COMMENT_CHARS] for item in batch_items]
+        with self._lock:
+            labels = label_batch_local(self.tokenizer, self.ort_model, texts)
+        return {item["row_index"]: result for item, result in zip(batch_items, labels)}
+
+    async def __call__(self, batch_items: List[Dict[str, Any]]) -> Dict[int, Tuple[str, float]]:
+        # Off the event loop, so CSV reading and writing overlap with inference
+        return await asyncio.to_thread(self._label, batch_items)
+
+
+def comment_cache_key(comment_text: str) -> int:
+    """64-bit content hash of the normalized comment (xxh3 if available, else blake2b)."""
+    data = comment_text.strip().lower().encode("utf-8")
+    if xxhash is not None:
+        digest = xxhash.xxh3_64_digest(data)
+    else:
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)  # fits SQLite's signed INTEGER
+
+
+class LabelCache:
+    """
+    On-disk ``comment_text -> (label, score)`` cache in SQLite (WAL mode), keyed by
+    comment_cache_key and the model that produced the label, so duplicate comments
+    (spam, "first!", pasted lyrics) are only sent once across batches and runs.
+    """
+
+    def __init__(self, path: Path, model_version: str) -> None:
+        self.model_version = model_version
+        self.hits = 0
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS labels ("
+            "h INTEGER NOT NULL, model TEXT NOT NULL, label TEXT NOT NULL, score REAL NOT NULL, "
+            "PRIMARY KEY (h, model)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[int]) -> Dict[int, Tuple[str, float]]:
+        found: Dict[int, Tuple[str, float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), LABEL_CACHE_LOOKUP_CHUNK):
+            chunk = unique_keys[start : start + LABEL_CACHE_LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT h, label, score FROM labels WHERE model = ? AND h IN ({placeholders})",
+                (self.model_version, *chunk),
+            )
+            for key, label, score in rows:
+                found[key] = (_LABEL_LOOKUP.get(label, _NEUTRAL), score)
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[int, str, float]]) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO labels (h, model, label, score) VALUES (?, ?, ?, ?)",
+            ((key, self.model_version, label, score) for key, label, score in entries),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def model_version(model) -> str:
+    """Name of the model behind a Gemini model or a LocalSentimentLabeler (cache namespace)."""
+    return getattr(model, "model_name", MODEL_NAME)
+
+
+def make_labeler(model, limiter: RateLimiter):
+    """Wrap a Gemini model (paced by ``limiter``) or a local labeler as ``labeler(batch_items)``."""
+    if isinstance(model, LocalSentimentLabeler):
+        return model
+    return functools.partial(label_batch, model, limiter=limiter)
+
+
+def format_score(score: float) -> str:
+    """Format a 0-1 score with 4 decimals, reusing cached strings for 4-decimal values."""
+    cached = _SCORE_CACHE.get(score)
+    return cached if cached is not None else f"{score:.4f}"
+
+
 def normalize_like_count(raw_value: str | None) -> int:
     if raw_value is None or raw_value == "":
         return 0
@@ -218,26 +676,579 @@ def normalize_like_count(raw_value: str | None) -> int:
         return 0
 
 
+OUTPUT_FIELDS = (
+    "row_index",
+    "comment_id",
+    "like_count",
+    "comment_text",
+    "sentiment_label",
+    "sentiment_score",
+)
+
+
+OUTPUT_FORMATS = ("csv", "parquet")
+
+
+class CsvSink:
+    """Append labeled rows to a CSV file (flushed by BackgroundSink every few batches)."""
+
+    # Fixed schema: one C-level itemgetter call per row instead of DictWriter's checks
+    _row_values = operator.itemgetter(*OUTPUT_FIELDS)
+
+    def __init__(self, output_path: Path) -> None:
+        self._file = output_path.open("w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(OUTPUT_FIELDS)
+
+    def write(self, row_outputs: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(map(self._row_values, row_outputs))
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink:
+    """
+    Append labeled rows to a zstd Parquet file, one row group per batch.
+    Labels are dictionary-encoded (int8 codes) and scores stored as float32,
+    which keeps the 4-decimal scores of the CSV output (float16 cannot).
+    """
+
+    LABEL_CODES = {label: code for code, label in enumerate(VALID_LABELS)}
+
+    def __init__(self, output_path: Path) -> None:
+        if pq is None or np is None:
+            raise ImportError(
+                "Parquet output needs pyarrow and numpy. Install them with `pip install pyarrow numpy`."
+            )
+        self._labels = pa.array(VALID_LABELS, type=pa.string())
+        self.schema = pa.schema(
+            [
+                ("row_index", pa.int32()),
+                ("comment_id", pa.string()),
+                ("like_count", pa.int32()),
+                ("comment_text", pa.large_string()),
+                ("sentiment_label", pa.dictionary(pa.int8(), pa.string())),
+                ("sentiment_score", pa.float32()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(
+            str(output_path), self.schema, compression="zstd", compression_level=3
+        )
+
+    def write(self, row_outputs: List[Dict[str, Any]]) -> None:
+        if not row_outputs:
+            return
+        label_codes = pa.array(
+            [self.LABEL_CODES[row["sentiment_label"]] for row in row_outputs], type=pa.int8()
+        )
+        # Rows that could not be labeled have an empty score, stored as NaN
+        scores = np.array(
+            [float(row["sentiment_score"] or "nan") for row in row_outputs], dtype=np.float32
+        )
+        batch = pa.record_batch(
+            [
+                pa.array([row["row_index"] for row in row_outputs], type=pa.int32()),
+                pa.array([row["comment_id"] for row in row_outputs], type=pa.string()),
+                pa.array([row["like_count"] for row in row_outputs], type=pa.int32()),
+                pa.array([row["comment_text"] for row in row_outputs], type=pa.large_string()),
+                pa.DictionaryArray.from_arrays(label_codes, self._labels),
+                pa.array(scores, type=pa.float32()),
+            ],
+            schema=self.schema,
+        )
+        self._writer.write_batch(batch)
+
+    def flush(self) -> None:
+        pass  # every write_batch() already lands as a complete row group
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class BackgroundSink:
+    """
+    Run another sink's writes on a background thread so disk I/O overlaps with the
+    Gemini calls. Batches go through a small bounded queue and the file is flushed
+    every ``flush_every`` batches (and on close) instead of after every batch.
+    """
+
+    def __init__(self, sink, flush_every: int = 10, max_pending: int = 4) -> None:
+        self.sink = sink
+        self.flush_every = flush_every
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._writes = 0
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._writer_loop, name="label-writer", daemon=True)
+        self._thread.start()
+
+    def _writer_loop(self) -> None:
+        while True:
+            rows, should_flush = self._queue.get()
+            if rows is None and not should_flush:
+                return
+            if self._error is not None:
+                continue  # drain the queue so producers never block on a dead writer
+            try:
+                if rows is not None:
+                    self.sink.write(rows)
+                if should_flush:
+                    self.sink.flush()
+            except BaseException as err:
+                self._error = err
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Background writer failed") from self._error
+
+    def write(self, row_outputs: List[Dict[str, Any]]) -> None:
+        self._raise_if_failed()
+        self._queue.put((row_outputs, False))
+        self._writes += 1
+        if self._writes % self.flush_every == 0:
+            self._queue.put((None, True))
+
+    def close(self) -> None:
+        self._queue.put((None, True))
+        self._queue.put((None, False))
+        self._thread.join()
+        self.sink.close()
+        self._raise_if_failed()
+
+
+def open_output_sink(output_path: Path, output_format: str = "csv"):
+    sink = ParquetSink(output_path) if output_format == "parquet" else CsvSink(output_path)
+    return BackgroundSink(sink)
+
+
+async def label_items_with_split(
+    labeler,
+    batch_items: List[Dict[str, Any]],
+    splits: int = 1,
+) -> Dict[int, Tuple[str, float]]:
+    """
+    Label ``batch_items``; rows missing from the answer (the call failed, or the
+    response was unparseable or truncated) are retried as two half-size batches,
+    ``splits`` times at most. Rows still missing are left out of the result.
+    """
+    try:
+        fresh = await labeler(batch_items)
+    except Exception as err:
+        print(
+            f"[Rows {batch_items[0]['row_index'] + 1}-{batch_items[-1]['row_index'] + 1}] "
+            f"Batch failed: {err}",
+            file=sys.stderr,
+        )
+        fresh = {}
+    missing = [item for item in batch_items if item["row_index"] not in fresh]
+    if missing and splits > 0:
+        half = (len(missing) + 1) // 2
+        parts = [part for part in (missing[:half], missing[half:]) if part]
+        for retried in await asyncio.gather(
+            *(label_items_with_split(labeler, part, splits - 1) for part in parts)
+        ):
+            fresh.update(retried)
+    return fresh
+
+
+async def label_row_batch(
+    labeler,
+    batch: List[Tuple[int, Dict[str, str]]],
+    cache: LabelCache | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Label one batch of ``(global_idx, row)`` pairs (0-based indices) and build their output rows
+    (the source columns plus OUTPUT_FIELDS). Empty comments are labeled neutral locally,
+    as are URL-only, emoji-only and very short ones; comments found in ``cache`` are not
+    sent again. Rows a failed batch could not label (even after splitting it) are written
+    as neutral with an empty score, so the neutral/0 filters downstream keep them.
+    """
+    batch_items: List[Dict[str, Any]] = []
+    pending_rows: List[Tuple[int, Dict[str, str]]] = []
+    row_outputs: List[Dict[str, Any]] = []
+
+    for global_idx, row in batch:
+        comment_text = row.get("comment_text", "")
+        if not comment_text or not comment_text.strip():
+            row_outputs.append(
+                {
+                    **row,
+                    "row_index": global_idx + 1,
+                    "comment_id": row.get("comment_id", _EMPTY),
+                    "like_count": normalize_like_count(row.get("like_count")),
+                    "comment_text": comment_text,
+                    "sentiment_label": _NEUTRAL,
+                    "sentiment_score": format_score(0.0),
+                }
+            )
+            continue
+
+        reason = prefilter_reason(comment_text)
+        if reason is not None:
+            PREFILTER_SKIPS[reason] += 1
+            row_outputs.append(
+                {
+                    **row,
+                    "row_index": global_idx + 1,
+                    "comment_id": row.get("comment_id", _EMPTY),
+                    "like_count": normalize_like_count(row.get("like_count")),
+                    "comment_text": comment_text,
+                    "sentiment_label": _NEUTRAL,
+                    "sentiment_score": format_score(PREFILTER_SCORE),
+                }
+            )
+            continue
+
+        batch_items.append(
+            {
+                "row_index": global_idx,
+                "comment_id": row.get("comment_id", _EMPTY),
+                "like_count": normalize_like_count(row.get("like_count")),
+                "comment_text": comment_text,
+            }
+        )
+        pending_rows.append((global_idx, row))
+
+    batch_result: Dict[int, Tuple[str, float]] = {}
+    cache_keys: List[int] = []
+    if cache is not None and batch_items:
+        keys = [comment_cache_key(item["comment_text"]) for item in batch_items]
+        hits = cache.get_many(keys)
+        misses: List[Dict[str, Any]] = []
+        for item, key in zip(batch_items, keys):
+            if key in hits:
+                batch_result[item["row_index"]] = hits[key]
+            else:
+                misses.append(item)
+                cache_keys.append(key)
+        cache.hits += len(batch_items) - len(misses)
+        batch_items = misses
+
+    if batch_items:
+        fresh = await label_items_with_split(labeler, batch_items)
+        if cache is not None and fresh:
+            cache.put_many(
+                (key, *fresh[item["row_index"]])
+                for item, key in zip(batch_items, cache_keys)
+                if item["row_index"] in fresh
+            )
+        batch_result.update(fresh)
+
+    for global_idx, row in pending_rows:
+        result = batch_result.get(global_idx)
+        row_outputs.append(
+            {
+                **row,
+                "row_index": global_idx + 1,
+                "comment_id": row.get("comment_id", _EMPTY),
+                "like_count": normalize_like_count(row.get("like_count")),
+                "comment_text": row.get("comment_text", ""),
+                "sentiment_label": result[0] if result is not None else _NEUTRAL,
+                "sentiment_score": format_score(result[1]) if result is not None else _EMPTY,
+            }
+        )
+
+    # maintain ordering by original indices
+    row_outputs.sort(key=lambda item: item["row_index"])
+    return row_outputs
+
+
+def read_csv_header(input_path: Path) -> List[str]:
+    with input_path.open("r", encoding="utf-8", newline="") as infile:
+        return next(csv.reader(infile), [])
+
+
+def open_arrow_csv(input_path: Path, header: List[str]):
+    """
+    Open a streaming pyarrow CSV reader that keeps every column as a string
+    (like csv.DictReader), parsing 8 MB blocks in C++. Quoted values may contain
+    line breaks (multi-line comments), as with the csv module.
+    """
+    return pa_csv.open_csv(
+        input_path,
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=ARROW_CSV_BLOCK_SIZE),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=False,
+        ),
+    )
+
+
+def offset_index_path(input_path: Path) -> Path:
+    return input_path.with_suffix(".offsets.npy")
+
+
+def build_offset_index(input_path: Path) -> "np.ndarray":
+    """
+    Find the byte offset where every data row starts and save it next to the CSV.
+
+    The file is mmap'ed and scanned with NumPy comparisons. A newline ends a record
+    only when an even number of quotes precedes it, so multi-line quoted comments
+    stay one row. The saved array is ``[st_mtime_ns, st_size, *offsets]``.
+    """
+    stat = input_path.stat()
+    starts = np.empty(0, dtype=np.uint64)
+    if stat.st_size:
+        with input_path.open("rb") as raw, mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            data = np.frombuffer(buf, dtype=np.uint8)
+            record_ends = []
+            quotes_before = 0
+            for start in range(0, data.size, OFFSET_SCAN_CHUNK):
+                chunk = data[start : start + OFFSET_SCAN_CHUNK]
+                newlines = np.flatnonzero(chunk == ord("\n"))
+                quotes = np.flatnonzero(chunk == ord('"'))
+                quoted = (quotes_before + np.searchsorted(quotes, newlines)) & 1
+                record_ends.append(newlines[quoted == 0] + start)
+                quotes_before += quotes.size
+            # the first record is the header; skip blank lines like the CSV readers do
+            row_starts = np.concatenate(record_ends) + 1
+            row_starts = row_starts[row_starts < data.size]
+            first_bytes = data[row_starts]
+            starts = row_starts[(first_bytes != ord("\n")) & (first_bytes != ord("\r"))]
+            starts = starts.astype(np.uint64)
+            del data, chunk  # release the buffer before the mmap closes
+    index = np.concatenate((np.array([stat.st_mtime_ns, stat.st_size], dtype=np.uint64), starts))
+    np.save(offset_index_path(input_path), index)
+    return starts
+
+
+def load_offset_index(input_path: Path, build: bool = True) -> "np.ndarray | None":
+    """Row start offsets from the saved index if it matches the CSV's mtime and size."""
+    index_path = offset_index_path(input_path)
+    if index_path.exists():
+        stat = input_path.stat()
+        index = np.load(index_path, mmap_mode="r")
+        if index.size >= 2 and int(index[0]) == stat.st_mtime_ns and int(index[1]) == stat.st_size:
+            return index[2:]
+    return build_offset_index(input_path) if build else None
+
+
+def _dict_rows(
+    reader: Iterable[List[str]],
+    header: List[str],
+    skip: int = 0,
+    limit: int | None = None,
+) -> Iterator[Dict[str, str]]:
+    width = len(header)
+    stop = None if limit is None else skip + limit
+    # filter(None, ...) drops blank lines, as csv.DictReader does
+    for values in itertools.islice(filter(None, reader), skip, stop):
+        if len(values) < width:
+            values += [""] * (width - len(values))
+        yield dict(zip(header, values))
+
+
+def iter_csv_rows(
+    input_path: Path,
+    skip: int = 0,
+    limit: int | None = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Stream data rows as dicts, skipping the first ``skip`` rows and stopping after
+    ``limit`` rows. With numpy, a row range seeks straight to its first row through
+    the offset index (built on first use). Otherwise, with pyarrow, skipped record
+    batches are never converted to Python objects; without either, csv.reader is
+    used and only the kept rows become dicts.
+    """
+    header = read_csv_header(input_path)
+    if not header:
+        return
+
+    if skip and np is not None:
+        offsets = load_offset_index(input_path)
+        if skip >= offsets.size:
+            return
+        with input_path.open("rb") as raw:
+            raw.seek(int(offsets[skip]))
+            infile = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            yield from _dict_rows(csv.reader(infile), header, limit=limit)
+        return
+
+    if pa_csv is None:
+        with input_path.open("r", encoding="utf-8", newline="") as infile:
+            reader = csv.reader(infile)
+            next(reader, None)
+            yield from _dict_rows(reader, header, skip, limit)
+        return
+
+    remaining = limit
+    for record_batch in open_arrow_csv(input_path, header):
+        if skip >= record_batch.num_rows:
+            skip -= record_batch.num_rows
+            continue
+        if skip:
+            record_batch = record_batch.slice(skip)
+            skip = 0
+        if remaining is not None:
+            record_batch = record_batch.slice(0, remaining)
+            remaining -= record_batch.num_rows
+        yield from record_batch.to_pylist()
+        if remaining == 0:
+            return
+
+
+def iter_row_batches(
+    rows: Iterable[Dict[str, str]],
+    start_idx: int,
+    batch_size: int | None = None,
+    tpm: int = DEFAULT_TPM,
+) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+    """
+    Group rows into batches of ``(global_idx, row)``; ``rows`` starts at the
+    1-based row ``start_idx``.
+
+    Without a fixed ``batch_size``, each batch is sized so its comments fill about
+    TARGET_PROMPT_TOKENS (chars / 4), using an EWMA of the comment length seen so far.
+    The target is capped at half of ``tpm`` so one prompt always fits the per-minute
+    token quota of a key.
+    """
+    target_tokens = min(TARGET_PROMPT_TOKENS, tpm // 2)
+    numbered = enumerate(rows, start=start_idx - 1)
+    ewma_chars: float | None = None
+    # The first batch has no length estimate yet: size it for comments of MAX_COMMENT_CHARS
+    size = batch_size or max(
+        MIN_BATCH_SIZE, min(DEFAULT_BATCH_SIZE, target_tokens * 4 // MAX_COMMENT_CHARS)
+    )
+    while True:
+        batch = list(itertools.islice(numbered, size))
+        if not batch:
+            return
+        yield batch
+        if batch_size:
+            continue
+        mean_chars = sum(
+            min(len(row.get("comment_text") or ""), MAX_COMMENT_CHARS) for _, row in batch
+        ) / len(batch)
+        ewma_chars = mean_chars if ewma_chars is None else (
+            BATCH_EWMA_ALPHA * mean_chars + (1 - BATCH_EWMA_ALPHA) * ewma_chars
+        )
+        size = max(
+            MIN_BATCH_SIZE,
+            min(MAX_BATCH_SIZE, target_tokens * 4 // max(int(ewma_chars), 80)),
+        )
+
+
+def count_csv_rows(input_path: Path) -> int:
+    """Count data rows with a streaming pass (no per-row dicts kept)."""
+    header = read_csv_header(input_path)
+    if not header:
+        return 0
+    if np is not None:
+        offsets = load_offset_index(input_path, build=False)
+        if offsets is not None:
+            return int(offsets.size)
+    if pa_csv is not None:
+        return sum(batch.num_rows for batch in open_arrow_csv(input_path, header))
+    with input_path.open("r", encoding="utf-8", newline="") as infile:
+        reader = csv.reader(infile)
+        next(reader, None)
+        return sum(1 for _ in reader)
+
+
+async def label_rows_async(
+    models: List[Any],
+    batches: Iterable[List[Tuple[int, Dict[str, str]]]],
+    sink,
+    total_target: int | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rpm: int = DEFAULT_RPM,
+    tpm: int = DEFAULT_TPM,
+    cache: LabelCache | None = None,
+) -> int:
+    """
+    Label ``batches`` with up to ``concurrency`` calls in flight per model (a Gemini
+    model or a LocalSentimentLabeler), skipping comments already in ``cache``.
+
+    A producer task feeds a bounded queue straight from the CSV reader. Each model
+    (one per API key) gets ``concurrency`` worker tasks paced by its own
+    RateLimiter; all workers pull from the same queue, so faster keys take more
+    batches. A single writer task re-orders finished batches and appends them to
+    ``sink``.
+
+    Returns:
+        Number of rows written.
+    """
+    workers_per_model = max(1, concurrency)
+    num_workers = workers_per_model * len(models)
+    batch_queue: asyncio.Queue = asyncio.Queue(maxsize=2 * num_workers)
+    result_queue: asyncio.Queue = asyncio.Queue()
+    limiters = [
+        RateLimiter(rpm=rpm, tpm=tpm, max_concurrency=workers_per_model) for _ in models
+    ]
+    written = 0
+
+    async def produce() -> None:
+        for batch_no, batch in enumerate(batches):
+            await batch_queue.put((batch_no, batch))
+        for _ in range(num_workers):
+            await batch_queue.put(None)
+
+    async def worker(labeler) -> None:
+        while True:
+            item = await batch_queue.get()
+            if item is None:
+                await result_queue.put(None)
+                return
+            batch_no, batch = item
+            row_outputs = await label_row_batch(labeler, batch, cache)
+            await result_queue.put((batch_no, row_outputs, len(batch)))
+
+    async def write_in_order() -> None:
+        nonlocal written
+        finished: Dict[int, Tuple[List[Dict[str, Any]], int]] = {}
+        next_batch = 0
+        workers_done = 0
+        while workers_done < num_workers:
+            item = await result_queue.get()
+            if item is None:
+                workers_done += 1
+                continue
+            batch_no, row_outputs, size = item
+            finished[batch_no] = (row_outputs, size)
+            while next_batch in finished:
+                row_outputs, size = finished.pop(next_batch)
+                sink.write(row_outputs)
+                written += size
+                next_batch += 1
+                print(f"Labeled {written}/{total_target or '?'} target rows...")
+
+    await asyncio.gather(
+        produce(),
+        write_in_order(),
+        *(
+            worker(make_labeler(model, limiter))
+            for model, limiter in zip(models, limiters)
+            for _ in range(workers_per_model)
+        ),
+    )
+    return written
+
+
 def process_csv(
     model, 
     input_path: Path, 
     output_path: Path | None = None,
     start_idx: int | None = None,
     end_idx: int | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rpm: int = DEFAULT_RPM,
+    tpm: int = DEFAULT_TPM,
+    output_format: str = "csv",
+    cache_path: Path | None = None,
 ) -> None:
-    with input_path.open("r", encoding="utf-8", newline="") as infile:
-        reader = csv.DictReader(infile)
-        if not reader.fieldnames:
-            print("CSV file has no header row.", file=sys.stderr)
+    # Only the interactive prompt and the default end index need the row count;
+    # an explicit range is streamed without a counting pass.
+    total_rows: int | None = None
+    if end_idx is None:
+        total_rows = count_csv_rows(input_path)
+        if total_rows == 0:
+            print("CSV file has no data rows.", file=sys.stderr)
             sys.exit(1)
 
-        rows = list(reader)
-
-    total_rows = len(rows)
-    if total_rows == 0:
-        print("CSV file has no data rows.", file=sys.stderr)
-        sys.exit(1)
-
     # If start_idx/end_idx not provided, use interactive mode
     # Check if we're in interactive mode (both None) or CLI mode with partial info
     if start_idx is None and end_idx is None:
@@ -249,112 +1260,70 @@ def process_csv(
             start_idx = 1
         if end_idx is None:
             end_idx = total_rows
-        if start_idx < 1 or end_idx < start_idx or end_idx > total_rows:
-            print(f"Invalid range. Ensure 1 ≤ start_idx ≤ end_idx ≤ {total_rows}.", file=sys.stderr)
+        if start_idx < 1 or end_idx < start_idx or (total_rows is not None and end_idx > total_rows):
+            print(
+                f"Invalid range. Ensure 1 ≤ start_idx ≤ end_idx ≤ {total_rows or 'total rows'}.",
+                file=sys.stderr,
+            )
             sys.exit(1)
     
-    target_indices = list(range(start_idx - 1, end_idx))
-    
     # Set output path
     if output_path is None:
         if start_idx is not None and end_idx is not None:
             # CLI mode - auto-generate output path
             output_path = input_path.with_name(
-                f"{input_path.stem}_l{start_idx}_r{end_idx}_labeled.csv"
+                f"{input_path.stem}_l{start_idx}_r{end_idx}_labeled.{output_format}"
             )
         else:
             # Interactive mode - ask user
             default_output = input_path.with_name(
-                f"{input_path.stem}_l{start_idx}_r{end_idx}_labeled.csv"
+                f"{input_path.stem}_l{start_idx}_r{end_idx}_labeled.{output_format}"
             )
             output_path = ask_output_path(default_output)
 
+    total_target = end_idx - start_idx + 1
     print(
-        f"Loaded {total_rows} rows from {input_path}. "
-        f"Labeling rows {start_idx}-{end_idx}. "
-        f"Batch size: {DEFAULT_BATCH_SIZE}, model limit: {MODEL_MAX_INPUT_TOKENS} tokens."
+        f"Streaming rows {start_idx}-{end_idx} from {input_path}. "
+        f"Batch size: auto ({MIN_BATCH_SIZE}-{MAX_BATCH_SIZE}), concurrency: {concurrency}, "
+        f"model limit: {MODEL_MAX_INPUT_TOKENS} tokens."
     )
 
-    output_fields = (
-        "row_index",
-        "comment_id",
-        "like_count",
-        "comment_text",
-        "sentiment_label",
-        "sentiment_score",
-    )
+    if not read_csv_header(input_path):
+        print("CSV file has no header row.", file=sys.stderr)
+        sys.exit(1)
 
-    with output_path.open("w", encoding="utf-8", newline="") as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=output_fields)
-        writer.writeheader()
-
-        total_target = len(target_indices)
-        for offset in range(0, total_target, DEFAULT_BATCH_SIZE):
-            batch_indices = target_indices[offset : offset + DEFAULT_BATCH_SIZE]
-            batch_items: List[Dict[str, Any]] = []
-            pending_indices: List[int] = []
-            row_outputs: List[Dict[str, Any]] = []
-
-            for global_idx in batch_indices:
-                row = rows[global_idx]
-                comment_text = row.get("comment_text", "")
-                if not comment_text or not comment_text.strip():
-                    row_outputs.append(
-                        {
-                            "row_index": global_idx + 1,
-                            "comment_id": row.get("comment_id", ""),
-                            "like_count": normalize_like_count(row.get("like_count")),
-                            "comment_text": comment_text,
-                            "sentiment_label": "neutral",
-                            "sentiment_score": f"{0.0:.4f}",
-                        }
-                    )
-                    continue
-
-                batch_items.append(
-                    {
-                        "row_index": global_idx,
-                        "comment_id": row.get("comment_id", ""),
-                        "like_count": normalize_like_count(row.get("like_count")),
-                        "comment_text": comment_text,
-                    }
-                )
-                pending_indices.append(global_idx)
-
-            if batch_items:
-                try:
-                    batch_result = label_batch(model, batch_items)
-                except Exception as err:
-                    print(
-                        f"[Rows {batch_indices[0] + 1}-{batch_indices[-1] + 1}] "
-                        f"Batch failed: {err}",
-                        file=sys.stderr,
-                    )
-                    batch_result = {}
-
-                for global_idx in pending_indices:
-                    row = rows[global_idx]
-                    label, score = batch_result.get(global_idx, ("neutral", 0.0))
-                    row_outputs.append(
-                        {
-                            "row_index": global_idx + 1,
-                            "comment_id": row.get("comment_id", ""),
-                            "like_count": normalize_like_count(row.get("like_count")),
-                            "comment_text": row.get("comment_text", ""),
-                            "sentiment_label": label,
-                            "sentiment_score": f"{score:.4f}",
-                        }
-                    )
-
-            if row_outputs:
-                # maintain ordering by original indices
-                row_outputs.sort(key=lambda item: item["row_index"])
-                writer.writerows(row_outputs)
-                outfile.flush()
-
-            processed = offset + len(batch_indices)
-            print(f"Labeled {processed}/{total_target} target rows...")
+    rows = iter_csv_rows(input_path, skip=start_idx - 1, limit=total_target)
+    cache = LabelCache(cache_path, model_version(model)) if cache_path is not None else None
+    sink = open_output_sink(output_path, output_format)
+    try:
+        written = asyncio.run(
+            label_rows_async(
+                [model],
+                iter_row_batches(rows, start_idx, tpm=tpm),
+                sink,
+                total_target,
+                concurrency,
+                rpm,
+                tpm,
+                cache,
+            )
+        )
+    finally:
+        sink.close()
+        if cache is not None:
+            cache.close()
 
+    if written < total_target:
+        print(
+            f"Warning: input ended after row {start_idx + written - 1}; "
+            f"labeled {written} of {total_target} requested rows.",
+            file=sys.stderr,
+        )
+    if PREFILTER_SKIPS:
+        skipped = ", ".join(f"{reason}={count}" for reason, count in PREFILTER_SKIPS.most_common())
+        print(f"Labeled locally without Gemini: {skipped}")
+    if cache is not None:
+        print(f"Label cache hits: {cache.hits} ({cache_path})")
     print(f"Saved labeled data to {output_path}")
 
 
@@ -374,10 +1343,39 @@ def main() -> None:
         type=str,
         help="Gemini API key",
     )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="gemini",
+        help="gemini (default) or local-int8 (quantized ONNX model on CPU, no API key needed)",
+    )
+    parser.add_argument(
+        "--local-model",
+        type=str,
+        default=LOCAL_MODEL_NAME,
+        help=f"Hugging Face model for the local-int8 backend (default: {LOCAL_MODEL_NAME})",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        default=str(LABEL_CACHE_PATH),
+        help="SQLite cache of labels for already-seen comment texts (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the label cache",
+    )
     parser.add_argument(
         "--output-path",
         type=str,
-        help="Path to save labeled output CSV (default: auto-generated)",
+        help="Path to save labeled output (default: auto-generated)",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="Labeled output format: csv (default) or parquet (zstd, much smaller)",
     )
     parser.add_argument(
         "--start-idx",
@@ -389,15 +1387,39 @@ def main() -> None:
         type=int,
         help="End index (1-based, inclusive). Defaults to last row if not specified.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Max batches sent to Gemini concurrently (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=DEFAULT_RPM,
+        help=f"Requests-per-minute quota of the API key (default: {DEFAULT_RPM})",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=DEFAULT_TPM,
+        help=f"Input-tokens-per-minute quota of the API key (default: {DEFAULT_TPM})",
+    )
     
     args = parser.parse_args()
+    cache_path = None if args.no_cache else Path(args.cache_path).expanduser().resolve()
     
     # Interactive mode if no arguments provided
     if args.csv_path is None:
         csv_path = ask_csv_path()
-        api_key = ask_api_key()
-        model = configure_model(api_key)
-        process_csv(model, csv_path)
+        if args.backend == "local-int8":
+            model = LocalSentimentLabeler(args.local_model)
+        else:
+            model = configure_model(ask_api_key())
+        process_csv(
+            model, csv_path, concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm,
+            output_format=args.output_format, cache_path=cache_path,
+        )
     else:
         # CLI mode
         csv_path = Path(args.csv_path).expanduser().resolve()
@@ -405,12 +1427,13 @@ def main() -> None:
             print(f"File not found: {csv_path}", file=sys.stderr)
             sys.exit(1)
         
-        if args.api_key is None:
+        if args.backend == "local-int8":
+            model = LocalSentimentLabeler(args.local_model)
+        elif args.api_key is None:
             print("--api-key is required when using --csv-path", file=sys.stderr)
             sys.exit(1)
-        
-        api_key = args.api_key.strip()
-        model = configure_model(api_key)
+        else:
+            model = configure_model(args.api_key.strip())
         
         output_path = None
         if args.output_path:
@@ -421,7 +1444,10 @@ def main() -> None:
         start_idx = args.start_idx if args.start_idx is not None else 1
         end_idx = args.end_idx  # Keep None if not specified
         
-        process_csv(model, csv_path, output_path, start_idx, end_idx)
+        process_csv(
+            model, csv_path, output_path, start_idx, end_idx,
+            args.concurrency, args.rpm, args.tpm, args.output_format, cache_path,
+        )
 
 
 if __name__ == "__main__":
@@ -4,9 +4,14 @@ Orchestrator script to label large CSV files in parallel using multiple API keys
 
 This script:
 1. Reads a CSV file and a text file containing API keys (one per line)
-2. Divides the CSV into n smaller files (one per API key)
-3. Labels each file in parallel using the corresponding API key
-4. Automatically merges all labeled files back into the main CSV
+2. Streams the CSV once, sharing its batches between all API keys
+   (one asyncio worker group per key, all in this process)
+3. Writes the labeled rows (all original columns + sentiment_label/score)
+   straight into the output CSV, in the original row order
+
+Rows labeled neutral with score 0 (empty comments) are dropped from the output,
+as the former merge step did. Rows a failed batch could not label keep an empty
+score and are written out.
 
 Usage:
     python youtube_crawler/label_comments_orchestrator.py \
@@ -18,13 +23,30 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
-import subprocess
+import operator
 import sys
-import time
-from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List
+
+from label_comments import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RPM,
+    DEFAULT_TPM,
+    LABEL_CACHE_PATH,
+    PREFILTER_SKIPS,
+    BackgroundSink,
+    LabelCache,
+    create_keyed_model,
+    iter_csv_rows,
+    iter_row_batches,
+    label_rows_async,
+    model_version,
+    read_csv_header,
+)
+
+LABEL_COLUMNS = ("sentiment_label", "sentiment_score")
 
 
 def read_api_keys(api_keys_file: Path) -> List[str]:
@@ -35,213 +57,103 @@ def read_api_keys(api_keys_file: Path) -> List[str]:
             key = line.strip()
             if key:  # Skip empty lines
                 api_keys.append(key)
-    
+
     if not api_keys:
         print(f"No API keys found in {api_keys_file}", file=sys.stderr)
         sys.exit(1)
-    
+
     return api_keys
 
 
-def split_csv(
-    input_csv: Path,
-    num_parts: int,
-    output_dir: Path | None = None,
-) -> List[Path]:
-    """
-    Split CSV file into n parts evenly. Each part includes header.
-    
-    Returns list of paths to split CSV files.
-    """
-    if output_dir is None:
-        output_dir = input_csv.parent
-    
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Read all rows
-    with input_csv.open("r", encoding="utf-8", newline="") as infile:
-        reader = csv.DictReader(infile)
-        fieldnames = reader.fieldnames
-        if not fieldnames:
-            print("CSV file has no header row.", file=sys.stderr)
-            sys.exit(1)
-        
-        rows = list(reader)
-    
-    total_rows = len(rows)
-    if total_rows == 0:
-        print("CSV file has no data rows.", file=sys.stderr)
-        sys.exit(1)
-    
-    if num_parts < 1:
-        print(f"Invalid number of parts: {num_parts}", file=sys.stderr)
-        sys.exit(1)
-    
-    if num_parts > total_rows:
-        num_parts = total_rows
-        print(f"Warning: More parts than rows. Using {num_parts} parts instead.")
-    
-    # Calculate rows per part
-    rows_per_part = total_rows // num_parts
-    remainder = total_rows % num_parts
-    
-    split_files: List[Path] = []
-    stem = input_csv.stem
-    
-    start_idx = 0
-    for part_idx in range(num_parts):
-        # Last part gets remainder
-        part_size = rows_per_part + (1 if part_idx < remainder else 0)
-        end_idx = start_idx + part_size
-        
-        if part_size == 0:
-            break
-        
-        part_rows = rows[start_idx:end_idx]
-        
-        # Create output filename: <stem>_part<idx+1>.csv
-        part_filename = f"{stem}_part{part_idx + 1}.csv"
-        part_path = output_dir / part_filename
-        
-        # Write part CSV with header
-        with part_path.open("w", encoding="utf-8", newline="") as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(part_rows)
-        
-        split_files.append(part_path)
-        print(f"Created part {part_idx + 1}/{num_parts}: {part_path.name} ({part_size} rows)")
-        
-        start_idx = end_idx
-    
-    return split_files
-
-
-def label_csv_part(
-    csv_path: str,
-    api_key: str,
-    output_path: str,
-) -> Tuple[str, bool, str]:
+class MergedCsvSink:
     """
-    Label a single CSV part using label_comments.py.
-    
-    Returns (csv_path, success, error_message).
+    Write labeled rows with every source column, skipping neutral rows with score 0.
     """
-    script_path = Path(__file__).parent / "label_comments.py"
-    
-    cmd = [
-        sys.executable,
-        str(script_path),
-        "--csv-path", csv_path,
-        "--api-key", api_key,
-        "--output-path", output_path,
-    ]
-    
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=None,  # No timeout for now
-        )
-        
-        if result.returncode == 0:
-            return (csv_path, True, "")
-        else:
-            error_msg = result.stderr or result.stdout or "Unknown error"
-            return (csv_path, False, error_msg)
-    
-    except Exception as e:
-        return (csv_path, False, str(e))
-
-
-def label_all_parts_parallel(
-    split_files: List[Path],
+
+    def __init__(self, output_csv: Path, header: List[str]) -> None:
+        fieldnames = list(header) + [c for c in LABEL_COLUMNS if c not in header]
+        self._row_values = operator.itemgetter(*fieldnames)
+        self._file = output_csv.open("w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(fieldnames)
+        self.kept = 0
+        self.removed = 0
+
+    def write(self, row_outputs: List[Dict[str, Any]]) -> None:
+        kept_rows = [
+            row for row in row_outputs
+            # Unlabeled rows (failed batches) have an empty score and are kept
+            if not (
+                row["sentiment_label"] == "neutral"
+                and row["sentiment_score"]
+                and float(row["sentiment_score"]) == 0.0
+            )
+        ]
+        self._writer.writerows(map(self._row_values, kept_rows))
+        self.kept += len(kept_rows)
+        self.removed += len(row_outputs) - len(kept_rows)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def label_csv_with_keys(
+    csv_path: Path,
     api_keys: List[str],
-    max_workers: int | None = None,
-) -> Tuple[List[Path], List[str]]:
+    output_csv: Path,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rpm: int = DEFAULT_RPM,
+    tpm: int = DEFAULT_TPM,
+    cache_path: Path | None = LABEL_CACHE_PATH,
+) -> MergedCsvSink:
     """
-    Label all split CSV files in parallel.
-    
-    Returns (successful_outputs, failed_inputs).
+    Label the whole CSV with all API keys concurrently and write the merged output.
+
+    Returns the sink, whose ``kept``/``removed`` counters summarize the run.
     """
-    if len(split_files) != len(api_keys):
-        print(
-            f"Error: Number of split files ({len(split_files)}) "
-            f"must match number of API keys ({len(api_keys)})",
-            file=sys.stderr,
-        )
+    header = read_csv_header(csv_path)
+    if not header:
+        print("CSV file has no header row.", file=sys.stderr)
         sys.exit(1)
-    
-    # Prepare output paths: <input_stem>_part<idx>_labeled.csv
-    output_paths = []
-    for split_file in split_files:
-        output_stem = split_file.stem  # Already includes _part<idx>
-        output_path = split_file.parent / f"{output_stem}_labeled.csv"
-        output_paths.append(output_path)
-    
-    print(f"\nStarting parallel labeling of {len(split_files)} files...")
+
+    # Single pass over the input: no row count up front, no temp parts, no merge re-read
+    models = [create_keyed_model(key) for key in api_keys]
+    print(
+        f"\nLabeling {csv_path.name} with {len(models)} API keys "
+        f"(up to {concurrency} in-flight batches per key)..."
+    )
     print("=" * 60)
-    
-    successful_outputs: List[Path] = []
-    failed_inputs: List[str] = []
-    
-    # Use ProcessPoolExecutor for true parallelism
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_info = {
-            executor.submit(
-                label_csv_part,
-                str(split_file),
-                api_key,
-                str(output_path),
-            ): (split_file, output_path, api_idx)
-            for (split_file, output_path, api_idx) in zip(split_files, output_paths, range(len(api_keys)))
-        }
-        
-        # Process completed tasks
-        for future in as_completed(future_to_info):
-            split_file, output_path, api_idx = future_to_info[future]
-            
-            try:
-                csv_path, success, error_msg = future.result()
-                
-                if success:
-                    print(f"✓ Completed: {split_file.name} → {output_path.name}")
-                    successful_outputs.append(output_path)
-                else:
-                    print(
-                        f"✗ Failed: {split_file.name} - {error_msg[:100]}",
-                        file=sys.stderr,
-                    )
-                    failed_inputs.append(str(split_file))
-            
-            except Exception as e:
-                print(
-                    f"✗ Exception processing {split_file.name}: {e}",
-                    file=sys.stderr,
-                )
-                failed_inputs.append(str(split_file))
-    
+
+    cache = LabelCache(cache_path, model_version(models[0])) if cache_path is not None else None
+    merged = MergedCsvSink(output_csv, header)
+    sink = BackgroundSink(merged)
+    try:
+        labeled = asyncio.run(
+            label_rows_async(
+                models,
+                iter_row_batches(iter_csv_rows(csv_path), start_idx=1, tpm=tpm),
+                sink,
+                None,
+                concurrency,
+                rpm,
+                tpm,
+                cache,
+            )
+        )
+    finally:
+        sink.close()
+        if cache is not None:
+            print(f"Label cache hits: {cache.hits} ({cache_path})")
+            cache.close()
+
     print("=" * 60)
-    print(f"\nCompleted: {len(successful_outputs)}/{len(split_files)} files labeled successfully")
-    
-    if failed_inputs:
-        print(f"Failed files: {len(failed_inputs)}", file=sys.stderr)
-        for failed in failed_inputs:
-            print(f"  - {failed}", file=sys.stderr)
-    
-    return successful_outputs, failed_inputs
-
-
-def cleanup_temp_files(split_files: List[Path]) -> None:
-    """Remove temporary split CSV files."""
-    for split_file in split_files:
-        try:
-            split_file.unlink()
-            print(f"Removed temporary file: {split_file.name}")
-        except Exception as e:
-            print(f"Warning: Could not remove {split_file.name}: {e}", file=sys.stderr)
+    if labeled == 0:
+        print("CSV file has no data rows.", file=sys.stderr)
+        sys.exit(1)
+    return merged
 
 
 def main() -> None:
@@ -267,87 +179,66 @@ def main() -> None:
         help="Path to save the final merged labeled CSV",
     )
     parser.add_argument(
-        "--keep-temp",
-        action="store_true",
-        help="Keep temporary split files after completion",
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Max in-flight batches per API key (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=DEFAULT_RPM,
+        help=f"Requests-per-minute quota of each API key (default: {DEFAULT_RPM})",
     )
     parser.add_argument(
-        "--max-workers",
+        "--tpm",
         type=int,
-        default=None,
-        help="Maximum number of parallel workers (default: number of API keys)",
+        default=DEFAULT_TPM,
+        help=f"Input-tokens-per-minute quota of each API key (default: {DEFAULT_TPM})",
     )
-    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Do not read or write the label cache ({LABEL_CACHE_PATH})",
+    )
+
     args = parser.parse_args()
-    
+
     # Resolve paths
     csv_path = Path(args.csv_path).expanduser().resolve()
     api_keys_file = Path(args.api_keys_file).expanduser().resolve()
     output_csv = Path(args.output_csv).expanduser().resolve()
-    
+
     # Validate inputs
     if not csv_path.exists():
         print(f"Error: CSV file not found: {csv_path}", file=sys.stderr)
         sys.exit(1)
-    
+
     if not api_keys_file.exists():
         print(f"Error: API keys file not found: {api_keys_file}", file=sys.stderr)
         sys.exit(1)
-    
+
     # Read API keys
     print(f"Reading API keys from: {api_keys_file}")
     api_keys = read_api_keys(api_keys_file)
     print(f"Found {len(api_keys)} API keys")
-    
-    # Split CSV
-    print(f"\nSplitting CSV file: {csv_path}")
-    split_files = split_csv(csv_path, len(api_keys))
-    
-    # Label all parts in parallel
-    successful_outputs, failed_inputs = label_all_parts_parallel(
-        split_files,
+
+    sink = label_csv_with_keys(
+        csv_path,
         api_keys,
-        max_workers=args.max_workers,
+        output_csv,
+        concurrency=args.concurrency,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        cache_path=None if args.no_cache else LABEL_CACHE_PATH,
     )
-    
-    if not successful_outputs:
-        print("Error: No files were labeled successfully.", file=sys.stderr)
-        sys.exit(1)
-    
-    # Clean up temporary split files
-    if not args.keep_temp:
-        print("\nCleaning up temporary files...")
-        cleanup_temp_files(split_files)
-    
-    # Merge labeled files
-    print(f"\nMerging labeled files into: {output_csv}")
-    
-    # Build glob pattern for labeled files
-    stem = csv_path.stem
-    parent_dir = csv_path.parent
-    labeled_pattern = str(parent_dir / f"{stem}_part*_labeled.csv")
-    
-    # Call merge script
-    merge_script = Path(__file__).parent / "merge_labeled_comments.py"
-    merge_cmd = [
-        sys.executable,
-        str(merge_script),
-        "--main-csv", str(csv_path),
-        "--labeled-pattern", labeled_pattern,
-        "--output-csv", str(output_csv),
-    ]
-    
-    print(f"Running: {' '.join(merge_cmd)}")
-    merge_result = subprocess.run(merge_cmd, capture_output=True, text=True)
-    
-    if merge_result.returncode == 0:
-        print(merge_result.stdout)
-        print(f"\n✓ Successfully merged labeled data to: {output_csv}")
-    else:
-        print("Error merging labeled files:", file=sys.stderr)
-        print(merge_result.stderr, file=sys.stderr)
-        print(merge_result.stdout, file=sys.stderr)
-        sys.exit(1)
+
+    if PREFILTER_SKIPS:
+        skipped = ", ".join(f"{reason}={count}" for reason, count in PREFILTER_SKIPS.most_common())
+        print(f"Labeled locally without Gemini: {skipped}")
+    print(f"Removed {sink.removed} rows (neutral with score 0)")
+    print(f"Final rows: {sink.kept}")
+    print(f"\n✓ Successfully saved labeled data to: {output_csv}")
 
 
 if __name__ == "__main__":
@@ -356,4 +247,3 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\nInterrupted by user.", file=sys.stderr)
         sys.exit(1)
-
@@ -3,38 +3,269 @@ YouTube Comment Crawler - Main Application
 Tổng hợp tất cả chức năng crawl, làm sạch và phân tích comments
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import argparse
+import functools
+import importlib.util
+from collections import Counter
 from datetime import datetime
-from typing import Optional
-from youtube_crawler import YouTubeCommentCrawler
-from data_cleaner import CommentDataCleaner
+from itertools import islice
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from crawler_config import DEFAULT_CONCURRENCY, DEFAULT_REQUESTS_PER_SECOND
 from logger_config import get_main_logger
-import pandas as pd
+
+# youtube_crawler, data_cleaner, pandas và numpy được import trong các hàm dùng đến chúng,
+# để `main.py --help` và các lỗi tham số không phải chờ nạp các thư viện nặng
 
 # Setup logging
 logger = get_main_logger()
 
+# Dưới ngưỡng này làm sạch trong process hiện tại (chi phí khởi tạo process pool lớn hơn lợi ích)
+PARALLEL_CLEAN_MIN_ROWS = 5000
+
+# Chuỗi lưu bằng PyArrow (không tạo object str Python cho từng ô) nếu có pyarrow
+_STRING_DTYPE = 'string[pyarrow]' if importlib.util.find_spec('pyarrow') else 'string'
+
+# Kiểu dữ liệu cố định của các cột comment do YouTubeCommentCrawler._process_comment tạo ra;
+# published_at/crawled_at giữ dạng chuỗi ISO để CSV kết quả không đổi định dạng
+COMMENT_SCHEMA = {
+    'comment_id': _STRING_DTYPE,
+    'post_id': _STRING_DTYPE,
+    'platform': _STRING_DTYPE,
+    'author_name': _STRING_DTYPE,
+    'author_id': _STRING_DTYPE,
+    'comment_text': _STRING_DTYPE,
+    'published_at': _STRING_DTYPE,
+    'like_count': 'int32',
+    'reply_count': 'int32',
+    'sentiment_label': _STRING_DTYPE,
+    'sentiment_score': 'float32',
+    'crawled_at': _STRING_DTYPE,
+    'is_reply': 'bool',
+    'parent_comment_id': _STRING_DTYPE,
+}
+
+_partition_cleaner = None
+
+
+def _comments_frame(comments: List[dict]) -> pd.DataFrame:
+    """
+    Tạo DataFrame từ list comments với kiểu cột lấy từ COMMENT_SCHEMA thay vì để pandas tự suy ra;
+    thứ tự cột theo comment đầu tiên, cột ngoài schema (ví dụ source_* từ CSV) giữ kiểu mặc định
+    """
+    import pandas as pd
+    
+    if not comments:
+        return pd.DataFrame()
+    columns = list(comments[0])
+    dtypes = {col: COMMENT_SCHEMA[col] for col in columns if col in COMMENT_SCHEMA}
+    return pd.DataFrame.from_records(comments, columns=columns).astype(dtypes, copy=False)
+
+
+def _cleaning_summary(cleaned_df: pd.DataFrame) -> dict:
+    """
+    Thống kê cần hiển thị sau khi làm sạch (một lượt qua các cột is_valid/language/text_length)
+    """
+    return {
+        'total_comments': len(cleaned_df),
+        'valid_comments': int((cleaned_df['is_valid'] == True).sum()),
+        'language_distribution': cleaned_df['language'].value_counts().to_dict(),
+        'avg_text_length': float(cleaned_df['text_length'].mean()) if len(cleaned_df) else 0.0,
+    }
+
+
+def _configure_stdout():
+    """
+    Ghi stdout bằng UTF-8 và thay ký tự lỗi thay vì raise UnicodeEncodeError
+    (ví dụ tiếng Việt khi stdout của Windows là cp1252); gọi một lần khi khởi động CLI
+    """
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+
+def _emit(lines: List[str]):
+    """
+    In một khối báo cáo bằng một lần ghi stdout
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+
+def _sample_lines(comments, limit: int = 3) -> List[str]:
+    """
+    Dòng hiển thị cho tối đa `limit` comments mẫu đầu tiên (không tạo list con)
+    """
+    lines = []
+    for i, comment in enumerate(islice(comments, limit), 1):
+        text = comment['comment_text'][:80].replace('\n', ' ')
+        lines.append(f"   {i}. {comment['author_name']} ({comment['like_count']} likes): {text}...")
+    return lines
+
+
+def _clean_partition(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Làm sạch một phần DataFrame trong worker process (mỗi process dùng một cleaner riêng)
+    """
+    global _partition_cleaner
+    if _partition_cleaner is None:
+        from data_cleaner import CommentDataCleaner
+        _partition_cleaner = CommentDataCleaner()
+    return _partition_cleaner.clean_dataframe(df)
+
+
+class CommentStreamSink:
+    """
+    Nhận comments của từng video từ crawler: ghi nối tiếp raw/cleaned CSV và
+    cộng dồn thống kê, chỉ giữ tối đa clean_min_rows comments chờ làm sạch trong bộ nhớ
+    """
+    
+    def __init__(self, clean: Optional[Callable[[List[dict]], Tuple[pd.DataFrame, dict]]] = None,
+                 raw_file: Optional[str] = None, cleaned_file: Optional[str] = None,
+                 num_samples: int = 3, clean_min_rows: int = PARALLEL_CLEAN_MIN_ROWS):
+        """
+        Args:
+            clean (Callable): Làm sạch một lô comments, trả về (cleaned_df, stats) như
+                YouTubeCommentAnalyzer.clean_comments (None = không làm sạch)
+            clean_min_rows (int): Gom comments đến số dòng này rồi mới làm sạch một lần, để
+                clean_comments đủ ngưỡng làm sạch song song (phần còn lại làm sạch khi close)
+            raw_file (str): File CSV cho raw comments (None = không lưu)
+            cleaned_file (str): File CSV cho comments đã làm sạch (None = không lưu)
+            num_samples (int): Số comments mẫu giữ lại để hiển thị
+        """
+        from youtube_crawler import CommentCsvWriter
+        
+        self.clean = clean
+        self.clean_min_rows = clean_min_rows
+        self._pending: List[dict] = []
+        self.raw_writer = CommentCsvWriter(raw_file) if raw_file else None
+        self.cleaned_file = cleaned_file
+        self._cleaned_columns = None
+        self._cleaned_engine = None
+        self.num_samples = num_samples
+        self.samples: List[dict] = []
+        
+        self.total_comments = 0
+        self.max_likes = 0
+        self.sum_likes = 0
+        
+        self.cleaned_comments = 0
+        self.valid_comments = 0
+        self.text_length_sum = 0.0
+        self.language_distribution = Counter()
+    
+    def __call__(self, comments: List[dict]):
+        import numpy as np
+        
+        n = len(comments)
+        if not n:
+            return
+        
+        likes = np.fromiter((c['like_count'] for c in comments), dtype=np.int32, count=n)
+        self.max_likes = max(self.max_likes, int(likes.max()))
+        self.sum_likes += int(likes.sum())
+        self.total_comments += n
+        if len(self.samples) < self.num_samples:
+            self.samples.extend(islice(comments, self.num_samples - len(self.samples)))
+        
+        if self.raw_writer is not None:
+            self.raw_writer.write(comments)
+        
+        if self.clean is not None:
+            self._pending.extend(comments)
+            if len(self._pending) >= self.clean_min_rows:
+                self._flush_pending()
+    
+    def _flush_pending(self):
+        if self._pending:
+            pending, self._pending = self._pending, []
+            self._clean_batch(pending)
+    
+    def _clean_batch(self, comments: List[dict]):
+        from youtube_crawler import write_csv
+        
+        cleaned_df, stats = self.clean(comments)
+        self.cleaned_comments += stats['total_comments']
+        self.valid_comments += stats['valid_comments']
+        self.text_length_sum += stats['avg_text_length'] * stats['total_comments']
+        self.language_distribution.update(stats['language_distribution'])
+        
+        if self.cleaned_file:
+            # Giữ nguyên thứ tự cột của lô đầu tiên cho các lô sau
+            # và cùng writer (PyArrow/pandas) đã chọn khi tạo file
+            if self._cleaned_columns is None:
+                self._cleaned_columns = list(cleaned_df.columns)
+                self._cleaned_engine = write_csv(cleaned_df, self.cleaned_file)
+            else:
+                write_csv(cleaned_df.reindex(columns=self._cleaned_columns),
+                          self.cleaned_file, append=True, engine=self._cleaned_engine)
+    
+    @property
+    def avg_likes(self) -> float:
+        return self.sum_likes / self.total_comments if self.total_comments else 0.0
+    
+    def cleaning_stats(self) -> dict:
+        return {
+            'total_comments': self.cleaned_comments,
+            'valid_comments': self.valid_comments,
+            'language_distribution': dict(self.language_distribution),
+            'avg_text_length': self.text_length_sum / self.cleaned_comments if self.cleaned_comments else 0.0,
+        }
+    
+    def saved_files(self) -> List[str]:
+        files = []
+        if self.raw_writer is not None and self.raw_writer.rows:
+            files.append(self.raw_writer.filename)
+        if self._cleaned_columns is not None:
+            files.append(self.cleaned_file)
+        return files
+    
+    def close(self):
+        try:
+            self._flush_pending()
+        finally:
+            if self.raw_writer is not None:
+                self.raw_writer.close()
+
+
 class YouTubeCommentAnalyzer:
     """
     Class chính để phân tích comments YouTube
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache_dir: Optional[str] = None):
         """
         Khởi tạo analyzer
         
         Args:
             api_key (str): YouTube Data API v3 key
+            cache_dir (Optional[str]): Thư mục cache comments đã crawl; chạy lại cùng video
+                không tốn quota và crawl dở do hết quota được tiếp tục (None = không cache)
         """
-        self.crawler = YouTubeCommentCrawler(api_key)
+        from youtube_crawler import YouTubeCommentCrawler
+        from data_cleaner import CommentDataCleaner
+        
+        self.crawler = YouTubeCommentCrawler(api_key, cache_dir=cache_dir)
         self.cleaner = CommentDataCleaner()
         self.api_key = api_key
+        self._reset_output_paths()
+    
+    def _reset_output_paths(self):
+        """
+        Tính timestamp và tên file kết quả một lần; gọi lại sau mỗi lần lưu để
+        lần phân tích tiếp theo (chế độ tương tác) không ghi đè file cũ
+        """
+        self._ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._raw_path = Path(f"raw_comments_{self._ts}.csv")
+        self._cleaned_path = Path(f"cleaned_comments_{self._ts}.csv")
         
     def crawl_comments(self, video_url: str, max_comments: int = 100, 
                       order: str = 'time', min_likes: int = 0,
-                      min_words: Optional[int] = None, max_words: Optional[int] = None) -> dict:
+                      min_words: Optional[int] = None, max_words: Optional[int] = None,
+                      stream: bool = False) -> dict:
         """
         Crawl comments từ video YouTube
         
@@ -45,12 +276,20 @@ class YouTubeCommentAnalyzer:
             min_likes (int): Số lượt like tối thiểu (chỉ áp dụng khi order='top')
             min_words (Optional[int]): Số từ tối thiểu (None = không giới hạn)
             max_words (Optional[int]): Số từ tối đa (None = không giới hạn)
+            stream (bool): Trả về 'pages' (generator các lô comments theo trang API) thay cho
+                'comments'; top comments (min_likes > 0) cần sắp xếp toàn bộ nên chỉ có một lô
             
         Returns:
             dict: Kết quả crawl
         """
         logger.info(f"Starting comment crawl for: {video_url}")
         
+        if stream and min_likes <= 0:
+            result = self.crawler.crawl_video_pages(video_url, max_comments, order, min_words, max_words)
+            if not result['success']:
+                logger.error(f"Crawl failed: {result['error']}")
+            return result
+        
         if min_likes > 0:
             # Lấy top comments có like cao
             result = self.crawler.get_top_comments(video_url, max_comments, min_likes, min_words, max_words)
@@ -60,6 +299,8 @@ class YouTubeCommentAnalyzer:
         
         if result['success']:
             logger.info(f"Successfully crawled {result['total_comments']} comments")
+            if stream:
+                result['pages'] = iter([result.pop('comments')])
         else:
             logger.error(f"Crawl failed: {result['error']}")
             
@@ -69,7 +310,10 @@ class YouTubeCommentAnalyzer:
                       max_comments: int = 100, order: str = 'time',
                       delay: float = 0.2, limit: int = None,
                       deduplicate_urls: bool = True, min_likes: int = 0,
-                      min_words: Optional[int] = None, max_words: Optional[int] = None) -> dict:
+                      min_words: Optional[int] = None, max_words: Optional[int] = None,
+                      concurrency: int = DEFAULT_CONCURRENCY,
+                      requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                      sink: Optional[Callable[[List[dict]], None]] = None) -> dict:
         """
         Crawl comments từ danh sách video trong CSV
         
@@ -78,12 +322,15 @@ class YouTubeCommentAnalyzer:
             url_column (str): Tên cột chứa URL (mặc định: 'url')
             max_comments (int): Số lượng comment tối đa mỗi video
             order (str): Thứ tự sắp xếp ('time', 'relevance')
-            delay (float): Thời gian nghỉ giữa các video (giây)
+            delay (float): Thời gian nghỉ giữa các video khi crawl tuần tự (giây)
             limit (int): Giới hạn số video cần crawl (None = tất cả)
             deduplicate_urls (bool): Có bỏ qua URL trùng lặp không (mặc định: True)
             min_likes (int): Số lượt like tối thiểu (0 = disabled)
             min_words (Optional[int]): Số từ tối thiểu (None = không giới hạn)
             max_words (Optional[int]): Số từ tối đa (None = không giới hạn)
+            concurrency (int): Số video crawl đồng thời (1 = tuần tự)
+            requests_per_second (float): Giới hạn số request API mỗi giây
+            sink (Callable): Nhận comments của từng video ngay khi crawl xong
             
         Returns:
             dict: Kết quả crawl từ CSV
@@ -99,11 +346,14 @@ class YouTubeCommentAnalyzer:
             deduplicate_urls=deduplicate_urls,
             min_likes=min_likes,
             min_words=min_words,
-            max_words=max_words
+            max_words=max_words,
+            concurrency=concurrency,
+            requests_per_second=requests_per_second,
+            sink=sink
         )
         return result
     
-    def clean_comments(self, comments: list) -> pd.DataFrame:
+    def clean_comments(self, comments: list) -> Tuple[pd.DataFrame, dict]:
         """
         Làm sạch dữ liệu comments
         
@@ -111,17 +361,31 @@ class YouTubeCommentAnalyzer:
             comments (list): Danh sách comments
             
         Returns:
-            pd.DataFrame: Comments đã được làm sạch
+            Tuple[pd.DataFrame, dict]: Comments đã được làm sạch và thống kê làm sạch
         """
+        from concurrent.futures import ProcessPoolExecutor
+        import numpy as np
+        import pandas as pd
+        
         logger.info(f"Cleaning {len(comments)} comments...")
         
-        df = pd.DataFrame(comments)
-        cleaned_df = self.cleaner.clean_dataframe(df)
+        df = _comments_frame(comments)
+        workers = os.cpu_count() or 1
+        if workers > 1 and len(df) >= PARALLEL_CLEAN_MIN_ROWS:
+            # Chia DataFrame thành các phần liên tiếp, làm sạch song song trên mọi CPU
+            partitions = [df.iloc[idx] for idx in np.array_split(np.arange(len(df)), workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(_clean_partition, partitions))
+            cleaned_df = pd.concat(parts, ignore_index=True)
+        else:
+            cleaned_df = self.cleaner.clean_dataframe(df)
         
-        stats = self.cleaner.get_cleaning_stats(cleaned_df)
+        stats = _cleaning_summary(cleaned_df)
+        # Gắn thống kê vào DataFrame để nơi nhận cleaned_df (ví dụ kết quả analyze_comments) không phải tính lại
+        cleaned_df.attrs['cleaning_stats'] = stats
         logger.info(f"Cleaning completed: {stats['valid_comments']}/{stats['total_comments']} valid comments")
         
-        return cleaned_df
+        return cleaned_df, stats
     
     def analyze_comments(self, video_url: str, max_comments: int = 100, 
                         order: str = 'time', min_likes: int = 0, 
@@ -143,102 +407,94 @@ class YouTubeCommentAnalyzer:
         Returns:
             dict: Kết quả phân tích
         """
-        print(f"\n=== YOUTUBE COMMENT ANALYZER ===")
-        print(f"Video: {video_url}")
-        print(f"Max comments: {max_comments}")
-        print(f"Order: {order}")
+        out = ["", "=== YOUTUBE COMMENT ANALYZER ===",
+               f"Video: {video_url}",
+               f"Max comments: {max_comments}",
+               f"Order: {order}"]
         if min_likes > 0:
-            print(f"Min likes: {min_likes}")
+            out.append(f"Min likes: {min_likes}")
         if min_words is not None:
-            print(f"Min words: {min_words}")
+            out.append(f"Min words: {min_words}")
         if max_words is not None:
-            print(f"Max words: {max_words}")
+            out.append(f"Max words: {max_words}")
         
-        # Bước 1: Crawl comments
-        print(f"\n1. CRAWLING COMMENTS...")
-        crawl_result = self.crawl_comments(video_url, max_comments, order, min_likes, min_words, max_words)
+        # Bước 1: Crawl comments (theo từng trang API)
+        out += ["", "1. CRAWLING COMMENTS..."]
+        _emit(out)
+        crawl_result = self.crawl_comments(video_url, max_comments, order, min_likes,
+                                           min_words, max_words, stream=True)
         
         if not crawl_result['success']:
             return {'success': False, 'error': crawl_result['error']}
         
-        comments = crawl_result['comments']
         video_info = crawl_result['video_info']
+        view_count = int(video_info['view_count'])
+        like_count = int(video_info['like_count'])
+        comment_count = int(video_info['comment_count'])
         
         # Hiển thị thông tin video
-        print(f"\n2. VIDEO INFORMATION:")
+        _emit(["", "2. VIDEO INFORMATION:",
+               f"   Title: {video_info['title']}",
+               f"   Channel: {video_info['channel_title']}",
+               f"   Views: {view_count:,}",
+               f"   Likes: {like_count:,}",
+               f"   Total Comments: {comment_count:,}"])
+        
+        # Mỗi trang comments được ghi raw/cleaned CSV và cộng dồn thống kê ngay khi về
+        raw_file = str(self._raw_path) if save_results else None
+        cleaned_file = str(self._cleaned_path) if save_results and clean_data else None
+        sink = CommentStreamSink(
+            clean=self.clean_comments if clean_data else None,
+            raw_file=raw_file,
+            cleaned_file=cleaned_file
+        )
         try:
-            print(f"   Title: {video_info['title']}")
-            print(f"   Channel: {video_info['channel_title']}")
-        except UnicodeEncodeError:
-            print(f"   Title: [Vietnamese text - see CSV file]")
-            print(f"   Channel: [Vietnamese text - see CSV file]")
-        
-        print(f"   Views: {int(video_info['view_count']):,}")
-        print(f"   Likes: {int(video_info['like_count']):,}")
-        print(f"   Total Comments: {int(video_info['comment_count']):,}")
+            for page in crawl_result['pages']:
+                sink(page)
+        finally:
+            sink.close()
+            if sink.saved_files():
+                self._reset_output_paths()
         
         # Thống kê comments
-        print(f"\n3. COMMENT STATISTICS:")
-        print(f"   Crawled comments: {len(comments)}")
-        
-        if comments:
-            max_likes = max(c['like_count'] for c in comments)
-            avg_likes = sum(c['like_count'] for c in comments) / len(comments)
-            print(f"   Max likes: {max_likes}")
-            print(f"   Average likes: {avg_likes:.1f}")
+        n = sink.total_comments
+        out = ["", "3. COMMENT STATISTICS:", f"   Crawled comments: {n}"]
+        if n:
+            out += [f"   Max likes: {sink.max_likes}", f"   Average likes: {sink.avg_likes:.1f}"]
         
-        # Bước 2: Làm sạch dữ liệu (nếu được yêu cầu)
-        cleaned_df = None
+        # Bước 2: Thống kê làm sạch dữ liệu (nếu được yêu cầu)
+        cleaning_stats = None
         if clean_data:
-            print(f"\n4. CLEANING DATA...")
-            cleaned_df = self.clean_comments(comments)
-            
-            # Hiển thị thống kê sau khi làm sạch
-            stats = self.cleaner.get_cleaning_stats(cleaned_df)
-            print(f"   Valid comments: {stats['valid_comments']}")
-            print(f"   Language distribution: {stats['language_distribution']}")
-            print(f"   Average text length: {stats['avg_text_length']:.1f} characters")
+            cleaning_stats = sink.cleaning_stats()
+            out += ["", "4. CLEANING DATA...",
+                    f"   Valid comments: {cleaning_stats['valid_comments']}",
+                    f"   Language distribution: {cleaning_stats['language_distribution']}",
+                    f"   Average text length: {cleaning_stats['avg_text_length']:.1f} characters"]
         
         # Bước 3: Hiển thị comments mẫu
-        print(f"\n5. SAMPLE COMMENTS:")
-        for i, comment in enumerate(comments[:3], 1):
-            try:
-                text = comment['comment_text'][:80].replace('\n', ' ')
-                author = comment['author_name']
-                likes = comment['like_count']
-                print(f"   {i}. {author} ({likes} likes): {text}...")
-            except UnicodeEncodeError:
-                print(f"   {i}. [Vietnamese comment] ({comment['like_count']} likes)")
-        
-        # Bước 4: Lưu kết quả (nếu được yêu cầu)
-        saved_files = []
+        out += ["", "5. SAMPLE COMMENTS:"]
+        out += _sample_lines(sink.samples)
+        
+        # Bước 4: Kết quả đã được lưu dần trong lúc crawl
+        saved_files = sink.saved_files()
         if save_results:
-            print(f"\n6. SAVING RESULTS...")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Lưu raw data
-            raw_file = self.crawler.save_to_csv(comments, f"raw_comments_{timestamp}.csv")
-            saved_files.append(raw_file)
-            print(f"   Raw data: {raw_file}")
-            
-            # Lưu cleaned data (nếu có)
-            if cleaned_df is not None:
-                cleaned_file = f"cleaned_comments_{timestamp}.csv"
-                cleaned_df.to_csv(cleaned_file, index=False, encoding='utf-8')
-                saved_files.append(cleaned_file)
-                print(f"   Cleaned data: {cleaned_file}")
-        
-        print(f"\n[SUCCESS] Analysis completed!")
+            out += ["", "6. SAVING RESULTS..."]
+            if raw_file in saved_files:
+                out.append(f"   Raw data: {raw_file}")
+            if cleaned_file in saved_files:
+                out.append(f"   Cleaned data: {cleaned_file}")
+        
+        out += ["", "[SUCCESS] Analysis completed!"]
         if saved_files:
-            print(f"Files saved: {', '.join(saved_files)}")
+            out.append(f"Files saved: {', '.join(saved_files)}")
+        _emit(out)
         
         return {
             'success': True,
             'video_info': video_info,
-            'comments': comments,
-            'cleaned_df': cleaned_df,
+            'cleaning_stats': cleaning_stats,
             'saved_files': saved_files,
-            'total_comments': len(comments)
+            'total_comments': n
         }
     
     def analyze_from_csv(self, csv_path: str, url_column: str = 'url',
@@ -247,7 +503,9 @@ class YouTubeCommentAnalyzer:
                         deduplicate_urls: bool = True,
                         clean_data: bool = True, save_results: bool = True,
                         min_likes: int = 0, min_words: Optional[int] = None,
-                        max_words: Optional[int] = None) -> dict:
+                        max_words: Optional[int] = None,
+                        concurrency: int = DEFAULT_CONCURRENCY,
+                        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND) -> dict:
         """
         Phân tích hoàn chỉnh comments từ danh sách video trong CSV
         
@@ -256,7 +514,7 @@ class YouTubeCommentAnalyzer:
             url_column (str): Tên cột chứa URL
             max_comments (int): Số lượng comment tối đa mỗi video
             order (str): Thứ tự sắp xếp
-            delay (float): Thời gian nghỉ giữa các video
+            delay (float): Thời gian nghỉ giữa các video khi crawl tuần tự
             limit (int): Giới hạn số video
             deduplicate_urls (bool): Có bỏ qua URL trùng lặp không
             clean_data (bool): Có làm sạch dữ liệu không
@@ -264,120 +522,122 @@ class YouTubeCommentAnalyzer:
             min_likes (int): Số lượt like tối thiểu (0 = disabled)
             min_words (Optional[int]): Số từ tối thiểu (None = không giới hạn)
             max_words (Optional[int]): Số từ tối đa (None = không giới hạn)
+            concurrency (int): Số video crawl đồng thời (1 = tuần tự)
+            requests_per_second (float): Giới hạn số request API mỗi giây
             
         Returns:
             dict: Kết quả phân tích
         """
-        print(f"\n=== YOUTUBE COMMENT ANALYZER - CSV MODE ===")
-        print(f"CSV file: {csv_path}")
-        print(f"Max comments per video: {max_comments}")
-        print(f"Order: {order}")
+        out = ["", "=== YOUTUBE COMMENT ANALYZER - CSV MODE ===",
+               f"CSV file: {csv_path}",
+               f"Max comments per video: {max_comments}",
+               f"Order: {order}"]
         if min_likes > 0:
-            print(f"Min likes: {min_likes}")
+            out.append(f"Min likes: {min_likes}")
         if min_words is not None:
-            print(f"Min words: {min_words}")
+            out.append(f"Min words: {min_words}")
         if max_words is not None:
-            print(f"Max words: {max_words}")
+            out.append(f"Max words: {max_words}")
         if limit:
-            print(f"Limit: {limit} videos")
+            out.append(f"Limit: {limit} videos")
         
-        # Bước 1: Crawl từ CSV
-        print(f"\n1. CRAWLING FROM CSV...")
-        crawl_result = self.crawl_from_csv(
-            csv_path=csv_path,
-            url_column=url_column,
-            max_comments=max_comments,
-            order=order,
-            delay=delay,
-            limit=limit,
-            deduplicate_urls=deduplicate_urls,
-            min_likes=min_likes,
-            min_words=min_words,
-            max_words=max_words
+        # Comments được ghi/làm sạch/thống kê theo từng video ngay trong lúc crawl
+        saved_files = []
+        raw_file = cleaned_file = None
+        if save_results:
+            raw_file = str(self._raw_path)
+            cleaned_file = str(self._cleaned_path) if clean_data else None
+        sink = CommentStreamSink(
+            clean=self.clean_comments if clean_data else None,
+            raw_file=raw_file,
+            cleaned_file=cleaned_file
         )
         
+        # Bước 1: Crawl từ CSV
+        out += ["", "1. CRAWLING FROM CSV..."]
+        _emit(out)
+        try:
+            crawl_result = self.crawl_from_csv(
+                csv_path=csv_path,
+                url_column=url_column,
+                max_comments=max_comments,
+                order=order,
+                delay=delay,
+                limit=limit,
+                deduplicate_urls=deduplicate_urls,
+                min_likes=min_likes,
+                min_words=min_words,
+                max_words=max_words,
+                concurrency=concurrency,
+                requests_per_second=requests_per_second,
+                sink=sink
+            )
+        finally:
+            sink.close()
+            if sink.saved_files():
+                self._reset_output_paths()
+        
         if not crawl_result.get('success', False):
             if crawl_result.get('error'):
                 return {'success': False, 'error': crawl_result['error']}
         
-        all_comments = crawl_result.get('aggregated_comments', [])
         summary = crawl_result.get('summary', [])
         
-        print(f"\n2. CRAWL SUMMARY:")
-        print(f"   Total videos processed: {crawl_result.get('total_videos', 0)}")
-        print(f"   Total comments crawled: {crawl_result.get('total_comments', 0)}")
+        out = ["", "2. CRAWL SUMMARY:",
+               f"   Total videos processed: {crawl_result.get('total_videos', 0)}",
+               f"   Total comments crawled: {crawl_result.get('total_comments', 0)}"]
         failed_count = len(crawl_result.get('failed_urls', []))
         if failed_count > 0:
-            print(f"   Failed videos: {failed_count}")
+            out.append(f"   Failed videos: {failed_count}")
         
         # Thống kê comments
-        if all_comments:
-            print(f"\n3. COMMENT STATISTICS:")
-            max_likes = max(c['like_count'] for c in all_comments)
-            avg_likes = sum(c['like_count'] for c in all_comments) / len(all_comments)
-            print(f"   Total comments: {len(all_comments)}")
-            print(f"   Max likes: {max_likes}")
-            print(f"   Average likes: {avg_likes:.1f}")
-        
-        # Bước 2: Làm sạch dữ liệu
-        cleaned_df = None
-        if clean_data and all_comments:
-            print(f"\n4. CLEANING DATA...")
-            cleaned_df = self.clean_comments(all_comments)
-            
-            stats = self.cleaner.get_cleaning_stats(cleaned_df)
-            print(f"   Valid comments: {stats['valid_comments']}")
-            print(f"   Language distribution: {stats['language_distribution']}")
-            print(f"   Average text length: {stats['avg_text_length']:.1f} characters")
+        n = sink.total_comments
+        if n:
+            out += ["", "3. COMMENT STATISTICS:",
+                    f"   Total comments: {n}",
+                    f"   Max likes: {sink.max_likes}",
+                    f"   Average likes: {sink.avg_likes:.1f}"]
+        
+        # Bước 2: Thống kê làm sạch dữ liệu
+        cleaning_stats = None
+        if clean_data and n:
+            cleaning_stats = sink.cleaning_stats()
+            out += ["", "4. CLEANING DATA...",
+                    f"   Valid comments: {cleaning_stats['valid_comments']}",
+                    f"   Language distribution: {cleaning_stats['language_distribution']}",
+                    f"   Average text length: {cleaning_stats['avg_text_length']:.1f} characters"]
         
         # Bước 3: Hiển thị comments mẫu
-        if all_comments:
-            print(f"\n5. SAMPLE COMMENTS:")
-            for i, comment in enumerate(all_comments[:3], 1):
-                try:
-                    text = comment['comment_text'][:80].replace('\n', ' ')
-                    author = comment['author_name']
-                    likes = comment['like_count']
-                    print(f"   {i}. {author} ({likes} likes): {text}...")
-                except UnicodeEncodeError:
-                    print(f"   {i}. [Vietnamese comment] ({comment['like_count']} likes)")
-        
-        # Bước 4: Lưu kết quả
-        saved_files = []
-        if save_results and all_comments:
-            print(f"\n6. SAVING RESULTS...")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Lưu raw data
-            raw_file = self.crawler.save_to_csv(all_comments, f"raw_comments_{timestamp}.csv")
-            saved_files.append(raw_file)
-            print(f"   Raw data: {raw_file}")
-            
-            # Lưu cleaned data
-            if cleaned_df is not None:
-                cleaned_file = f"cleaned_comments_{timestamp}.csv"
-                cleaned_df.to_csv(cleaned_file, index=False, encoding='utf-8')
-                saved_files.append(cleaned_file)
-                print(f"   Cleaned data: {cleaned_file}")
-        
-        print(f"\n[SUCCESS] CSV analysis completed!")
+        if n:
+            out += ["", "5. SAMPLE COMMENTS:"]
+            out += _sample_lines(sink.samples)
+        
+        # Bước 4: Kết quả đã được lưu dần trong lúc crawl
+        if save_results and n:
+            saved_files = sink.saved_files()
+            out += ["", "6. SAVING RESULTS...", f"   Raw data: {raw_file}"]
+            if cleaned_file in saved_files:
+                out.append(f"   Cleaned data: {cleaned_file}")
+        
+        out += ["", "[SUCCESS] CSV analysis completed!"]
         if saved_files:
-            print(f"Files saved: {', '.join(saved_files)}")
+            out.append(f"Files saved: {', '.join(saved_files)}")
+        _emit(out)
         
         return {
             'success': True,
             'summary': summary,
-            'comments': all_comments,
-            'cleaned_df': cleaned_df,
+            'cleaning_stats': cleaning_stats,
             'saved_files': saved_files,
-            'total_comments': len(all_comments),
+            'total_comments': n,
             'total_videos': crawl_result.get('total_videos', 0),
             'failed_urls': crawl_result.get('failed_urls', [])
         }
 
-def main():
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
     """
-    Hàm main với command line interface
+    Tạo ArgumentParser cho CLI (chỉ tạo một lần, các lần gọi main sau dùng lại)
     """
     parser = argparse.ArgumentParser(description='YouTube Comment Crawler & Analyzer')
     parser.add_argument('--api-key', required=True, help='YouTube Data API v3 key')
@@ -394,7 +654,11 @@ def main():
     parser.add_argument('--max-words', type=int, 
                        help='Số từ tối đa của comment (None = không giới hạn)')
     parser.add_argument('--delay', type=float, default=0.2, 
-                       help='Thời gian nghỉ giữa các video khi crawl từ CSV (giây)')
+                       help='Thời gian nghỉ giữa các video khi crawl tuần tự từ CSV (giây)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help=f'Số video crawl đồng thời từ CSV (mặc định: {DEFAULT_CONCURRENCY}, 1 = tuần tự)')
+    parser.add_argument('--rps', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                       help=f'Số request YouTube API tối đa mỗi giây (mặc định: {DEFAULT_REQUESTS_PER_SECOND})')
     parser.add_argument('--limit', type=int, 
                        help='Giới hạn số video cần crawl từ CSV (None = tất cả)')
     parser.add_argument('--no-dedupe', action='store_true',
@@ -403,8 +667,17 @@ def main():
                        help='Skip data cleaning')
     parser.add_argument('--no-save', action='store_true', 
                        help='Skip saving results')
-    
-    args = parser.parse_args()
+    parser.add_argument('--cache-dir',
+                       help='Thư mục cache comments đã crawl, vd: .crawl_cache (mặc định: không cache)')
+    return parser
+
+
+def main():
+    """
+    Hàm main với command line interface
+    """
+    _configure_stdout()
+    args = _build_parser().parse_args()
     
     # Kiểm tra có video-url hoặc csv-path không
     if not args.video_url and not args.csv_path:
@@ -416,7 +689,7 @@ def main():
         sys.exit(1)
     
     # Khởi tạo analyzer
-    analyzer = YouTubeCommentAnalyzer(args.api_key)
+    analyzer = YouTubeCommentAnalyzer(args.api_key, cache_dir=args.cache_dir)
     
     # Chạy phân tích
     if args.csv_path:
@@ -433,7 +706,9 @@ def main():
             save_results=not args.no_save,
             min_likes=args.min_likes,
             min_words=args.min_words,
-            max_words=args.max_words
+            max_words=args.max_words,
+            concurrency=args.concurrency,
+            requests_per_second=args.rps
         )
     else:
         # Crawl từ single video
@@ -452,10 +727,58 @@ def main():
         print(f"[ERROR] Analysis failed: {result.get('error', 'Unknown error')}")
         sys.exit(1)
 
+def _optional_int(raw: str) -> Optional[int]:
+    return int(raw) if raw else None
+
+
+def _yes_no(raw: str) -> bool:
+    return raw.lower() != 'n'
+
+
+# Các tham số hỏi trong chế độ tương tác: (tên tham số, hàm chuyển kiểu, mặc định, câu hỏi)
+PROMPTS_SINGLE = [
+    ('max_comments', int, '100', "Max comments (default 100): "),
+    ('order', str, 'time', "Order (time/relevance, default time): "),
+    ('min_likes', int, '0', "Min likes for top comments (0=disabled, default 0): "),
+    ('min_words', _optional_int, '', "Min words per comment (press Enter for no limit): "),
+    ('max_words', _optional_int, '', "Max words per comment (press Enter for no limit): "),
+    ('clean_data', _yes_no, 'y', "Clean data? (y/n, default y): "),
+    ('save_results', _yes_no, 'y', "Save results? (y/n, default y): "),
+]
+
+PROMPTS_CSV = [
+    ('max_comments', int, '100', "Max comments per video (default 100): "),
+    ('order', str, 'time', "Order (time/relevance, default time): "),
+    ('delay', float, '0.2', "Delay between videos in seconds (default 0.2): "),
+    ('limit', _optional_int, '', "Limit number of videos (press Enter for all): "),
+    ('min_likes', int, '0', "Min likes for top comments (0=disabled, default 0): "),
+    ('min_words', _optional_int, '', "Min words per comment (press Enter for no limit): "),
+    ('max_words', _optional_int, '', "Max words per comment (press Enter for no limit): "),
+    ('clean_data', _yes_no, 'y', "Clean data? (y/n, default y): "),
+    ('save_results', _yes_no, 'y', "Save results? (y/n, default y): "),
+]
+
+
+def _ask_params(prompts) -> dict:
+    """
+    Hỏi lần lượt các tham số theo bảng prompts; nhập sai kiểu thì dùng giá trị mặc định
+    """
+    params = {}
+    for name, cast, default, prompt in prompts:
+        raw = input(prompt).strip() or default
+        try:
+            params[name] = cast(raw)
+        except ValueError:
+            print(f"Invalid input for {name}! Using default.")
+            params[name] = cast(default)
+    return params
+
+
 def interactive_mode():
     """
     Chế độ tương tác cho người dùng
     """
+    _configure_stdout()
     print("=== YOUTUBE COMMENT ANALYZER - INTERACTIVE MODE ===")
     
     # Nhập API key
@@ -482,43 +805,7 @@ def interactive_mode():
                 print("❌ CSV file not found!")
                 continue
             
-            try:
-                max_comments = int(input("Max comments per video (default 100): ") or "100")
-                order = input("Order (time/relevance, default time): ").strip() or "time"
-                delay = float(input("Delay between videos in seconds (default 0.2): ") or "0.2")
-                limit_input = input("Limit number of videos (press Enter for all): ").strip()
-                limit = int(limit_input) if limit_input else None
-                min_likes = int(input("Min likes for top comments (0=disabled, default 0): ") or "0")
-                min_words_input = input("Min words per comment (press Enter for no limit): ").strip()
-                min_words = int(min_words_input) if min_words_input else None
-                max_words_input = input("Max words per comment (press Enter for no limit): ").strip()
-                max_words = int(max_words_input) if max_words_input else None
-                clean_data = input("Clean data? (y/n, default y): ").strip().lower() != 'n'
-                save_results = input("Save results? (y/n, default y): ").strip().lower() != 'n'
-            except ValueError:
-                print("Invalid input! Using defaults.")
-                max_comments = 100
-                order = 'time'
-                delay = 0.2
-                limit = None
-                min_likes = 0
-                min_words = None
-                max_words = None
-                clean_data = True
-                save_results = True
-            
-            result = analyzer.analyze_from_csv(
-                csv_path=csv_path,
-                max_comments=max_comments,
-                order=order,
-                delay=delay,
-                limit=limit,
-                min_likes=min_likes,
-                min_words=min_words,
-                max_words=max_words,
-                clean_data=clean_data,
-                save_results=save_results
-            )
+            result = analyzer.analyze_from_csv(csv_path=csv_path, **_ask_params(PROMPTS_CSV))
             
             if not result['success']:
                 print(f"[ERROR] Analysis failed: {result.get('error', 'Unknown error')}")
@@ -530,40 +817,8 @@ def interactive_mode():
                 print("Video URL is required!")
                 continue
             
-            # Nhập các tham số
-            try:
-                max_comments = int(input("Max comments (default 100): ") or "100")
-                order = input("Order (time/relevance, default time): ").strip() or "time"
-                min_likes = int(input("Min likes for top comments (0=disabled, default 0): ") or "0")
-                min_words_input = input("Min words per comment (press Enter for no limit): ").strip()
-                min_words = int(min_words_input) if min_words_input else None
-                max_words_input = input("Max words per comment (press Enter for no limit): ").strip()
-                max_words = int(max_words_input) if max_words_input else None
-                
-                clean_data = input("Clean data? (y/n, default y): ").strip().lower() != 'n'
-                save_results = input("Save results? (y/n, default y): ").strip().lower() != 'n'
-                
-            except ValueError:
-                print("Invalid input! Using defaults.")
-                max_comments = 100
-                order = 'time'
-                min_likes = 0
-                min_words = None
-                max_words = None
-                clean_data = True
-                save_results = True
-            
-            # Chạy phân tích
-            result = analyzer.analyze_comments(
-                video_url=video_url,
-                max_comments=max_comments,
-                order=order,
-                min_likes=min_likes,
-                min_words=min_words,
-                max_words=max_words,
-                clean_data=clean_data,
-                save_results=save_results
-            )
+            # Nhập các tham số và chạy phân tích
+            result = analyzer.analyze_comments(video_url=video_url, **_ask_params(PROMPTS_SINGLE))
             
             if not result['success']:
                 print(f"[ERROR] Analysis failed: {result.get('error', 'Unknown error')}")
@@ -1,10 +1,137 @@
 """
 Merge sentiment labels from multiple labeled CSV files into the main CSV file.
+
+Each labeled file (``<stem>_l<l>_r<r>_labeled.csv`` from label_comments.py) is
+already sorted by ``row_index``, so the files are k-way merged with heapq and
+zipped with the main CSV in a single streaming pass: memory stays at one row
+per file instead of every row of every file.
+
+An output path ending in ``.parquet`` is written as zstd Parquet (needs pyarrow)
+instead of CSV.
 """
 
-import pandas as pd
+import contextlib
+import csv
+import fnmatch
 import glob
+import heapq
+import operator
+import os
+import re
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Optional: Parquet output (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+PARQUET_BATCH_ROWS = 50_000
+
+
+def iter_labeled_rows(file_path: str) -> Iterator[Tuple[int, str, str, str]]:
+    """Yield ``(row_index, comment_id, sentiment_label, sentiment_score)`` from one labeled file."""
+    with open(file_path, "r", encoding="utf-8", newline="") as infile:
+        reader = csv.reader(infile)
+        ci = {name: i for i, name in enumerate(next(reader, []))}
+        idx_pos = ci["row_index"]
+        # Only the three label columns are picked out; the rest of the row is never copied
+        pick = operator.itemgetter(ci["comment_id"], ci["sentiment_label"], ci["sentiment_score"])
+        for row in reader:
+            if row:
+                yield (int(row[idx_pos]), *pick(row))
+
+
+class ParquetRowWriter:
+    """
+    ``csv.writer``-like sink that buffers rows and writes them as Parquet row groups.
+
+    Every column is stored as a string (dictionary-encoded by Parquet) except
+    ``sentiment_score``, which is float32 (null when the cell is empty).
+    """
+
+    def __init__(self, output_path: str, header: List[str]) -> None:
+        if pq is None:
+            raise ImportError(
+                "Parquet output needs pyarrow. Install it with `pip install pyarrow`."
+            )
+        self.schema = pa.schema(
+            [(name, pa.float32() if name == "sentiment_score" else pa.string()) for name in header]
+        )
+        self._writer = pq.ParquetWriter(output_path, self.schema, compression="zstd")
+        self._rows: List[List[str]] = []
+
+    def writerow(self, row: List[str]) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        arrays = []
+        for pos, field in enumerate(self.schema):
+            values = [row[pos] for row in self._rows]
+            if field.name == "sentiment_score":
+                arrays.append(pa.array([_parse_score(v) for v in values], type=pa.float32()))
+            else:
+                arrays.append(pa.array(values, type=pa.string()))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self._rows = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+def _parse_score(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def find_labeled_files(pattern: str) -> List[str]:
+    """
+    Sorted paths matching ``pattern``.
+
+    When only the file name has wildcards, the directory is listed once with
+    ``os.scandir`` and names are checked against one compiled regex; otherwise
+    this falls back to ``glob.glob``.
+    """
+    directory, name_pattern = os.path.split(pattern)
+    if glob.has_magic(directory):
+        return sorted(glob.glob(pattern))
+    matches = re.compile(fnmatch.translate(name_pattern)).match
+    skip_hidden = not name_pattern.startswith(".")  # same rule as glob
+    try:
+        with os.scandir(directory or ".") as entries:
+            return sorted(
+                os.path.join(directory, entry.name)
+                for entry in entries
+                if matches(entry.name) and not (skip_hidden and entry.name.startswith("."))
+                and entry.is_file()
+            )
+    except FileNotFoundError:
+        return []
+
+
+@contextlib.contextmanager
+def open_output_writer(output_path: str, header: List[str]):
+    """Yield a row writer for ``output_path`` (Parquet by suffix, CSV otherwise) with the header written."""
+    if os.path.splitext(output_path)[1].lower() == ".parquet":
+        writer = ParquetRowWriter(output_path, header)
+        try:
+            yield writer
+        finally:
+            writer.close()
+        return
+    with open(output_path, "w", encoding="utf-8", newline="") as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(header)
+        yield writer
 
 
 def merge_labeled_comments(
@@ -15,93 +142,78 @@ def merge_labeled_comments(
     """
     Merge sentiment labels from labeled CSV files into the main CSV.
     
+    Labels are matched to main CSV rows by ``row_index`` (1-based data row), and
+    only applied when the ``comment_id`` agrees. If several files label the same
+    row, the first file in sorted order wins.
+    
     Args:
         main_csv_path: Path to the main CSV file (unlabeled)
         labeled_files_pattern: Glob pattern to find labeled CSV files
-        output_csv_path: Path to save the merged output CSV
+        output_csv_path: Path to save the merged output (``.parquet`` for Parquet, CSV otherwise)
     """
-    # Read main CSV file
-    print(f"Reading main CSV file: {main_csv_path}")
-    main_df = pd.read_csv(main_csv_path)
-    print(f"Loaded {len(main_df)} rows from main CSV")
-    
     # Find all labeled CSV files
-    labeled_files = glob.glob(labeled_files_pattern)
+    labeled_files = find_labeled_files(labeled_files_pattern)
     if not labeled_files:
         print(f"No labeled files found matching pattern: {labeled_files_pattern}")
         return
     
-    print(f"Found {len(labeled_files)} labeled files:")
-    for f in sorted(labeled_files):
-        print(f"  - {Path(f).name}")
-    
-    # Read and merge all labeled files
-    labeled_dfs = []
-    for file_path in sorted(labeled_files):
-        df = pd.read_csv(file_path)
-        # Extract only comment_id, sentiment_label, sentiment_score
-        df_subset = df[['comment_id', 'sentiment_label', 'sentiment_score']].copy()
-        labeled_dfs.append(df_subset)
-        print(f"  Loaded {len(df_subset)} rows from {Path(file_path).name}")
-    
-    # Concatenate all labeled data
-    merged_labeled = pd.concat(labeled_dfs, ignore_index=True)
-    print(f"\nTotal labeled rows before deduplication: {len(merged_labeled)}")
-    
-    # Remove duplicates (keep first occurrence)
-    merged_labeled = merged_labeled.drop_duplicates(subset=['comment_id'], keep='first')
-    print(f"Total unique labeled rows after deduplication: {len(merged_labeled)}")
-    
-    # Left join with main CSV to fill sentiment_label and sentiment_score
-    print("\nMerging labels into main CSV...")
-    
-    # Store original sentiment columns if they exist (will be empty/NaN)
-    has_original_labels = 'sentiment_label' in main_df.columns and 'sentiment_score' in main_df.columns
-    
-    # Merge with labeled data
-    main_df = main_df.merge(
-        merged_labeled[['comment_id', 'sentiment_label', 'sentiment_score']],
-        on='comment_id',
-        how='left',
-        suffixes=('', '_new')
-    )
-    
-    # Handle merged columns
-    if 'sentiment_label_new' in main_df.columns:
-        # Use new values from labeled files, fallback to original if exists
-        if has_original_labels:
-            main_df['sentiment_label'] = main_df['sentiment_label_new'].fillna(main_df['sentiment_label'])
-            main_df['sentiment_score'] = main_df['sentiment_score_new'].fillna(main_df['sentiment_score'])
-        else:
-            main_df['sentiment_label'] = main_df['sentiment_label_new']
-            main_df['sentiment_score'] = main_df['sentiment_score_new']
+    # Each report block goes out as one write, not one print per line/shard
+    print("\n".join([f"Found {len(labeled_files)} labeled files:"]
+                    + [f"  - {Path(f).name}" for f in labeled_files]))
+    
+    # k-way merge: one open reader per file, ties resolved in file order
+    labels = heapq.merge(*(iter_labeled_rows(f) for f in labeled_files), key=lambda item: item[0])
+    next_label = next(labels, None)
+    
+    print(f"\nMerging labels into main CSV: {main_csv_path}\nWriting merged CSV to: {output_csv_path}")
+    total = labeled = mismatched = removed = 0
+    with open(main_csv_path, "r", encoding="utf-8", newline="") as infile, \
+            contextlib.ExitStack() as stack:
+        reader = csv.reader(infile)
+        header = next(reader, [])
+        width = len(header)
+        output_header: List[str] = list(header)
+        for column in ("sentiment_label", "sentiment_score"):
+            if column not in output_header:
+                output_header.append(column)
+        id_pos = header.index("comment_id")
+        label_pos = output_header.index("sentiment_label")
+        score_pos = output_header.index("sentiment_score")
+        writer = stack.enter_context(open_output_writer(output_csv_path, output_header))
         
-        main_df = main_df.drop(columns=['sentiment_label_new', 'sentiment_score_new'])
-    
-    print(f"Rows after merge: {len(main_df)}")
-    print(f"Rows with labels: {main_df['sentiment_label'].notna().sum()}")
-    
-    # Remove rows where sentiment_label == "neutral" AND sentiment_score == 0
-    print("\nFiltering out neutral comments with score 0...")
-    before_filter = len(main_df)
-    
-    # Convert sentiment_score to numeric if it's string
-    main_df['sentiment_score'] = pd.to_numeric(main_df['sentiment_score'], errors='coerce')
-    
-    filter_mask = ~(
-        (main_df['sentiment_label'] == 'neutral') & 
-        (main_df['sentiment_score'] == 0.0)
-    )
-    main_df = main_df[filter_mask].copy()
-    
-    removed = before_filter - len(main_df)
-    print(f"Removed {removed} rows (neutral with score 0)")
-    print(f"Final rows: {len(main_df)}")
-    
-    # Save output
-    print(f"\nSaving merged CSV to: {output_csv_path}")
-    main_df.to_csv(output_csv_path, index=False, encoding='utf-8')
-    print("Done!")
+        # filter(None, ...) skips blank lines, matching the row numbering of the labeler
+        for row_index, row in enumerate(filter(None, reader), start=1):
+            total += 1
+            output_row = row[:width] + [""] * (len(output_header) - min(len(row), width))
+            
+            # Skip labels for earlier rows and duplicates of an already applied row
+            while next_label is not None and next_label[0] < row_index:
+                next_label = next(labels, None)
+            if next_label is not None and next_label[0] == row_index:
+                _, comment_id, label, score = next_label
+                if comment_id == output_row[id_pos]:
+                    output_row[label_pos] = label
+                    output_row[score_pos] = score
+                    labeled += 1
+                else:
+                    mismatched += 1
+                next_label = next(labels, None)
+            
+            # Remove rows where sentiment_label == "neutral" AND sentiment_score == 0
+            if output_row[label_pos] == "neutral":
+                try:
+                    if float(output_row[score_pos]) == 0.0:
+                        removed += 1
+                        continue
+                except ValueError:
+                    pass
+            writer.writerow(output_row)
+    
+    report = [f"Rows in main CSV: {total}", f"Rows with labels from labeled files: {labeled}"]
+    if mismatched:
+        report.append(f"Warning: {mismatched} labels skipped (comment_id differs from the main CSV row)")
+    report += [f"Removed {removed} rows (neutral with score 0)", f"Final rows: {total - removed}", "Done!"]
+    print("\n".join(report))
 
 if __name__ == "__main__":
     main_csv = "/Users/lucasnhandang/Study_Work/HUST/20251/Data_Science/data-science-crawler/youtube_crawler/raw_comments_20251118_115552_filtered.csv"
@@ -19,6 +19,7 @@ from __future__ import annotations
 import argparse
 import csv
 import json
+import multiprocessing
 import sys
 import time
 from concurrent.futures import ProcessPoolExecutor, as_completed
@@ -40,6 +41,8 @@ MODEL_NAME = "gemini-2.5-pro"
 MODEL_MAX_INPUT_TOKENS = 2_000_000
 DEFAULT_BATCH_SIZE = 100
 VALID_LABELS = ("neutral", "negative", "positive")
+# Imported once in the forkserver so every labeling worker inherits them
+WORKER_PRELOAD_MODULES = ["google.generativeai", "json", "csv"]
 
 PROMPT_TEMPLATE = """
 Role: You are an expert sentiment analysis specialist focused on entertainment content on social media, especially YouTube comments related to movies, music, artists, film production, and other entertainment topics. You are highly experienced in identifying subtle emotional nuances, including sarcasm, praise, and neutrality.
@@ -192,15 +195,15 @@ def split_csv(
     
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Read all rows
+    # Read all rows (as plain lists: parts are copied verbatim, no per-row dicts)
     with input_csv.open("r", encoding="utf-8", newline="") as infile:
-        reader = csv.DictReader(infile)
-        fieldnames = reader.fieldnames
+        reader = csv.reader(infile)
+        fieldnames = next(reader, None)
         if not fieldnames:
             print("CSV file has no header row.", file=sys.stderr)
             sys.exit(1)
         
-        rows = list(reader)
+        rows = [row for row in reader if row]
     
     total_rows = len(rows)
     if total_rows == 0:
@@ -239,8 +242,8 @@ def split_csv(
         
         # Write part CSV with header
         with part_path.open("w", encoding="utf-8", newline="") as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
+            writer = csv.writer(outfile)
+            writer.writerow(fieldnames)
             writer.writerows(part_rows)
         
         split_files.append(part_path)
@@ -357,6 +360,18 @@ def label_csv_part(
         return (csv_path, False, str(e))
 
 
+def worker_mp_context():
+    """
+    forkserver context with google.generativeai preloaded (Linux/macOS), so workers
+    skip the 0.5-1s SDK import; falls back to the platform default (spawn on Windows).
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(WORKER_PRELOAD_MODULES)
+    return ctx
+
+
 def label_all_parts_parallel(
     split_files: List[Path],
     api_keys: List[str],
@@ -389,7 +404,8 @@ def label_all_parts_parallel(
     failed_inputs: List[str] = []
     
     # Use ProcessPoolExecutor for true parallelism
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    # label_csv_part is called directly in the workers (no per-part interpreter re-exec)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=worker_mp_context()) as executor:
         # Submit all tasks
         future_to_info = {
             executor.submit(
@@ -446,15 +462,12 @@ def merge_labeled_files(
     Preserves all original columns and updates sentiment_label and sentiment_score.
     Uses comment_id as key to match rows between main CSV and labeled files.
     """
-    # Read main CSV to get all rows
+    # Read main CSV header
     with main_csv.open("r", encoding="utf-8", newline="") as infile:
-        reader = csv.DictReader(infile)
-        fieldnames = reader.fieldnames
+        fieldnames = next(csv.reader(infile), None)
         if not fieldnames:
             print("Main CSV file has no header row.", file=sys.stderr)
             sys.exit(1)
-        
-        main_rows = list(reader)
     
     # Create a mapping from comment_id to sentiment data
     sentiment_map: Dict[str, Tuple[str, float]] = {}
@@ -466,48 +479,61 @@ def merge_labeled_files(
             continue
         
         with labeled_file.open("r", encoding="utf-8", newline="") as infile:
-            reader = csv.DictReader(infile)
+            reader = csv.reader(infile)
+            ci = {name: i for i, name in enumerate(next(reader, []))}
+            if "comment_id" not in ci:
+                continue
+            id_pos = ci["comment_id"]
+            label_pos = ci.get("sentiment_label")
+            score_pos = ci.get("sentiment_score")
             for row in reader:
-                comment_id = row.get("comment_id", "")
-                if not comment_id:
+                if len(row) <= id_pos or not row[id_pos]:
                     continue
-                sentiment_label = row.get("sentiment_label", "neutral")
-                sentiment_score = float(row.get("sentiment_score", 0.0))
-                sentiment_map[comment_id] = (sentiment_label, sentiment_score)
+                sentiment_label = row[label_pos] if label_pos is not None else "neutral"
+                sentiment_score = float(row[score_pos]) if score_pos is not None else 0.0
+                sentiment_map[row[id_pos]] = (sentiment_label, sentiment_score)
     
-    # Prepare output fieldnames
+    # Prepare output fieldnames; newly added sentiment columns default to neutral/0.0
+    width = len(fieldnames)
     output_fieldnames = list(fieldnames)
+    missing_defaults: List[str] = []
     if "sentiment_label" not in output_fieldnames:
         output_fieldnames.append("sentiment_label")
+        missing_defaults.append("neutral")
     if "sentiment_score" not in output_fieldnames:
         output_fieldnames.append("sentiment_score")
-    
-    # Write merged CSV
-    with output_csv.open("w", encoding="utf-8", newline="") as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=output_fieldnames)
-        writer.writeheader()
+        missing_defaults.append("0.0")
+    id_pos = fieldnames.index("comment_id") if "comment_id" in fieldnames else None
+    label_pos = output_fieldnames.index("sentiment_label")
+    score_pos = output_fieldnames.index("sentiment_score")
+    
+    # Stream the main CSV and write the merged CSV row by row
+    with main_csv.open("r", encoding="utf-8", newline="") as infile, \
+            output_csv.open("w", encoding="utf-8", newline="") as outfile:
+        reader = csv.reader(infile)
+        next(reader, None)
+        writer = csv.writer(outfile)
+        writer.writerow(output_fieldnames)
         
+        total_count = 0
         matched_count = 0
-        for row in main_rows:
-            output_row = dict(row)
-            comment_id = row.get("comment_id", "")
+        for row in reader:
+            if not row:
+                continue
+            output_row = row[:width] + [""] * (width - len(row)) + missing_defaults
+            comment_id = row[id_pos] if id_pos is not None and id_pos < len(row) else ""
             
-            # Update sentiment if available in labeled files
+            # Update sentiment if available in labeled files (otherwise keep original values)
             if comment_id and comment_id in sentiment_map:
                 label, score = sentiment_map[comment_id]
-                output_row["sentiment_label"] = label
-                output_row["sentiment_score"] = f"{score:.4f}"
+                output_row[label_pos] = label
+                output_row[score_pos] = f"{score:.4f}"
                 matched_count += 1
-            else:
-                # Keep original values if not found
-                if "sentiment_label" not in output_row:
-                    output_row["sentiment_label"] = "neutral"
-                if "sentiment_score" not in output_row:
-                    output_row["sentiment_score"] = "0.0"
             
             writer.writerow(output_row)
+            total_count += 1
     
-    print(f"Merged {len(main_rows)} rows into {output_csv} (matched {matched_count} rows)")
+    print(f"Merged {total_count} rows into {output_csv} (matched {matched_count} rows)")
 
 
 def cleanup_temp_files(split_files: List[Path], labeled_files: List[Path]) -> None:
@@ -0,0 +1,61 @@
+"""
+Tests for filter_english_comments.py (run with ``python -m pytest youtube_crawler``).
+"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("langdetect")
+import filter_english_comments as fec  # noqa: E402
+
+_load_fasttext_model = fec.load_fasttext_model
+
+
+@pytest.fixture(autouse=True)
+def langdetect_only(monkeypatch):
+    # Exercise the ASCII pre-filter + langdetect path even where fastText is installed
+    monkeypatch.setattr(fec, "load_fasttext_model", lambda: None)
+
+
+def test_long_ascii_non_english_comment_goes_through_langdetect():
+    texts = pd.Series([
+        "Bai hat nay hay qua, minh nghe di nghe lai ca tram lan roi ma van khong chan, "
+        "cam on ca si va ekip da lam ra mot san pham tuyet voi nhu the nay",
+        "This song is amazing, I have listened to it a hundred times already",
+        "so good!!",
+    ])
+
+    assert fec.english_mask(texts).tolist() == [False, True, True]
+
+
+def test_short_ascii_comment_is_accepted_without_langdetect(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("langdetect should not run for short ASCII text")
+
+    monkeypatch.setattr(fec, "is_english_text", fail)
+    assert fec.english_mask(pd.Series(["love this part lol"])).tolist() == [True]
+
+
+def test_missing_fasttext_model_is_logged_once(monkeypatch, tmp_path):
+    warnings = []
+    monkeypatch.setattr(fec, "fasttext", object())
+    monkeypatch.setattr(fec, "_fasttext_model", None)
+    monkeypatch.setattr(fec, "_fasttext_missing_logged", False)
+    monkeypatch.setattr(fec, "FASTTEXT_MODEL_PATH", str(tmp_path / "missing.bin"))
+    monkeypatch.setattr(fec.logger, "warning", lambda *args: warnings.append(args))
+
+    assert _load_fasttext_model() is None
+    assert _load_fasttext_model() is None
+    assert len(warnings) == 1
+
+
+def test_no_detector_fails_before_starting_the_pool(monkeypatch, tmp_path):
+    input_csv = tmp_path / "comments.csv"
+    pd.DataFrame({"comment_text": ["hello there, nice video"]}).to_csv(input_csv, index=False)
+    monkeypatch.setattr(fec, "DetectorFactory", None)
+    monkeypatch.setattr(
+        fec.multiprocessing, "Pool", lambda *args, **kwargs: pytest.fail("pool was started")
+    )
+
+    with pytest.raises(ImportError, match="langdetect"):
+        fec.filter_english_comments(str(input_csv))
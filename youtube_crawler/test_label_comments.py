@@ -0,0 +1,85 @@
+"""
+Tests for label_comments.py (run with ``python -m pytest youtube_crawler``).
+"""
+
+import asyncio
+import csv
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+import label_comments  # noqa: E402
+
+
+def _write_comments(path, count):
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["comment_id", "like_count", "comment_text"])
+        for i in range(count):
+            writer.writerow([f"c{i}", i, f"line one of {i}\nline two\n\nline four " + "x" * 40])
+
+
+def test_arrow_reader_keeps_multiline_comments_across_blocks(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    # Small blocks so the file spans many of them, like an export larger than 8 MB
+    monkeypatch.setattr(label_comments, "ARROW_CSV_BLOCK_SIZE", 1024)
+    monkeypatch.setattr(label_comments, "np", None)  # no offset index: use the pyarrow path
+    path = tmp_path / "comments.csv"
+    _write_comments(path, 500)
+    assert path.stat().st_size > 10 * label_comments.ARROW_CSV_BLOCK_SIZE
+
+    rows = list(label_comments.iter_csv_rows(path))
+
+    assert len(rows) == 500
+    assert rows[123]["comment_id"] == "c123"
+    assert rows[123]["comment_text"].startswith("line one of 123\nline two\n\nline four")
+    assert label_comments.count_csv_rows(path) == 500
+
+
+def test_parquet_sink_keeps_four_decimal_scores(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "labeled.parquet"
+    sink = label_comments.ParquetSink(path)
+    scores = ["0.9876", "0.5001", "0.1234"]
+    sink.write([
+        {"row_index": i, "comment_id": f"c{i}", "like_count": 0, "comment_text": "hi",
+         "sentiment_label": "positive", "sentiment_score": score}
+        for i, score in enumerate(scores, 1)
+    ])
+    sink.close()
+
+    stored = pq.read_table(path).column("sentiment_score").to_pylist()
+    assert [f"{value:.4f}" for value in stored] == scores
+
+
+def test_failed_batch_is_split_and_unlabeled_rows_keep_empty_score():
+    calls = []
+
+    async def labeler(items):
+        calls.append([item["row_index"] for item in items])
+        if len(items) > 2:
+            raise ValueError("truncated response")
+        # The second half keeps failing: its rows must not look like neutral/0
+        if items[0]["row_index"] >= 2:
+            return {}
+        return {item["row_index"]: ("positive", 0.9) for item in items}
+
+    batch = [(i, {"comment_id": f"c{i}", "like_count": "1", "comment_text": f"great video {i}"})
+             for i in range(4)]
+    rows = asyncio.run(label_comments.label_row_batch(labeler, batch))
+
+    assert calls == [[0, 1, 2, 3], [0, 1], [2, 3]]
+    assert [(row["sentiment_label"], row["sentiment_score"]) for row in rows] == [
+        ("positive", "0.9000"), ("positive", "0.9000"), ("neutral", ""), ("neutral", ""),
+    ]
+
+
+def test_batches_of_long_comments_fit_the_tpm_quota():
+    tpm = 100_000
+    rows = ({"comment_text": "x" * 3000} for _ in range(2000))
+    batches = list(label_comments.iter_row_batches(rows, start_idx=1, tpm=tpm))
+
+    # Every prompt stays within half the quota, including the first one
+    for batch in batches:
+        assert sum(len(row["comment_text"]) for _, row in batch) // 4 <= tpm // 2
+    assert sum(map(len, batches)) == 2000
@@ -3,31 +3,283 @@ YouTube Comment Crawler sử dụng YouTube Data API v3
 """
 
 import os
+import csv
+import gzip
 import time
 import json
+import hashlib
+import asyncio
 import argparse
+import functools
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Callable, Iterator, Tuple
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import logging
 
+# Optional: crawl nhiều video song song (pip install aiohttp)
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Optional: parse/ghi JSON nhanh (pip install orjson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: dedupe URL bằng Bloom filter cho CSV rất lớn (pip install pybloom-live xxhash)
+try:
+    from pybloom_live import ScalableBloomFilter
+except ImportError:
+    ScalableBloomFilter = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Optional: ghi CSV nhanh bằng PyArrow (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
 # Thiết lập logging
 from logger_config import get_crawler_logger
 logger = get_crawler_logger()
 
+from crawler_config import DEFAULT_CONCURRENCY, DEFAULT_REQUESTS_PER_SECOND
+
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+CSV_CHUNK_ROWS = 50_000  # Số dòng đọc mỗi lần từ CSV danh sách video
+BLOOM_DEDUPE_MIN_BYTES = 256 * 1024 * 1024  # CSV nhỏ hơn thì dedupe chính xác bằng set
+BLOOM_ERROR_RATE = 1e-5  # Tỉ lệ bỏ nhầm URL chưa gặp khi dùng Bloom filter
+
+
+class YouTubeApiError(Exception):
+    """Lỗi trả về từ YouTube Data API khi gọi qua aiohttp"""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class RequestPacer:
+    """
+    Giãn cách các request API dùng chung cho mọi coroutine:
+    tối đa `rate` request mỗi giây
+    """
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+    
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+                now = self._next_at
+            self._next_at = now + self.interval
+
+
+@functools.lru_cache(maxsize=256)
+def _video_id(url: str) -> str:
+    """
+    Tách Video ID từ YouTube URL (cache theo URL: CSV thường lặp lại cùng URL)
+    """
+    if 'youtube.com/watch?v=' in url:
+        return url.split('v=')[1].split('&')[0]
+    elif 'youtu.be/' in url:
+        return url.split('youtu.be/')[1].split('?')[0]
+    else:
+        raise ValueError("Invalid YouTube URL format")
+
+
+def write_csv(data, filename: str, append: bool = False, engine: Optional[str] = None) -> str:
+    """
+    Ghi DataFrame hoặc list dict ra CSV (UTF-8, không index)
+    
+    Dùng PyArrow (writer C++ đa luồng) nếu có; fallback pandas.to_csv khi thiếu PyArrow
+    hoặc PyArrow không suy ra được kiểu của một cột (ví dụ cột trộn nhiều kiểu).
+    
+    Khi ghi nối nhiều lô vào cùng một file, truyền lại `engine` mà lần ghi đầu trả về
+    để cả file dùng một writer (PyArrow và pandas định dạng số, ngày, giá trị rỗng khác nhau).
+    
+    Args:
+        data (pd.DataFrame | List[Dict]): Dữ liệu cần ghi
+        filename (str): Đường dẫn file CSV
+        append (bool): Ghi nối vào cuối file, không ghi header
+        engine (Optional[str]): 'pyarrow' hoặc 'pandas' để cố định writer; None = tự chọn
+    
+    Returns:
+        str: Writer đã dùng ('pyarrow' hoặc 'pandas')
+    """
+    if engine is None:
+        engine = 'pyarrow' if pa_csv is not None else 'pandas'
+        allow_fallback = True
+    else:
+        allow_fallback = False
+    
+    if engine == 'pyarrow':
+        try:
+            if isinstance(data, pd.DataFrame):
+                table = pa.Table.from_pandas(data, preserve_index=False)
+            else:
+                table = pa.Table.from_pylist(data)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            if allow_fallback:
+                logger.debug(f"PyArrow không ghi được CSV, dùng pandas: {e}")
+                engine = 'pandas'
+            else:
+                # Writer đã cố định cho file: chuyển các cột object thành chuỗi thay vì đổi sang pandas
+                logger.debug(f"PyArrow không suy ra được kiểu cột, ghi dạng chuỗi: {e}")
+                if not isinstance(data, pd.DataFrame):
+                    data = pd.DataFrame(data)
+                object_columns = data.select_dtypes(include='object').columns
+                data = data.astype({col: 'string' for col in object_columns})
+                table = pa.Table.from_pandas(data, preserve_index=False)
+        if engine == 'pyarrow':
+            options = pa_csv.WriteOptions(include_header=not append)
+            with open(filename, 'ab' if append else 'wb') as f:
+                pa_csv.write_csv(table, f, write_options=options)
+            return engine
+    
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame(data)
+    data.to_csv(filename, mode='a' if append else 'w', header=not append,
+                index=False, encoding='utf-8')
+    return 'pandas'
+
+
+class CommentCsvWriter:
+    """
+    Ghi comments vào CSV theo từng lô (mở file một lần, header lấy từ lô đầu tiên)
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.rows = 0
+        self._file = None
+        self._writer = None
+    
+    def write(self, comments: List[Dict]):
+        if not comments:
+            return
+        if self._writer is None:
+            self._file = open(self.filename, 'w', encoding='utf-8', newline='')
+            self._writer = csv.DictWriter(self._file, fieldnames=list(comments[0].keys()),
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerows(comments)
+        self.rows += len(comments)
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            logger.info(f"Đã lưu {self.rows} comments vào file: {self.filename}")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CrawlCache:
+    """
+    Cache comments trên đĩa theo (video_id, order, max_comments, filter số từ)
+    
+    Crawl đầy đủ được lưu ở `{key}.jsonl.gz` (mỗi dòng một trang comments) nên chạy lại
+    cùng video không tốn quota. Trong lúc crawl các trang được ghi dần vào
+    `{key}.jsonl.gz.part`; nếu hết quota giữa chừng, pageToken tiếp theo được lưu vào
+    `{key}.token` để lần chạy sau crawl tiếp từ đó thay vì từ đầu.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def key(video_id: str, order: str, max_comments: int,
+            min_words: Optional[int] = None, max_words: Optional[int] = None) -> str:
+        raw = f"{video_id}|{order}|{max_comments}|{min_words}|{max_words}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.cache_dir / f"{key}{suffix}"
+    
+    @staticmethod
+    def _read_pages(path: Path) -> List[List[Dict]]:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    
+    def load(self, key: str) -> Optional[List[List[Dict]]]:
+        """
+        Trả về các trang của một lần crawl đầy đủ (None nếu chưa có)
+        """
+        path = self._path(key, '.jsonl.gz')
+        return self._read_pages(path) if path.exists() else None
+    
+    def load_partial(self, key: str) -> Optional[Tuple[List[List[Dict]], Dict]]:
+        """
+        Trả về (các trang đã crawl, trạng thái phân trang) của lần crawl bị dừng do hết quota
+        """
+        token_path = self._path(key, '.token')
+        part_path = self._path(key, '.jsonl.gz.part')
+        if not token_path.exists() or not part_path.exists():
+            return None
+        state = json.loads(token_path.read_text(encoding='utf-8'))
+        return self._read_pages(part_path), state
+    
+    def start(self, key: str):
+        """
+        Bỏ dữ liệu dở dang (không resume được) trước khi crawl lại từ đầu
+        """
+        self._path(key, '.jsonl.gz.part').unlink(missing_ok=True)
+        self._path(key, '.token').unlink(missing_ok=True)
+    
+    def append(self, key: str, page: List[Dict]):
+        # Mỗi lần mở 'at' thêm một gzip member; gzip đọc nối tiếp các member như một file
+        with gzip.open(self._path(key, '.jsonl.gz.part'), 'at', encoding='utf-8') as f:
+            f.write(json.dumps(page, ensure_ascii=False) + '\n')
+    
+    def save_token(self, key: str, page_token: str, fetched: int, kept: int):
+        state = {'page_token': page_token, 'fetched': fetched, 'kept': kept}
+        self._path(key, '.token').write_text(json.dumps(state), encoding='utf-8')
+    
+    def commit(self, key: str):
+        """
+        Đánh dấu crawl đã đầy đủ: đổi file .part thành file cache chính thức
+        """
+        part_path = self._path(key, '.jsonl.gz.part')
+        if not part_path.exists():
+            gzip.open(part_path, 'wt', encoding='utf-8').close()
+        os.replace(part_path, self._path(key, '.jsonl.gz'))
+        self._path(key, '.token').unlink(missing_ok=True)
+
+
 class YouTubeCommentCrawler:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache_dir: Optional[str] = None):
         """
         Khởi tạo YouTube Comment Crawler
         
         Args:
             api_key (str): YouTube Data API v3 key
+            cache_dir (Optional[str]): Thư mục cache comments đã crawl (None = không cache)
         """
         self.api_key = api_key
         self.youtube = build('youtube', 'v3', developerKey=api_key)
         self.comments_data = []
+        self.cache = CrawlCache(cache_dir) if cache_dir else None
         
     def extract_video_id(self, url: str) -> str:
         """
@@ -39,12 +291,7 @@ class YouTubeCommentCrawler:
         Returns:
             str: Video ID
         """
-        if 'youtube.com/watch?v=' in url:
-            return url.split('v=')[1].split('&')[0]
-        elif 'youtu.be/' in url:
-            return url.split('youtu.be/')[1].split('?')[0]
-        else:
-            raise ValueError("Invalid YouTube URL format")
+        return _video_id(url)
     
     def get_video_info(self, video_id: str) -> Dict:
         """
@@ -62,26 +309,31 @@ class YouTubeCommentCrawler:
                 id=video_id
             )
             response = request.execute()
-            
-            if response['items']:
-                video = response['items'][0]
-                return {
-                    'video_id': video_id,
-                    'title': video['snippet']['title'],
-                    'channel_title': video['snippet']['channelTitle'],
-                    'published_at': video['snippet']['publishedAt'],
-                    'view_count': video['statistics'].get('viewCount', 0),
-                    'like_count': video['statistics'].get('likeCount', 0),
-                    'comment_count': video['statistics'].get('commentCount', 0)
-                }
-            else:
-                logger.warning(f"Video {video_id} not found")
-                return {}
+            return self._parse_video_info(video_id, response)
                 
         except HttpError as e:
             logger.error(f"Error getting video info: {e}")
             return {}
     
+    def _parse_video_info(self, video_id: str, response: Dict) -> Dict:
+        """
+        Chuyển response của videos().list thành thông tin video ({} nếu không tìm thấy)
+        """
+        if response.get('items'):
+            video = response['items'][0]
+            return {
+                'video_id': video_id,
+                'title': video['snippet']['title'],
+                'channel_title': video['snippet']['channelTitle'],
+                'published_at': video['snippet']['publishedAt'],
+                'view_count': video['statistics'].get('viewCount', 0),
+                'like_count': video['statistics'].get('likeCount', 0),
+                'comment_count': video['statistics'].get('commentCount', 0)
+            }
+        else:
+            logger.warning(f"Video {video_id} not found")
+            return {}
+    
     def _count_words(self, text: str) -> int:
         """
         Đếm số từ trong text
@@ -145,6 +397,31 @@ class YouTubeCommentCrawler:
         Returns:
             List[Dict]: Danh sách comments
         """
+        return [
+            comment
+            for page in self.iter_comment_pages(video_id, max_comments, order, min_words, max_words)
+            for comment in page
+        ]
+    
+    def iter_comment_pages(self, video_id: str, max_comments: int = 100, order: str = 'time',
+                           min_words: Optional[int] = None,
+                           max_words: Optional[int] = None) -> Iterator[List[Dict]]:
+        """
+        Lấy comments từ video YouTube theo từng trang API (tối đa 100 threads mỗi trang)
+        
+        Mỗi trang được filter theo số từ rồi yield ngay, nên người gọi có thể ghi/xử lý
+        dần mà không cần giữ toàn bộ comments. Tổng các trang giống hệt get_comments.
+        
+        Args:
+            video_id (str): Video ID
+            max_comments (int): Số lượng comment tối đa cần lấy
+            order (str): Thứ tự sắp xếp ('time', 'relevance', 'rating')
+            min_words (Optional[int]): Số từ tối thiểu (None = không giới hạn)
+            max_words (Optional[int]): Số từ tối đa (None = không giới hạn)
+            
+        Yields:
+            List[Dict]: Comments của một trang (đã filter)
+        """
         next_page_token = None
         
         logger.info(f"Bắt đầu crawl comments cho video: {video_id}")
@@ -155,13 +432,35 @@ class YouTubeCommentCrawler:
         # Ước tính: nếu filter thì cần fetch nhiều hơn để đủ số lượng
         fetch_multiplier = 2 if (min_words is not None or max_words is not None) else 1
         target_fetch = max_comments * fetch_multiplier
-        raw_comments = []
+        fetched = 0
+        kept = 0
         
-        while len(raw_comments) < target_fetch:
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(video_id, order, max_comments, min_words, max_words)
+            cached_pages = self.cache.load(cache_key)
+            if cached_pages is not None:
+                logger.info(f"Dùng {sum(map(len, cached_pages))} comments từ cache cho video: {video_id}")
+                yield from cached_pages
+                return
+            partial = self.cache.load_partial(cache_key)
+            if partial is not None:
+                # Crawl lần trước dừng do hết quota: trả lại các trang đã có rồi crawl tiếp
+                cached_pages, state = partial
+                logger.info(f"Tiếp tục crawl video {video_id} từ pageToken đã lưu ({state['kept']} comments)")
+                yield from cached_pages
+                next_page_token = state['page_token']
+                fetched = state['fetched']
+                kept = state['kept']
+            else:
+                self.cache.start(cache_key)
+        completed = True
+        
+        while fetched < target_fetch and kept < max_comments:
             try:
                 # Lấy comment threads (top-level comments)
                 # Tính số lượng còn cần fetch, tối đa 100 mỗi request (YouTube API limit)
-                remaining = target_fetch - len(raw_comments)
+                remaining = target_fetch - fetched
                 request = self.youtube.commentThreads().list(
                     part='snippet,replies',
                     videoId=video_id,
@@ -171,26 +470,20 @@ class YouTubeCommentCrawler:
                 )
                 
                 response = request.execute()
+                page = []
+                self._collect_thread_items(response['items'], video_id, page, remaining)
+                fetched += len(page)
                 
-                for item in response['items']:
-                    if len(raw_comments) >= target_fetch:
-                        break
-                        
-                    # Xử lý top-level comment
-                    top_comment = self._process_comment(item['snippet']['topLevelComment'], video_id)
-                    raw_comments.append(top_comment)
-                    
-                    # Xử lý replies nếu có
-                    if 'replies' in item:
-                        for reply in item['replies']['comments'][:5]:  # Giới hạn 5 replies per comment
-                            if len(raw_comments) >= target_fetch:
-                                break
-                            reply_comment = self._process_comment(reply, video_id, is_reply=True)
-                            reply_comment['parent_comment_id'] = top_comment['comment_id']
-                            raw_comments.append(reply_comment)
-                
+                # Filter theo số từ và cắt phần vượt quá max_comments
+                page = self._filter_by_word_count(page, min_words, max_words)[:max_comments - kept]
+                kept += len(page)
                 # Kiểm tra có trang tiếp theo không
                 next_page_token = response.get('nextPageToken')
+                if page:
+                    if cache_key is not None:
+                        self.cache.append(cache_key, page)
+                    yield page
+                
                 if not next_page_token:
                     break
                     
@@ -201,9 +494,46 @@ class YouTubeCommentCrawler:
                 logger.error(f"Error fetching comments: {e}")
                 if e.resp.status == 403:
                     logger.error("API quota exceeded or access denied")
+                    completed = False
+                    if cache_key is not None and b'quotaExceeded' in (e.content or b''):
+                        # Lưu pageToken của trang bị lỗi để lần chạy sau crawl tiếp từ đây
+                        self.cache.save_token(cache_key, next_page_token, fetched, kept)
+                        logger.info(f"Đã lưu pageToken, chạy lại sau khi có quota để crawl tiếp video: {video_id}")
                     break
                 time.sleep(1)
         
+        if cache_key is not None and completed:
+            self.cache.commit(cache_key)
+        
+        logger.info(f"Đã crawl được {fetched} comments, sau filter còn {kept} comments")
+    
+    def _collect_thread_items(self, items: List[Dict], video_id: str,
+                              raw_comments: List[Dict], target_fetch: int) -> None:
+        """
+        Thêm comments (và tối đa 5 replies mỗi comment) của một trang commentThreads vào raw_comments
+        """
+        for item in items:
+            if len(raw_comments) >= target_fetch:
+                break
+                
+            # Xử lý top-level comment
+            top_comment = self._process_comment(item['snippet']['topLevelComment'], video_id)
+            raw_comments.append(top_comment)
+            
+            # Xử lý replies nếu có
+            if 'replies' in item:
+                for reply in item['replies']['comments'][:5]:  # Giới hạn 5 replies per comment
+                    if len(raw_comments) >= target_fetch:
+                        break
+                    reply_comment = self._process_comment(reply, video_id, is_reply=True)
+                    reply_comment['parent_comment_id'] = top_comment['comment_id']
+                    raw_comments.append(reply_comment)
+    
+    def _finalize_comments(self, raw_comments: List[Dict], max_comments: int,
+                           min_words: Optional[int], max_words: Optional[int]) -> List[Dict]:
+        """
+        Filter theo số từ và giới hạn số lượng comments cuối cùng
+        """
         # Filter comments theo số lượng từ
         comments = self._filter_by_word_count(raw_comments, min_words, max_words)
         
@@ -283,6 +613,32 @@ class YouTubeCommentCrawler:
             logger.error(f"Error crawling video: {e}")
             return {'success': False, 'error': str(e)}
     
+    def crawl_video_pages(self, video_url: str, max_comments: int = 100, order: str = 'time',
+                          min_words: Optional[int] = None, max_words: Optional[int] = None) -> Dict:
+        """
+        Giống crawl_video nhưng comments được trả về dần theo từng trang API
+        
+        Returns:
+            Dict: Kết quả crawl; 'pages' là generator các lô comments (thay cho 'comments')
+        """
+        try:
+            video_id = self.extract_video_id(video_url)
+            logger.info(f"Video ID: {video_id}")
+            
+            video_info = self.get_video_info(video_id)
+            if not video_info:
+                return {'success': False, 'error': 'Video not found'}
+            
+            return {
+                'success': True,
+                'video_info': video_info,
+                'pages': self.iter_comment_pages(video_id, max_comments, order, min_words, max_words)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error crawling video: {e}")
+            return {'success': False, 'error': str(e)}
+    
     def crawl_from_csv(
         self,
         csv_path: str,
@@ -294,7 +650,10 @@ class YouTubeCommentCrawler:
         deduplicate_urls: bool = True,
         min_likes: int = 0,
         min_words: Optional[int] = None,
-        max_words: Optional[int] = None
+        max_words: Optional[int] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        sink: Optional[Callable[[List[Dict]], Any]] = None
     ) -> Dict:
         """
         Crawl comments cho danh sách video trong file CSV
@@ -304,12 +663,17 @@ class YouTubeCommentCrawler:
             url_column (str): Tên cột chứa URL video (mặc định: 'url')
             max_comments (int): Số lượng comment tối đa cho mỗi video
             order (str): Thứ tự sắp xếp comments
-            delay (float): Thời gian nghỉ giữa mỗi video (giây)
+            delay (float): Thời gian nghỉ giữa mỗi video (giây), chỉ dùng khi crawl tuần tự
             limit (int): Giới hạn số lượng video cần crawl (None = tất cả)
             deduplicate_urls (bool): Có bỏ qua URL trùng lặp không
             min_likes (int): Số lượt like tối thiểu (0 = disabled)
             min_words (Optional[int]): Số từ tối thiểu (None = không giới hạn)
             max_words (Optional[int]): Số từ tối đa (None = không giới hạn)
+            concurrency (int): Số video crawl đồng thời qua aiohttp (<= 1 hoặc
+                không có aiohttp = crawl tuần tự như cũ)
+            requests_per_second (float): Giới hạn tổng số request API mỗi giây
+            sink (Callable): Nhận comments của từng video ngay khi crawl xong
+                (None = gom vào self.comments_data)
         
         Returns:
             Dict: Tổng hợp kết quả crawl
@@ -318,61 +682,155 @@ class YouTubeCommentCrawler:
             logger.error(f"CSV file not found: {csv_path}")
             return {'success': False, 'error': f'CSV file not found: {csv_path}'}
         
-        df = pd.read_csv(csv_path)
-        
-        if url_column not in df.columns:
+        if url_column not in pd.read_csv(csv_path, nrows=0).columns:
             error_msg = f"Column '{url_column}' not found in CSV"
             logger.error(error_msg)
             return {'success': False, 'error': error_msg}
         
-        context_columns = [col for col in df.columns if col != url_column]
-        videos: List[Dict[str, Any]] = []
-        seen_urls = set()
-        
-        for _, row in df.iterrows():
-            raw_url = row.get(url_column)
-            if pd.isna(raw_url):
-                continue
-            video_url = str(raw_url).strip()
-            if not video_url:
-                continue
-            if deduplicate_urls and video_url in seen_urls:
-                continue
-            seen_urls.add(video_url)
-            
-            metadata = {}
-            for col in context_columns:
-                value = row.get(col)
-                metadata[f"source_{col}"] = None if pd.isna(value) else value
-            videos.append({'url': video_url, 'metadata': metadata})
+        videos = list(self.iter_csv_videos(csv_path, url_column, deduplicate_urls, limit))
         
         if not videos:
             error_msg = f"No valid URLs found in column '{url_column}'"
             logger.error(error_msg)
             return {'success': False, 'error': error_msg}
         
-        if limit is not None and limit > 0:
-            videos = videos[:limit]
+        logger.info(f"Bắt đầu crawl từ CSV: {csv_path}")
+        logger.info(f"Tổng số video cần crawl: {len(videos)}")
+        
+        return self.crawl_videos(
+            videos, max_comments=max_comments, order=order, delay=delay,
+            min_likes=min_likes, min_words=min_words, max_words=max_words,
+            concurrency=concurrency, requests_per_second=requests_per_second, sink=sink
+        )
+    
+    def iter_csv_videos(
+        self,
+        csv_path: str,
+        url_column: str = 'url',
+        deduplicate_urls: bool = True,
+        limit: Optional[int] = None
+    ):
+        """
+        Đọc danh sách video từ CSV theo từng chunk trong một lượt duy nhất
+        
+        Args:
+            csv_path (str): Đường dẫn tới file CSV chứa danh sách video
+            url_column (str): Tên cột chứa URL video
+            deduplicate_urls (bool): Có bỏ qua URL trùng lặp không
+            limit (int): Dừng đọc khi đủ số video (None = tất cả)
+        
+        Yields:
+            Dict: {'url': ..., 'metadata': {'source_<cột>': giá trị}}
+        """
+        seen_urls, url_key = self._url_dedupe_index(csv_path)
+        count = 0
+        reader = pd.read_csv(csv_path, dtype={url_column: 'string'},
+                             chunksize=CSV_CHUNK_ROWS, memory_map=True)
+        with reader:
+            for chunk in reader:
+                context_columns = [col for col in chunk.columns if col != url_column]
+                metadata_keys = [f"source_{col}" for col in context_columns]
+                urls = chunk[url_column].str.strip()
+                rows = chunk[context_columns].itertuples(index=False, name=None)
+                
+                for video_url, values in zip(urls, rows):
+                    if pd.isna(video_url) or not video_url:
+                        continue
+                    if deduplicate_urls:
+                        key = url_key(video_url)
+                        if key in seen_urls:
+                            continue
+                        seen_urls.add(key)
+                    
+                    metadata = {
+                        key: None if pd.isna(value) else value
+                        for key, value in zip(metadata_keys, values)
+                    }
+                    yield {'url': video_url, 'metadata': metadata}
+                    
+                    count += 1
+                    if limit is not None and 0 < limit <= count:
+                        return
+    
+    @staticmethod
+    def _url_dedupe_index(csv_path: str):
+        """
+        Chọn cấu trúc nhớ các URL đã gặp: set (chính xác) cho CSV thường, ScalableBloomFilter
+        (bộ nhớ cố định, có thể bỏ nhầm rất ít URL) cho CSV từ BLOOM_DEDUPE_MIN_BYTES trở lên
+        
+        Returns:
+            Tuple: (tập URL đã gặp, hàm tạo khóa từ URL)
+        """
+        if ScalableBloomFilter is None or os.path.getsize(csv_path) < BLOOM_DEDUPE_MIN_BYTES:
+            return set(), str
+        
+        logger.info("CSV lớn: dedupe URL bằng Bloom filter")
+        seen = ScalableBloomFilter(initial_capacity=1_000_000, error_rate=BLOOM_ERROR_RATE,
+                                   mode=ScalableBloomFilter.LARGE_SET_GROWTH)
+        # Băm URL thành số 64-bit trước khi đưa vào filter để khóa có độ dài cố định
+        if xxhash is not None:
+            return seen, lambda url: xxhash.xxh64_intdigest(url.encode('utf-8'))
+        return seen, str
+    
+    def crawl_videos(
+        self,
+        videos: List[Dict[str, Any]],
+        max_comments: int = 100,
+        order: str = 'time',
+        delay: float = 0.2,
+        min_likes: int = 0,
+        min_words: Optional[int] = None,
+        max_words: Optional[int] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        sink: Optional[Callable[[List[Dict]], Any]] = None
+    ) -> Dict:
+        """
+        Crawl comments cho danh sách video dạng {'url': ..., 'metadata': {...}}
+        
+        Với aiohttp và concurrency > 1, các video được crawl song song (asyncio.gather
+        giới hạn bởi Semaphore, request API được giãn cách theo requests_per_second);
+        ngược lại crawl tuần tự với `delay` giữa các video.
+        
+        Comments của mỗi video (đã gắn metadata) được chuyển ngay cho `sink` rồi bỏ khỏi
+        kết quả, nên bộ nhớ chỉ giữ comments của các video đang xử lý. Không có sink thì
+        comments được gom vào self.comments_data như trước.
+        
+        Returns:
+            Dict: Tổng hợp kết quả crawl
+        """
+        if sink is None:
+            sink = self.comments_data.extend
+        
+        if aiohttp is not None and concurrency > 1:
+            results = asyncio.run(self._crawl_videos_async(
+                videos, max_comments, order, min_likes, min_words, max_words,
+                concurrency, requests_per_second, sink
+            ))
+        else:
+            results = []
+            for idx, video_entry in enumerate(videos, start=1):
+                video_url = video_entry['url']
+                logger.info(f"[{idx}/{len(videos)}] Crawl video: {video_url}")
+                # Sử dụng get_top_comments nếu min_likes > 0, ngược lại dùng crawl_video
+                if min_likes > 0:
+                    result = self.get_top_comments(video_url, max_comments, min_likes, min_words, max_words)
+                else:
+                    result = self.crawl_video(video_url, max_comments=max_comments, order=order, 
+                                            min_words=min_words, max_words=max_words)
+                if result['success']:
+                    sink(self._take_comments(result, video_entry['metadata']))
+                results.append(result)
+                time.sleep(max(delay, 0))
         
         crawl_summary = []
         failed_urls = []
         total_comments = 0
         
-        logger.info(f"Bắt đầu crawl từ CSV: {csv_path}")
-        logger.info(f"Tổng số video cần crawl: {len(videos)}")
-        
-        for idx, video_entry in enumerate(videos, start=1):
+        for video_entry, result in zip(videos, results):
             video_url = video_entry['url']
             metadata = video_entry['metadata']
             
-            logger.info(f"[{idx}/{len(videos)}] Crawl video: {video_url}")
-            # Sử dụng get_top_comments nếu min_likes > 0, ngược lại dùng crawl_video
-            if min_likes > 0:
-                result = self.get_top_comments(video_url, max_comments, min_likes, min_words, max_words)
-            else:
-                result = self.crawl_video(video_url, max_comments=max_comments, order=order, 
-                                        min_words=min_words, max_words=max_words)
-            
             summary_item = {
                 'url': video_url,
                 'metadata': metadata,
@@ -381,21 +839,13 @@ class YouTubeCommentCrawler:
             }
             
             if result['success']:
-                # Gắn metadata vào comments
-                comments = result['comments']
-                if metadata:
-                    for comment in comments:
-                        comment.update(metadata)
-                
-                self.comments_data.extend(comments)
-                total_comments += len(comments)
+                total_comments += result['total_comments']
                 summary_item['video_info'] = result['video_info']
             else:
                 summary_item['error'] = result.get('error', 'Unknown error')
                 failed_urls.append(video_url)
             
             crawl_summary.append(summary_item)
-            time.sleep(max(delay, 0))
         
         logger.info(f"Hoàn thành crawl từ CSV. Tổng số comments: {total_comments}")
         if failed_urls:
@@ -406,10 +856,21 @@ class YouTubeCommentCrawler:
             'summary': crawl_summary,
             'failed_urls': failed_urls,
             'total_videos': len(videos),
-            'total_comments': total_comments,
-            'aggregated_comments': self.comments_data
+            'total_comments': total_comments
         }
     
+    @staticmethod
+    def _take_comments(result: Dict, metadata: Dict) -> List[Dict]:
+        """
+        Lấy comments ra khỏi kết quả crawl một video và gắn metadata từ CSV vào từng comment
+        """
+        comments = result.pop('comments')
+        result['total_comments'] = len(comments)
+        if metadata:
+            for comment in comments:
+                comment.update(metadata)
+        return comments
+    
     def save_to_csv(self, data: List[Dict], filename: str = None):
         """
         Lưu dữ liệu comments vào file CSV
@@ -422,8 +883,7 @@ class YouTubeCommentCrawler:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"youtube_comments_{timestamp}.csv"
         
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False, encoding='utf-8')
+        write_csv(data, filename)
         logger.info(f"Đã lưu {len(data)} comments vào file: {filename}")
         return filename
     
@@ -439,8 +899,13 @@ class YouTubeCommentCrawler:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"youtube_comments_{timestamp}.json"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            # orjson ghi UTF-8 không escape ký tự tiếng Việt, như ensure_ascii=False
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         
         logger.info(f"Đã lưu {len(data)} comments vào file: {filename}")
         return filename
@@ -475,29 +940,210 @@ class YouTubeCommentCrawler:
             comments = self.get_comments(video_id, max_comments * 2, order='relevance', 
                                         min_words=min_words, max_words=max_words)
             
-            # Lọc comments có like >= min_likes
-            filtered_comments = [c for c in comments if c['like_count'] >= min_likes]
+            return self._top_comments_result(video_info, comments, max_comments, min_likes)
             
-            # Sắp xếp theo số lượt like giảm dần
-            sorted_comments = sorted(filtered_comments, key=lambda x: x['like_count'], reverse=True)
+        except Exception as e:
+            logger.error(f"Error getting top comments: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _top_comments_result(self, video_info: Dict, comments: List[Dict],
+                             max_comments: int, min_likes: int) -> Dict:
+        """
+        Lọc comments có like >= min_likes, sắp xếp theo like giảm dần và lấy top
+        """
+        # Lọc comments có like >= min_likes
+        filtered_comments = [c for c in comments if c['like_count'] >= min_likes]
+        
+        # Sắp xếp theo số lượt like giảm dần
+        sorted_comments = sorted(filtered_comments, key=lambda x: x['like_count'], reverse=True)
+        
+        # Lấy top comments
+        top_comments = sorted_comments[:max_comments]
+        
+        logger.info(f"Đã lấy {len(top_comments)} top comments (min_likes={min_likes})")
+        
+        return {
+            'success': True,
+            'video_info': video_info,
+            'comments': top_comments,
+            'total_comments': len(top_comments),
+            'min_likes': min_likes,
+            'order': 'top_liked'
+        }
+    
+    # ------------------------------------------------------------------
+    # Crawl bất đồng bộ (aiohttp) cho nhiều video
+    # ------------------------------------------------------------------
+    
+    async def _api_get_async(self, session, resource: str, params: Dict,
+                             pacer: RequestPacer) -> Dict:
+        """
+        Gọi một endpoint của YouTube Data API v3 qua aiohttp
+        """
+        query = {k: v for k, v in params.items() if v is not None}
+        query['key'] = self.api_key
+        await pacer.wait()
+        async with session.get(f"{YOUTUBE_API_URL}/{resource}", params=query) as resp:
+            body = await resp.read()
+            data = orjson.loads(body) if orjson is not None else json.loads(body)
+            if resp.status != 200:
+                message = (data or {}).get('error', {}).get('message', '')
+                raise YouTubeApiError(resp.status, message)
+        return data
+    
+    async def get_video_info_async(self, session, video_id: str, pacer: RequestPacer) -> Dict:
+        """
+        Phiên bản async của get_video_info
+        """
+        try:
+            response = await self._api_get_async(
+                session, 'videos', {'part': 'snippet,statistics', 'id': video_id}, pacer
+            )
+            return self._parse_video_info(video_id, response)
+        except (YouTubeApiError, aiohttp.ClientError) as e:
+            logger.error(f"Error getting video info: {e}")
+            return {}
+    
+    async def get_comments_async(self, session, video_id: str, pacer: RequestPacer,
+                                 max_comments: int = 100, order: str = 'time',
+                                 min_words: Optional[int] = None,
+                                 max_words: Optional[int] = None) -> List[Dict]:
+        """
+        Phiên bản async của get_comments (các trang của một video vẫn lấy tuần tự)
+        """
+        next_page_token = None
+        
+        logger.info(f"Bắt đầu crawl comments cho video: {video_id}")
+        fetch_multiplier = 2 if (min_words is not None or max_words is not None) else 1
+        target_fetch = max_comments * fetch_multiplier
+        raw_comments = []
+        
+        while len(raw_comments) < target_fetch:
+            try:
+                remaining = target_fetch - len(raw_comments)
+                response = await self._api_get_async(session, 'commentThreads', {
+                    'part': 'snippet,replies',
+                    'videoId': video_id,
+                    'maxResults': min(100, remaining),
+                    'pageToken': next_page_token,
+                    'order': order
+                }, pacer)
+                self._collect_thread_items(response.get('items', []), video_id, raw_comments, target_fetch)
+                
+                next_page_token = response.get('nextPageToken')
+                if not next_page_token:
+                    break
+                
+            except (YouTubeApiError, aiohttp.ClientError) as e:
+                logger.error(f"Error fetching comments: {e}")
+                if getattr(e, 'status', None) == 403:
+                    logger.error("API quota exceeded or access denied")
+                    break
+                await asyncio.sleep(1)
+        
+        return self._finalize_comments(raw_comments, max_comments, min_words, max_words)
+    
+    async def crawl_video_async(self, session, video_url: str, pacer: RequestPacer,
+                                max_comments: int = 100, order: str = 'time',
+                                min_likes: int = 0, min_words: Optional[int] = None,
+                                max_words: Optional[int] = None) -> Dict:
+        """
+        Phiên bản async của crawl_video / get_top_comments (get_top_comments khi min_likes > 0)
+        """
+        try:
+            video_id = self.extract_video_id(video_url)
+            logger.info(f"Video ID: {video_id}")
             
-            # Lấy top comments
-            top_comments = sorted_comments[:max_comments]
+            video_info = await self.get_video_info_async(session, video_id, pacer)
+            if not video_info:
+                return {'success': False, 'error': 'Video not found'}
             
-            logger.info(f"Đã lấy {len(top_comments)} top comments (min_likes={min_likes})")
+            if min_likes > 0:
+                comments = await self.get_comments_async(
+                    session, video_id, pacer, max_comments * 2, order='relevance',
+                    min_words=min_words, max_words=max_words
+                )
+                return self._top_comments_result(video_info, comments, max_comments, min_likes)
             
+            comments = await self.get_comments_async(
+                session, video_id, pacer, max_comments, order, min_words, max_words
+            )
             return {
                 'success': True,
                 'video_info': video_info,
-                'comments': top_comments,
-                'total_comments': len(top_comments),
-                'min_likes': min_likes,
-                'order': 'top_liked'
+                'comments': comments,
+                'total_comments': len(comments)
             }
             
         except Exception as e:
-            logger.error(f"Error getting top comments: {e}")
+            logger.error(f"Error crawling video: {e}")
             return {'success': False, 'error': str(e)}
+    
+    async def _crawl_videos_async(self, videos: List[Dict], max_comments: int, order: str,
+                                  min_likes: int, min_words: Optional[int],
+                                  max_words: Optional[int], concurrency: int,
+                                  requests_per_second: float,
+                                  sink: Callable[[List[Dict]], Any]) -> List[Dict]:
+        """
+        Crawl tối đa `concurrency` video cùng lúc; kết quả giữ đúng thứ tự của `videos`.
+        Comments của từng video đi qua một asyncio.Queue tới một writer task duy nhất
+        gọi `sink` (trong thread riêng để không chặn event loop).
+        Nếu `sink` lỗi (vd: hết dung lượng đĩa), các video còn lại bị hủy và lỗi
+        được raise lại thay vì tiếp tục crawl mà không ghi được gì.
+        """
+        sem = asyncio.Semaphore(max(1, concurrency))
+        pacer = RequestPacer(requests_per_second)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, concurrency))
+        total = len(videos)
+        sink_errors: List[Exception] = []
+        crawl_all: Optional[asyncio.Future] = None
+        
+        async def writer():
+            while True:
+                comments = await queue.get()
+                if comments is None:
+                    break
+                if sink_errors:
+                    # Chỉ xả queue để các task đang put không bị treo
+                    continue
+                try:
+                    await asyncio.to_thread(sink, comments)
+                except Exception as e:
+                    logger.error(f"Error writing comments: {e}")
+                    sink_errors.append(e)
+                    if crawl_all is not None:
+                        crawl_all.cancel()
+        
+        async def crawl_one(session, idx: int, video_entry: Dict) -> Dict:
+            async with sem:
+                logger.info(f"[{idx}/{total}] Crawl video: {video_entry['url']}")
+                result = await self.crawl_video_async(
+                    session, video_entry['url'], pacer, max_comments, order,
+                    min_likes, min_words, max_words
+                )
+            if result['success']:
+                await queue.put(self._take_comments(result, video_entry['metadata']))
+            return result
+        
+        writer_task = asyncio.create_task(writer())
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+        try:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                crawl_all = asyncio.gather(*[
+                    crawl_one(session, idx, entry)
+                    for idx, entry in enumerate(videos, start=1)
+                ])
+                try:
+                    results = await crawl_all
+                except asyncio.CancelledError:
+                    if not sink_errors:
+                        raise
+        finally:
+            await queue.put(None)
+            await writer_task
+        if sink_errors:
+            raise sink_errors[0]
+        return results
 
 
 def parse_args():
@@ -509,13 +1155,19 @@ def parse_args():
     parser.add_argument('--max-comments', type=int, default=100, help='Số comment tối đa mỗi video')
     parser.add_argument('--order', choices=['time', 'relevance', 'rating'], default='time',
                         help='Thứ tự lấy comments')
-    parser.add_argument('--delay', type=float, default=0.2, help='Thời gian nghỉ giữa các video (giây)')
+    parser.add_argument('--delay', type=float, default=0.2,
+                        help='Thời gian nghỉ giữa các video khi crawl tuần tự (giây)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Số video crawl đồng thời khi dùng CSV (mặc định: {DEFAULT_CONCURRENCY}, 1 = tuần tự)')
+    parser.add_argument('--rps', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help=f'Số request API tối đa mỗi giây (mặc định: {DEFAULT_REQUESTS_PER_SECOND})')
     parser.add_argument('--limit', type=int, help='Giới hạn số video cần crawl khi dùng CSV')
     parser.add_argument('--no-dedupe', action='store_true', help='Không bỏ qua URL trùng lặp trong CSV')
     parser.add_argument('--min-words', type=int, help='Số từ tối thiểu của comment (None = không giới hạn)')
     parser.add_argument('--max-words', type=int, help='Số từ tối đa của comment (None = không giới hạn)')
     parser.add_argument('--output-csv', help='File CSV để lưu toàn bộ comments kết quả')
     parser.add_argument('--output-json', help='File JSON để lưu toàn bộ comments kết quả')
+    parser.add_argument('--cache-dir', help='Thư mục cache comments đã crawl, vd: .crawl_cache (mặc định: không cache)')
     return parser.parse_args()
 
 
@@ -535,8 +1187,9 @@ def main():
         print("❌ Vui lòng cung cấp --video-url hoặc --csv-path.")
         return
     
-    crawler = YouTubeCommentCrawler(api_key)
+    crawler = YouTubeCommentCrawler(api_key, cache_dir=args.cache_dir)
     aggregated_comments: List[Dict] = []
+    csv_writer = None
     
     if args.video_url:
         print(f"Bắt đầu crawl video: {args.video_url}")
@@ -551,17 +1204,35 @@ def main():
             return
     
     if args.csv_path:
-        csv_result = crawler.crawl_from_csv(
-            csv_path=args.csv_path,
-            url_column=args.url_column,
-            max_comments=args.max_comments,
-            order=args.order,
-            delay=args.delay,
-            limit=args.limit,
-            deduplicate_urls=not args.no_dedupe,
-            min_words=args.min_words,
-            max_words=args.max_words
-        )
+        # Ghi CSV nối tiếp theo từng video; chỉ gom trong bộ nhớ khi cần xuất JSON
+        aggregated_comments = []
+        if args.output_csv:
+            csv_writer = CommentCsvWriter(args.output_csv)
+        
+        def sink(comments: List[Dict]):
+            if csv_writer is not None:
+                csv_writer.write(comments)
+            if args.output_json:
+                aggregated_comments.extend(comments)
+        
+        try:
+            csv_result = crawler.crawl_from_csv(
+                csv_path=args.csv_path,
+                url_column=args.url_column,
+                max_comments=args.max_comments,
+                order=args.order,
+                delay=args.delay,
+                limit=args.limit,
+                deduplicate_urls=not args.no_dedupe,
+                min_words=args.min_words,
+                max_words=args.max_words,
+                concurrency=args.concurrency,
+                requests_per_second=args.rps,
+                sink=sink
+            )
+        finally:
+            if csv_writer is not None:
+                csv_writer.close()
         
         if not csv_result['success']:
             print("⚠️ Hoàn thành với một số lỗi.")
@@ -574,18 +1245,14 @@ def main():
             print(f"❗ Video lỗi: {len(csv_result['failed_urls'])}")
             for failed in csv_result['failed_urls']:
                 print(f"   - {failed}")
-        
-        aggregated_comments = csv_result['aggregated_comments']
     
-    # Lưu kết quả nếu cần
-    if aggregated_comments:
-        if args.output_csv:
-            crawler.save_to_csv(aggregated_comments, args.output_csv)
-        if args.output_json:
-            crawler.save_to_json(aggregated_comments, args.output_json)
-    else:
+    # Lưu kết quả nếu cần (với --csv-path, file CSV đã được ghi dần trong lúc crawl)
+    if aggregated_comments and args.output_csv and csv_writer is None:
+        crawler.save_to_csv(aggregated_comments, args.output_csv)
+    if aggregated_comments and args.output_json:
+        crawler.save_to_json(aggregated_comments, args.output_json)
+    if not aggregated_comments and not (csv_writer is not None and csv_writer.rows):
         print("ℹ️ Không có dữ liệu comment để lưu.")
 
-
 if __name__ == "__main__":
     main()
\ No newline at end of file